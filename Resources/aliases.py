@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""List, add or remove the aliases an entity is searchable by."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import get_aliases, add_alias, remove_alias
+
+USAGE = "Usage: aliases.py [list entity_id | add entity_id 'alias' | remove entity_id 'alias']"
+
+if __name__ == "__main__":
+    action = sys.argv[1] if len(sys.argv) > 1 else None
+    if action == "list" and len(sys.argv) > 2:
+        print(json.dumps(get_aliases(sys.argv[2]), indent=2))
+    elif action in ("add", "remove") and len(sys.argv) > 3:
+        update = add_alias if action == "add" else remove_alias
+        print(json.dumps(update(sys.argv[2], sys.argv[3]), indent=2))
+    else:
+        print(json.dumps({"error": USAGE}, indent=2))
+        sys.exit(1)
@@ -0,0 +1,4 @@
+"""
+Perfect Memory benchmarks
+Synthetic corpus generation and per-operation latency measurement.
+"""
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for AsyncMemoryStore reads.
+
+Runs the same mix of search_memory and get_entity calls three ways against a
+generated corpus: as plain blocking memory_core calls, and through
+AsyncMemoryStore with asyncio.gather at each reader pool size. Reports
+throughput, speedup over the blocking baseline and the worst event-loop lag
+seen while the async calls were in flight.
+
+    python async_reads.py --items 100000 --requests 400 --workers 1 2 4 8
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import subprocess
+import tempfile
+import shutil
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.run_benchmarks import ensure_corpus
+
+DEFAULT_ITEMS = 100000
+DEFAULT_REQUESTS = 400
+DEFAULT_WORKERS = [1, 2, 4, 8]
+LAG_TICK_SECONDS = 0.001
+
+def build_workload(requests: int, seed: int) -> List[tuple]:
+    """Alternate searches and entity fetches drawn from the corpus."""
+    import memory_core
+    from benchmarks.corpus import build_vocabulary, TextGenerator
+    
+    rng = random.Random(seed + 2)
+    text = TextGenerator(rng, build_vocabulary(seed))
+    conn = sqlite3.connect(memory_core.DB_PATH)
+    entity_count = conn.execute('SELECT MAX(rowid) FROM entities').fetchone()[0] or 0
+    
+    workload = []
+    for i in range(requests):
+        if i % 2 == 0 or not entity_count:
+            workload.append(("search_memory", text.word()))
+        else:
+            row = conn.execute('SELECT entity_id FROM entities WHERE rowid = ?',
+                               (rng.randint(1, entity_count),)).fetchone()
+            workload.append(("get_entity", row[0] if row else ""))
+    conn.close()
+    return workload
+
+def run_blocking(workload: List[tuple]) -> tuple:
+    """Baseline: the calls one after another. Returns (seconds, longest call).
+    
+    The longest call is how long an event loop making these calls directly
+    would stall.
+    """
+    import memory_core
+    longest = 0.0
+    start = time.perf_counter()
+    for operation, argument in workload:
+        call_start = time.perf_counter()
+        getattr(memory_core, operation)(argument)
+        longest = max(longest, time.perf_counter() - call_start)
+    return time.perf_counter() - start, longest
+
+async def _watch_lag(stop: asyncio.Event) -> float:
+    """Largest delay past a 1 ms sleep while other tasks run."""
+    worst = 0.0
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(LAG_TICK_SECONDS)
+        worst = max(worst, time.perf_counter() - before - LAG_TICK_SECONDS)
+    return worst
+
+async def run_async(workload: List[tuple], workers: int) -> Dict:
+    """All calls gathered at once through an AsyncMemoryStore with `workers` readers."""
+    from memory_async import AsyncMemoryStore
+    
+    async with AsyncMemoryStore(read_workers=workers) as store:
+        # Open every reader's connection before timing
+        await asyncio.gather(*(store.get_all_abilities() for _ in range(workers * 2)))
+    
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(_watch_lag(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(getattr(store, operation)(argument) for operation, argument in workload))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        lag = await watcher
+    return {"seconds": elapsed, "max_loop_lag_ms": round(lag * 1000, 3)}
+
+def measure_worker(requests: int, workers: List[int], seed: int):
+    """Child: measure against the corpus under PERFECT_MEMORY_ROOT and print JSON."""
+    workload = build_workload(requests, seed)
+    run_blocking(workload[:50])  # warm the page cache
+    
+    blocking, longest = run_blocking(workload)
+    results = [{
+        "mode": "blocking",
+        "workers": None,
+        "seconds": round(blocking, 4),
+        "throughput_ops_s": round(len(workload) / blocking, 2),
+        "speedup": 1.0,
+        "max_loop_lag_ms": round(longest * 1000, 3)
+    }]
+    for count in workers:
+        measured = asyncio.run(run_async(workload, count))
+        results.append({
+            "mode": "async",
+            "workers": count,
+            "seconds": round(measured["seconds"], 4),
+            "throughput_ops_s": round(len(workload) / measured["seconds"], 2),
+            "speedup": round(blocking / measured["seconds"], 2),
+            "max_loop_lag_ms": measured["max_loop_lag_ms"]
+        })
+        print(f"   {count} readers: {results[-1]['throughput_ops_s']} ops/s "
+              f"({results[-1]['speedup']}x)", file=sys.stderr)
+    print(json.dumps(results))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure AsyncMemoryStore read concurrency.")
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEMS, help="corpus size to generate or reuse")
+    parser.add_argument("--root", type=Path, help="measure an existing storage root instead")
+    parser.add_argument("--workdir", type=Path, help="where generated corpora are kept and reused")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="calls per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS, help="reader pool sizes")
+    parser.add_argument("--output", type=Path, help="write the report JSON here instead of stdout")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.measure:
+        measure_worker(args.requests, args.workers, args.seed)
+        return
+    
+    workdir = None
+    if args.root:
+        root = args.root
+    else:
+        workdir = args.workdir or Path(tempfile.mkdtemp(prefix="perfect_memory_async_"))
+        root = ensure_corpus(workdir, args.items, args.seed)
+    
+    try:
+        env = dict(os.environ, PERFECT_MEMORY_ROOT=str(root))
+        proc = subprocess.run([sys.executable, str(Path(__file__).resolve()), "--measure",
+                               "--requests", str(args.requests), "--seed", str(args.seed),
+                               "--workers"] + [str(count) for count in args.workers],
+                              env=env, stdout=subprocess.PIPE, check=True, text=True)
+        results = json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        if workdir is not None and args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        "root": str(root),
+        "items": None if args.root else args.items,
+        "requests": args.requests,
+        "cpu_count": os.cpu_count(),
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
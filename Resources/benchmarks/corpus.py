@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Synthetic memory corpus generator.
+Writes chats, typed entities, a power-law relation graph and access
+statistics into memory_core's storage root (set PERFECT_MEMORY_ROOT first),
+then indexes them the way the index worker would.
+"""
+
+import json
+import random
+import hashlib
+import bisect
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional, Callable
+
+import memory_core
+
+ENTITY_TYPES = ["person", "project", "concept", "organization", "location"]
+ENTITY_TYPE_WEIGHTS = [0.35, 0.25, 0.2, 0.1, 0.1]
+RELATION_TYPES = ["works_on", "knows", "part_of", "related_to", "located_in", "mentions"]
+SYLLABLES = ["ro", "bin", "son", "ka", "ta", "mi", "lo", "ne", "dra", "vel", "qu", "ist",
+             "mar", "en", "tor", "shi", "ba", "re", "ul", "fen", "ax", "oli", "zen", "pra"]
+
+VOCABULARY_SIZE = 5000
+CHAT_RATIO = 0.3
+RELATIONS_PER_ENTITY = 2
+INSERT_BATCH_SIZE = 1000
+CORPUS_SPAN_DAYS = 730
+
+def _zipf_cum_weights(n: int, exponent: float = 1.1) -> List[float]:
+    """Cumulative Zipf weights for ranks 1..n, for random.choices / bisect sampling."""
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+def zipf_index(rng: random.Random, cum_weights: List[float]) -> int:
+    """Draw a 0-based rank from precomputed cumulative Zipf weights."""
+    return bisect.bisect_left(cum_weights, rng.random() * cum_weights[-1])
+
+def build_vocabulary(seed: int, size: int = VOCABULARY_SIZE) -> List[str]:
+    """Deterministic pseudo-words; earlier words are drawn more often."""
+    rng = random.Random(seed)
+    words = []
+    seen = set()
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+def content_id(seed: int, kind: str, index: int) -> str:
+    """Reproducible id for the index-th chat or entity, shaped like generate_id()."""
+    digest = hashlib.md5(f"{seed}:{kind}:{index}".encode()).hexdigest()
+    return f"entity_{digest}" if kind == "entity" else digest
+
+class TextGenerator:
+    """Zipf-distributed filler text over a fixed vocabulary."""
+    
+    def __init__(self, rng: random.Random, vocabulary: List[str]):
+        self.rng = rng
+        self.vocabulary = vocabulary
+        self.cum_weights = _zipf_cum_weights(len(vocabulary))
+    
+    def word(self) -> str:
+        return self.vocabulary[zipf_index(self.rng, self.cum_weights)]
+    
+    def words(self, n: int) -> str:
+        return " ".join(self.word() for _ in range(n))
+    
+    def sentence_length(self, mean: float) -> int:
+        return max(1, int(self.rng.lognormvariate(0, 0.8) * mean))
+    
+    def title(self) -> str:
+        return " ".join(w.capitalize() for w in self.words(self.rng.randint(2, 4)).split())
+    
+    def chat_transcript(self) -> str:
+        turns = max(2, int(self.rng.lognormvariate(2.2, 0.7)))
+        parts = []
+        for turn in range(turns):
+            role = "User" if turn % 2 == 0 else "Assistant"
+            parts.append(f"**{role}:** {self.words(self.sentence_length(40 if role == 'Assistant' else 15))}")
+        return "\n\n".join(parts) + "\n"
+    
+    def entity_body(self, name: str, created: datetime) -> str:
+        sections = []
+        for _ in range(self.rng.randint(1, 5)):
+            sections.append(f"## {self.title()}\n\n{self.words(self.sentence_length(60))}\n")
+        body = f"# {name}\n\n" + "\n".join(sections)
+        updated = created
+        for _ in range(int(self.rng.expovariate(1.0))):
+            updated += timedelta(days=self.rng.randint(1, 60))
+            body += f"\n\n---\n\n**Updated:** {updated.isoformat()}\n\n{self.words(self.sentence_length(30))}"
+        return body
+
+def _timestamp(when: datetime) -> str:
+    """Format like SQLite's CURRENT_TIMESTAMP."""
+    return when.strftime("%Y-%m-%d %H:%M:%S")
+
+CHAT_SQL = '''INSERT OR REPLACE INTO chats (chat_id, url, title, summary, created_at, updated_at,
+                                           tools_used, topics, file_path)
+              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+ENTITY_SQL = '''INSERT OR REPLACE INTO entities (entity_id, entity_type, name, summary, file_path,
+                                              importance_score, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+ALIAS_SQL = '''INSERT OR IGNORE INTO entity_aliases (alias_key, entity_id, alias, source)
+               VALUES (?, ?, ?, ?)'''
+RELATION_SQL = '''INSERT INTO relations (from_entity_id, to_entity_id, relation_type, strength)
+                  VALUES (?, ?, ?, ?)'''
+ACCESS_SQL = '''INSERT INTO memory_index (content_id, content_type, importance_score, access_count, last_accessed)
+                VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(content_id) DO UPDATE SET
+                    access_count = access_count + 1,
+                    last_accessed = MAX(last_accessed, excluded.last_accessed)'''
+
+class _BatchWriter:
+    """Buffer rows per statement and flush them with executemany in one transaction."""
+    
+    def __init__(self, conn, batch_size: int = INSERT_BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.pending = {}
+    
+    def add(self, sql: str, row: tuple):
+        rows = self.pending.setdefault(sql, [])
+        rows.append(row)
+        if len(rows) >= self.batch_size:
+            self.flush()
+    
+    def flush(self):
+        for sql, rows in self.pending.items():
+            if rows:
+                self.conn.executemany(sql, rows)
+                rows.clear()
+        self.conn.commit()
+
+def generate_corpus(items: int, seed: int = 0, chat_ratio: float = CHAT_RATIO,
+                    progress: Optional[Callable[[str, int, int], None]] = None) -> Dict:
+    """Populate memory_core's storage root with `items` chats and entities.
+    
+    Rows and files are written in batches and nothing is held for the whole
+    corpus, so 1M items fit in modest memory. The full-text index, entity
+    sections and chat messages are then built by reindex_memory_search from
+    the files, as the index worker would build them; name and trigram rows
+    follow from the chats and entities tables' triggers. Expects a fresh
+    storage root. Returns a manifest describing what was generated, which
+    the benchmark runner stores next to the DB.
+    """
+    rng = random.Random(seed)
+    vocabulary = build_vocabulary(seed)
+    text = TextGenerator(rng, vocabulary)
+    now = datetime.now()
+    n_chats = int(items * chat_ratio)
+    n_entities = items - n_chats
+    
+    conn = memory_core.get_connection()
+    memory_core.migrate(conn)
+    writer = _BatchWriter(conn)
+    
+    def created_at() -> datetime:
+        return now - timedelta(seconds=rng.randint(0, CORPUS_SPAN_DAYS * 86400))
+    
+    def report(stage: str, done: int, total: int):
+        if progress and (done % (INSERT_BATCH_SIZE * 10) == 0 or done == total):
+            progress(stage, done, total)
+    
+    # Chats
+    for i in range(n_chats):
+        chat_id = content_id(seed, "chat", i)
+        url = f"https://claude.ai/chat/{chat_id}"
+        title = text.title()
+        created = created_at()
+        transcript = text.chat_transcript()
+        chat_file = memory_core.CHATS_DIR / f"{chat_id}.md"
+        data = f"# {title}\n\n**URL:** {url}\n\n**Date:** {created.isoformat()}\n\n---\n\n{transcript}".encode('utf-8')
+        with open(chat_file, 'wb') as f:
+            f.write(data)
+        summary = text.words(12)
+        writer.add(CHAT_SQL, (chat_id, url, title, summary, _timestamp(created), _timestamp(created),
+                              json.dumps([text.word() for _ in range(rng.randint(0, 3))]),
+                              json.dumps([text.word() for _ in range(rng.randint(1, 4))]),
+                              str(chat_file)))
+        report("chats", i + 1, n_chats)
+    
+    # Entities
+    for type_name in ENTITY_TYPES:
+        (memory_core.ENTITIES_DIR / type_name).mkdir(parents=True, exist_ok=True)
+    for i in range(n_entities):
+        entity_id = content_id(seed, "entity", i)
+        entity_type = rng.choices(ENTITY_TYPES, ENTITY_TYPE_WEIGHTS)[0]
+        name = text.title()
+        created = created_at()
+        updated = min(now, created + timedelta(days=int(rng.expovariate(1 / 30))))
+        body = text.entity_body(name, created)
+        entity_file = memory_core.ENTITIES_DIR / entity_type / f"{entity_id}.md"
+        data = f"# {name}\n\n**Type:** {entity_type}\n**Created:** {created.isoformat()}\n\n---\n\n{body}".encode('utf-8')
+        with open(entity_file, 'wb') as f:
+            f.write(data)
+        summary = text.words(15)
+        writer.add(ENTITY_SQL, (entity_id, entity_type, name, summary, str(entity_file),
+                                round(rng.betavariate(2, 5), 3), _timestamp(created), _timestamp(updated)))
+        for alias_idx, alias in enumerate(memory_core._derived_aliases(name, summary)):
+            writer.add(ALIAS_SQL, (memory_core.alias_key(alias), entity_id, alias,
+                                   "name" if alias_idx == 0 else "summary"))
+        report("entities", i + 1, n_entities)
+    
+    # Power-law relation graph: a few hub entities collect most edges
+    if n_entities > 1:
+        hub_weights = _zipf_cum_weights(n_entities)
+        for _ in range(n_entities * RELATIONS_PER_ENTITY):
+            source = rng.randrange(n_entities)
+            target = zipf_index(rng, hub_weights)
+            if source != target:
+                writer.add(RELATION_SQL, (content_id(seed, "entity", source), content_id(seed, "entity", target),
+                                          rng.choice(RELATION_TYPES), round(rng.random(), 3)))
+    
+    # Access patterns: Zipf-popular items, most of the tail never touched
+    if items:
+        access_weights = _zipf_cum_weights(items)
+        for _ in range(items // 2):
+            rank = zipf_index(rng, access_weights)
+            kind, index = ("chat", rank) if rank < n_chats else ("entity", rank - n_chats)
+            writer.add(ACCESS_SQL, (content_id(seed, kind, index), kind, round(rng.random(), 3),
+                                    _timestamp(now - timedelta(days=rng.randint(0, 180)))))
+    
+    # Short-term memory of a realistic size
+    for i in range(40):
+        category = ("ability", "permission", "context")[i % 3]
+        conn.execute('''INSERT OR REPLACE INTO short_term_memory (key, value, category)
+                        VALUES (?, ?, ?)''',
+                     (f"{category}_{i}", json.dumps({category: text.title(), "details": text.words(12)}),
+                      category))
+    
+    writer.flush()
+    
+    # Index from the files just written, committing batch by batch
+    index_progress = (lambda done, total: progress("index", done, total)) if progress else None
+    index = memory_core.reindex_memory_search(conn, progress=index_progress,
+                                              on_batch=lambda checkpoint, indexed: conn.commit())
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+    
+    return {
+        "items": items,
+        "seed": seed,
+        "chats": n_chats,
+        "entities": n_entities,
+        "indexed": index["indexed"],
+        "vocabulary_size": len(vocabulary)
+    }
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Run Perfect Memory benchmarks at one or more corpus sizes.
+
+Each scale gets its own storage root. The corpus is generated in one child
+process and measured in another, so peak RSS reflects the operations rather
+than the generator. Results are emitted as JSON.
+
+    python run_benchmarks.py --scales 10000 100000 --output results.json
+    python run_benchmarks.py --scales 10000 --compare baseline.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import tempfile
+import argparse
+import functools
+import platform
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Callable
+
+RESOURCES_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RESOURCES_DIR))
+
+OPERATIONS = ["search_memory", "search_fuzzy_hit", "search_fuzzy_miss", "get_entity", "load_context", "store_chat", "create_entity",
+              "store_ability", "queue_ability", "weekly_maintenance"]
+DEFAULT_SCALES = [10000, 100000]
+DEFAULT_SAMPLES = 200
+DEFAULT_TOLERANCE = 0.2
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_kb():
+    """High-water resident set size of this process in KB, or None if unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict:
+    """Latency percentiles (ms) and throughput for one operation."""
+    ordered = sorted(latencies)
+    return {
+        "samples": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "throughput_ops_s": round(len(ordered) / wall_seconds, 2) if wall_seconds else None
+    }
+
+def time_calls(func: Callable, argument_sets: List[tuple]) -> Dict:
+    """Call func once per argument tuple and summarize the latencies."""
+    latencies = []
+    wall_start = time.perf_counter()
+    for args in argument_sets:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, time.perf_counter() - wall_start)
+
+def db_size_bytes(db_path: Path) -> int:
+    """Size of the database including any WAL file."""
+    total = 0
+    for path in (db_path, Path(f"{db_path}-wal")):
+        if path.exists():
+            total += path.stat().st_size
+    return total
+
+# ==================== CHILD PROCESSES ====================
+
+def generate_worker(items: int, seed: int):
+    """Child: build the corpus under PERFECT_MEMORY_ROOT."""
+    from benchmarks.corpus import generate_corpus
+    
+    def progress(stage, done, total):
+        print(f"   {stage}: {done}/{total}", file=sys.stderr)
+    
+    manifest = generate_corpus(items, seed=seed, progress=progress)
+    print(json.dumps(manifest))
+
+def measure_worker(operations: List[str], samples: int, seed: int):
+    """Child: time each operation against the corpus under PERFECT_MEMORY_ROOT."""
+    import memory_core
+    import load_context
+    from benchmarks.corpus import build_vocabulary, TextGenerator, _zipf_cum_weights, zipf_index
+    
+    rng = random.Random(seed + 1)
+    text = TextGenerator(rng, build_vocabulary(seed))
+    conn = sqlite3.connect(memory_core.DB_PATH)
+    memory_core.migrate(conn)  # a reused corpus may predate the current schema
+    while memory_core.process_index_queue(conn)["processed"]:
+        pass  # ...and have index jobs from the upgrade; finish them before timing
+    entity_count = conn.execute('SELECT MAX(rowid) FROM entities').fetchone()[0] or 0
+    
+    # Hot entities are fetched far more often than cold ones
+    entity_ids = []
+    if entity_count:
+        weights = _zipf_cum_weights(entity_count)
+        for _ in range(samples):
+            row = conn.execute('SELECT entity_id FROM entities WHERE rowid = ?',
+                               (zipf_index(rng, weights) + 1,)).fetchone()
+            if row:
+                entity_ids.append(row[0])
+    conn.close()
+    
+    queries = []
+    for i in range(samples):
+        queries.append(text.word() if i % 3 else f"{text.word()} {text.word()}")
+    
+    # One dropped letter per query, so exact search misses and fuzzy falls back
+    typos = []
+    while len(typos) < samples:
+        word = text.word()
+        if len(word) >= 5:
+            cut = rng.randint(1, len(word) - 2)
+            typos.append(word[:cut] + word[cut + 1:])
+    
+    def run_load_context():
+        with redirect_stdout(io.StringIO()):
+            load_context.main()
+    
+    def run_queued_abilities():
+        # Per-call latency is the enqueue; throughput includes the final flush
+        wall_start = time.perf_counter()
+        result = time_calls(memory_core.queue_ability, [(f"{prefix}queued {i}", text.words(8))
+                                                         for i in range(samples)])
+        memory_core.flush_short_term()
+        result["throughput_ops_s"] = round(samples / (time.perf_counter() - wall_start), 2)
+        return result
+    
+    prefix = f"bench_{int(time.time())}_"
+    workloads = {
+        "search_memory": lambda: time_calls(memory_core.search_memory, [(q,) for q in queries]),
+        "search_fuzzy_hit": lambda: time_calls(functools.partial(memory_core.search_memory, fuzzy=True),
+                                               [(q,) for q in queries]),
+        "search_fuzzy_miss": lambda: time_calls(functools.partial(memory_core.search_memory, fuzzy=True),
+                                                [(q,) for q in typos]),
+        "get_entity": lambda: time_calls(memory_core.get_entity, [(e,) for e in entity_ids]),
+        "load_context": lambda: time_calls(run_load_context, [()] * samples),
+        "store_chat": lambda: time_calls(memory_core.store_chat, [
+            (f"{prefix}{i}", "https://claude.ai/chat/bench", text.title(), text.chat_transcript(),
+             text.words(12)) for i in range(samples)]),
+        "create_entity": lambda: time_calls(memory_core.create_entity, [
+            (text.title(), "concept", text.entity_body("bench", datetime.now()), text.words(15))
+            for _ in range(samples)]),
+        "store_ability": lambda: time_calls(memory_core.store_ability, [
+            (f"{prefix}ability {i}", text.words(8)) for i in range(samples)]),
+        "queue_ability": run_queued_abilities,
+        "weekly_maintenance": lambda: time_calls(memory_core.weekly_maintenance, [()]),
+    }
+    
+    results = []
+    for name in operations:
+        result = workloads[name]()
+        result.update({
+            "operation": name,
+            "db_size_bytes": db_size_bytes(memory_core.DB_PATH),
+            "peak_rss_kb": peak_rss_kb()
+        })
+        results.append(result)
+        print(f"   {name}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms", file=sys.stderr)
+    print(json.dumps(results))
+
+def run_child(root: Path, args: List[str]):
+    """Run this script as a child process rooted at `root` and parse its JSON output."""
+    env = dict(os.environ, PERFECT_MEMORY_ROOT=str(root))
+    proc = subprocess.run([sys.executable, str(Path(__file__).resolve())] + args,
+                          env=env, stdout=subprocess.PIPE, check=True, text=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# ==================== RUNNER ====================
+
+def ensure_corpus(workdir: Path, items: int, seed: int) -> Path:
+    """Return the storage root for a corpus of `items`, generating it unless already present."""
+    root = workdir / f"corpus_{items}_{seed}"
+    manifest_path = root / "manifest.json"
+    if manifest_path.exists():
+        print(f"📦 Reusing corpus of {items} items at {root}", file=sys.stderr)
+        return root
+    
+    shutil.rmtree(root, ignore_errors=True)
+    print(f"📦 Generating corpus of {items} items at {root}", file=sys.stderr)
+    start = time.perf_counter()
+    manifest = run_child(root, ["--generate", str(items), "--seed", str(seed)])
+    manifest["generate_seconds"] = round(time.perf_counter() - start, 2)
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return root
+
+def run_scale(workdir: Path, items: int, operations: List[str], samples: int, seed: int) -> List[Dict]:
+    """Generate (or reuse) the corpus for one scale and measure it."""
+    root = ensure_corpus(workdir, items, seed)
+    print(f"⏱  Measuring {items} items", file=sys.stderr)
+    results = run_child(root, ["--measure", "--samples", str(samples), "--seed", str(seed),
+                               "--operations"] + operations)
+    for result in results:
+        result["scale"] = items
+    return results
+
+def compare(baseline: Dict, current: Dict, tolerance: float) -> List[Dict]:
+    """List operations whose p95 grew by more than `tolerance` versus the baseline."""
+    previous = {(r["scale"], r["operation"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["scale"], result["operation"]))
+        if not before or not before["p95_ms"]:
+            continue
+        change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+        if change > tolerance:
+            regressions.append({
+                "scale": result["scale"],
+                "operation": result["operation"],
+                "baseline_p95_ms": before["p95_ms"],
+                "p95_ms": result["p95_ms"],
+                "change": round(change, 3)
+            })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Perfect Memory operations at scale.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="corpus sizes (chats + entities) to benchmark")
+    parser.add_argument("--operations", nargs="+", default=OPERATIONS, choices=OPERATIONS)
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="calls per operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path,
+                        help="where corpora are kept and reused (default: a temporary directory)")
+    parser.add_argument("--output", type=Path, help="write results JSON here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed fractional p95 increase before --compare fails")
+    parser.add_argument("--generate", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.generate is not None:
+        generate_worker(args.generate, args.seed)
+        return
+    if args.measure:
+        measure_worker(args.operations, args.samples, args.seed)
+        return
+    
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="perfect_memory_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    
+    results = []
+    try:
+        for items in args.scales:
+            results.extend(run_scale(workdir, items, args.operations, args.samples, args.seed))
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "samples": args.samples,
+            "seed": args.seed
+        },
+        "results": results
+    }
+    
+    regressions = []
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.tolerance)
+        report["regressions"] = regressions
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+    
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Session-start latency harness for load_context.py.
+
+Runs load_context.py as a fresh process against a populated corpus, the way
+a session actually starts, and splits each run into phases: interpreter
+startup, imports, DB open, queries, JSON encoding, output and exit. Cold
+runs first evict the database from the OS page cache where the platform
+allows it. Exits non-zero when a run exceeds the budget.
+
+    python session_start.py --items 100000 --budget-ms 50 --workdir ./corpora
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+import shutil
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.run_benchmarks import ensure_corpus, percentile
+
+LOAD_CONTEXT = Path(__file__).resolve().parent.parent / "load_context.py"
+PHASES = ["interpreter", "imports", "db_open", "queries", "json_encode", "output", "exit"]
+DEFAULT_ITEMS = 100000
+DEFAULT_BUDGET_MS = 50.0
+DEFAULT_RUNS = 20
+DEFAULT_COLD_RUNS = 3
+
+def evict_from_page_cache(root: Path) -> bool:
+    """Ask the OS to drop cached pages of the database files; False if unsupported."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    db_dir = root / "database"
+    for path in db_dir.glob("memory.db*"):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+def run_once(root: Path) -> Dict:
+    """Start load_context.py once and return its phase durations in milliseconds."""
+    env = dict(os.environ, PERFECT_MEMORY_ROOT=str(root), PERFECT_MEMORY_TIMING="1")
+    spawned = time.time()
+    proc = subprocess.run([sys.executable, str(LOAD_CONTEXT)], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    exited = time.time()
+    if proc.returncode != 0:
+        raise RuntimeError(f"load_context.py failed: {proc.stderr.strip()}")
+    
+    marks = None
+    for line in proc.stderr.splitlines():
+        if line.startswith('{"timings"'):
+            marks = json.loads(line)["timings"]
+    if marks is None:
+        raise RuntimeError("load_context.py reported no timings (database missing?)")
+    
+    boundaries = [spawned, marks["script_start"], marks["imports"], marks["db_open"],
+                  marks["queries"], marks["json_encode"], marks["output"], exited]
+    phases = {name: (boundaries[i + 1] - boundaries[i]) * 1000 for i, name in enumerate(PHASES)}
+    phases["total"] = (exited - spawned) * 1000
+    return phases
+
+def summarize_runs(runs: List[Dict]) -> Dict:
+    """p50/p95/max per phase across runs."""
+    summary = {}
+    for name in PHASES + ["total"]:
+        values = sorted(run[name] for run in runs)
+        summary[name] = {
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "max_ms": round(values[-1], 3)
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure load_context.py session-start latency.")
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEMS, help="corpus size to generate or reuse")
+    parser.add_argument("--root", type=Path, help="measure an existing storage root instead")
+    parser.add_argument("--workdir", type=Path, help="where generated corpora are kept and reused")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="warm runs")
+    parser.add_argument("--cold-runs", type=int, default=DEFAULT_COLD_RUNS)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="fail if warm p95 end-to-end latency exceeds this")
+    parser.add_argument("--cold-budget-ms", type=float,
+                        help="fail if cold p95 end-to-end latency exceeds this (default: not enforced)")
+    parser.add_argument("--output", type=Path, help="write the report JSON here instead of stdout")
+    args = parser.parse_args()
+    
+    workdir = None
+    if args.root:
+        root = args.root
+    else:
+        workdir = args.workdir or Path(tempfile.mkdtemp(prefix="perfect_memory_session_"))
+        root = ensure_corpus(workdir, args.items, args.seed)
+    
+    try:
+        cold_runs = []
+        evicted = False
+        for _ in range(args.cold_runs):
+            evicted = evict_from_page_cache(root)
+            cold_runs.append(run_once(root))
+        warm_runs = [run_once(root) for _ in range(args.runs)]
+    finally:
+        if workdir is not None and args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        "root": str(root),
+        "items": None if args.root else args.items,
+        "budget_ms": args.budget_ms,
+        "cold_budget_ms": args.cold_budget_ms,
+        "page_cache_evicted": evicted,
+        "cold": summarize_runs(cold_runs) if cold_runs else None,
+        "warm": summarize_runs(warm_runs)
+    }
+    
+    failures = []
+    if report["warm"]["total"]["p95_ms"] > args.budget_ms:
+        failures.append(f"warm p95 {report['warm']['total']['p95_ms']} ms > budget {args.budget_ms} ms")
+    if args.cold_budget_ms is not None and cold_runs and report["cold"]["total"]["p95_ms"] > args.cold_budget_ms:
+        failures.append(f"cold p95 {report['cold']['total']['p95_ms']} ms > budget {args.cold_budget_ms} ms")
+    report["status"] = "fail" if failures else "pass"
+    report["failures"] = failures
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+    
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""Show one message of a chat with the messages around it, read from just that part of the file."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import get_chat_window
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({"error": "Usage: chat_window.py chat_id message_idx [before] [after]"}, indent=2))
+        sys.exit(1)
+    
+    chat_id = sys.argv[1]
+    message_idx = int(sys.argv[2])
+    before = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    after = int(sys.argv[4]) if len(sys.argv) > 4 else before
+    
+    print(json.dumps(get_chat_window(chat_id, message_idx, before, after), indent=2))
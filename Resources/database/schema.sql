@@ -1,24 +1,31 @@
 -- Claude's Perfect Memory Database Schema
 -- Provides comprehensive memory persistence across all sessions
+--
+-- memory_core.migrate() is authoritative: it upgrades any database in place
+-- and tracks the version in PRAGMA user_version. This file mirrors the
+-- current schema (version 14) so a database created from it converges too.
 
 -- Short-term memory for abilities, permissions, and session context
 CREATE TABLE IF NOT EXISTS short_term_memory (
     key TEXT PRIMARY KEY,
     value TEXT NOT NULL,
     category TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Chat transcripts index
 CREATE TABLE IF NOT EXISTS chats (
     chat_id TEXT PRIMARY KEY,
-    url TEXT NOT NULL,
+    url TEXT,
     title TEXT NOT NULL,
     summary TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     tools_used TEXT,  -- JSON array
     topics TEXT,      -- JSON array
-    file_path TEXT NOT NULL
+    file_path TEXT NOT NULL,
+    content_hash TEXT  -- of what the index worker last indexed
 );
 
 -- Entity storage (people, projects, concepts, etc.)
@@ -30,7 +37,8 @@ CREATE TABLE IF NOT EXISTS entities (
     file_path TEXT NOT NULL,
     importance_score REAL DEFAULT 0.5,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    content_hash TEXT
 );
 
 -- Relations between entities
@@ -55,8 +63,91 @@ CREATE VIRTUAL TABLE IF NOT EXISTS memory_search USING fts5(
     tokenize = 'porter unicode61'
 );
 
--- Memory index for embeddings
+-- Names-only prefix index for suggest(); rows are kept in step with chats,
+-- entities and memory_index by triggers that memory_core.migrate() creates
+CREATE VIRTUAL TABLE IF NOT EXISTS name_search USING fts5(
+    name,
+    tier,
+    content_type UNINDEXED,
+    content_id UNINDEXED,
+    importance UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '1 2 3'
+);
+
+-- Trigram index over names, titles and summaries for fuzzy search; kept in
+-- step with chats and entities by triggers that memory_core.migrate() creates
+CREATE VIRTUAL TABLE IF NOT EXISTS fuzzy_search USING fts5(
+    name,
+    summary,
+    content_type UNINDEXED,
+    content_id UNINDEXED,
+    tokenize = 'trigram'
+);
+
+-- Other names entities go by, matched on a normalized alias_key; derived
+-- ones (source 'name' or 'summary') come from the entity row, the rest are
+-- added through memory_core.add_alias()
+CREATE TABLE IF NOT EXISTS entity_aliases (
+    alias_key TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT 'manual',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (alias_key, entity_id)
+) WITHOUT ROWID;
+
+-- Sections of entity files (headings and --- update blocks) with their byte
+-- ranges, filled by the index worker; section_search rows share section_id
+CREATE TABLE IF NOT EXISTS entity_sections (
+    section_id INTEGER PRIMARY KEY,
+    entity_id TEXT NOT NULL,
+    section_idx INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    byte_start INTEGER NOT NULL,
+    byte_end INTEGER NOT NULL,
+    UNIQUE (entity_id, section_idx)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS section_search USING fts5(
+    entity_id,
+    heading,
+    body,
+    tokenize = 'porter unicode61'
+);
+
+-- Chat transcripts split into messages with their byte ranges, filled by
+-- the index worker; message_search rows share message_id
+CREATE TABLE IF NOT EXISTS chat_messages (
+    message_id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL,
+    message_idx INTEGER NOT NULL,
+    role TEXT,
+    timestamp TEXT,
+    byte_start INTEGER NOT NULL,
+    byte_end INTEGER NOT NULL,
+    UNIQUE (chat_id, message_idx)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS message_search USING fts5(
+    chat_id,
+    role,
+    body,
+    tokenize = 'porter unicode61'
+);
+
+-- Memory access tracking
 CREATE TABLE IF NOT EXISTS memory_index (
+    content_id TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    importance_score REAL DEFAULT 0.5,
+    access_count INTEGER DEFAULT 0,
+    last_accessed TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Embedding chunks
+CREATE TABLE IF NOT EXISTS memory_embeddings (
     index_id INTEGER PRIMARY KEY AUTOINCREMENT,
     content_id TEXT NOT NULL,
     content_type TEXT NOT NULL,
@@ -67,20 +158,63 @@ CREATE TABLE IF NOT EXISTS memory_index (
     UNIQUE(content_id, chunk_index)
 );
 
--- Maintenance log
+-- Maintenance log (one row per run, plus one checkpoint row per stage)
 CREATE TABLE IF NOT EXISTS maintenance_log (
     log_id INTEGER PRIMARY KEY AUTOINCREMENT,
     operation TEXT NOT NULL,
-    status TEXT NOT NULL,
-    message TEXT,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    items_processed INTEGER DEFAULT 0,
+    items_deleted INTEGER DEFAULT 0,
+    items_updated INTEGER DEFAULT 0,
+    duration_seconds REAL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    run_id TEXT,
+    stage TEXT,
+    status TEXT,
+    checkpoint TEXT,
+    message TEXT
+);
+
+-- Slow-query ring buffer (slot = seq % memory_core.SLOW_QUERY_LOG_SIZE)
+CREATE TABLE IF NOT EXISTS slow_query_log (
+    slot INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    duration_ms REAL NOT NULL,
+    statement TEXT NOT NULL,
+    params TEXT,
+    query_plan TEXT,
+    full_scan INTEGER DEFAULT 0,
+    temp_btree INTEGER DEFAULT 0
+);
+
+-- Documents waiting to be (re)indexed into memory_search
+CREATE TABLE IF NOT EXISTS index_queue (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_type TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT
+);
+
+-- Replay progress of write-journal segments under short-term/journal
+CREATE TABLE IF NOT EXISTS journal_segments (
+    segment TEXT PRIMARY KEY,
+    applied_bytes INTEGER NOT NULL DEFAULT 0,
+    records INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_short_term_category ON short_term_memory(category);
-CREATE INDEX IF NOT EXISTS idx_chats_updated ON chats(updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_chats_created_at_id ON chats(created_at, chat_id);
+CREATE INDEX IF NOT EXISTS idx_chats_updated_at_id ON chats(updated_at, chat_id);
 CREATE INDEX IF NOT EXISTS idx_entities_type ON entities(entity_type);
 CREATE INDEX IF NOT EXISTS idx_entities_importance ON entities(importance_score DESC);
+CREATE INDEX IF NOT EXISTS idx_entities_created_at_id ON entities(created_at, entity_id);
+CREATE INDEX IF NOT EXISTS idx_entities_updated_at_id ON entities(updated_at, entity_id);
+CREATE INDEX IF NOT EXISTS idx_entity_aliases_entity ON entity_aliases(entity_id, alias_key);
 CREATE INDEX IF NOT EXISTS idx_relations_from ON relations(from_entity_id);
 CREATE INDEX IF NOT EXISTS idx_relations_to ON relations(to_entity_id);
-CREATE INDEX IF NOT EXISTS idx_memory_index_content ON memory_index(content_id);
+CREATE INDEX IF NOT EXISTS idx_maintenance_log_run ON maintenance_log(run_id, stage);
+CREATE INDEX IF NOT EXISTS idx_slow_query_seq ON slow_query_log(seq);
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Drain the background index queue, or report how far behind it is."""
+
+import sys
+import json
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import get_connection, process_index_queue, index_status, INDEX_WORKER_POLL_SECONDS
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command not in ("status", "drain", "watch"):
+        print(json.dumps({"error": "Usage: index_worker.py [status|drain|watch]"}, indent=2))
+        sys.exit(1)
+    
+    conn = get_connection()
+    if command == "status":
+        print(json.dumps(index_status(conn), indent=2))
+    else:
+        totals = {"processed": 0, "indexed": 0, "unchanged": 0, "failed": 0}
+        try:
+            while True:
+                result = process_index_queue(conn)
+                for key in totals:
+                    totals[key] += result[key]
+                if not result["processed"]:
+                    if command == "drain":
+                        break
+                    time.sleep(INDEX_WORKER_POLL_SECONDS)
+        except KeyboardInterrupt:
+            pass
+        print(json.dumps({**totals, **index_status(conn)}, indent=2))
+    conn.close()
@@ -7,14 +7,12 @@ Sets up database schema and directory structure
 import sqlite3
 import sys
 from pathlib import Path
-from datetime import datetime
+sys.path.insert(0, str(Path(__file__).parent))
 
-# Base paths
-MEMORY_ROOT = Path("/mnt/s/fixed-perfect-memory")
-DB_PATH = MEMORY_ROOT / "database" / "memory.db"
-SCHEMA_PATH = MEMORY_ROOT / "database" / "schema.sql"
+import memory_core
+from memory_core import MEMORY_ROOT, DB_PATH
 
-# Required directories
+# Required directories (memory_core creates the top-level ones on import)
 DIRECTORIES = [
     MEMORY_ROOT / "chats",
     MEMORY_ROOT / "entities" / "person",
@@ -36,25 +34,19 @@ def create_directories():
     print()
 
 def initialize_database():
-    """Initialize the SQLite database with schema."""
+    """Create or upgrade the SQLite database through memory_core's migrations."""
     print("Initializing database...")
     
-    if not SCHEMA_PATH.exists():
-        print(f"  ✗ Schema file not found: {SCHEMA_PATH}")
-        return False
-    
     try:
+        result = memory_core.init_database()
         conn = sqlite3.connect(DB_PATH)
-        with open(SCHEMA_PATH, 'r') as f:
-            conn.executescript(f.read())
-        conn.commit()
         
         # Verify tables were created
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
         tables = [row[0] for row in cursor.fetchall()]
         
-        print(f"  ✓ Database created: {DB_PATH}")
+        print(f"  ✓ Database {result['status']}: {DB_PATH} (schema version {result['schema_version']})")
         print(f"  ✓ Tables created: {', '.join(tables)}")
         
         conn.close()
@@ -68,9 +60,13 @@ def verify_setup():
     """Verify the setup is complete."""
     print("\nVerifying setup...")
     
+    conn = sqlite3.connect(DB_PATH)
+    schema_version = memory_core.get_schema_version(conn)
+    conn.close()
+    
     checks = [
         ("Database file exists", DB_PATH.exists()),
-        ("Schema file exists", SCHEMA_PATH.exists()),
+        ("Schema is current", schema_version == memory_core.SCHEMA_VERSION),
         ("Chats directory exists", (MEMORY_ROOT / "chats").exists()),
         ("Entities directory exists", (MEMORY_ROOT / "entities").exists()),
         ("Database has tables", DB_PATH.exists())
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""Page through chats or entities, most recently updated first."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import list_entities, list_chats
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("entities", "chats"):
+        print(json.dumps({"error": "Usage: list_memory.py [entities|chats] [limit] [cursor]"}, indent=2))
+        sys.exit(1)
+    
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    cursor = sys.argv[3] if len(sys.argv) > 3 else None
+    
+    list_items = list_entities if sys.argv[1] == "entities" else list_chats
+    try:
+        items = list_items(limit, cursor)
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}, indent=2))
+        sys.exit(1)
+    print(json.dumps(items, indent=2))
@@ -4,62 +4,107 @@ Load Persistent Context at Session Start
 Automatically loads all abilities, permissions, and recent context
 """
 
+import time
+SCRIPT_START = time.time()  # before the other imports, for the session-start harness
+
+import os
 import sys
 import json
 import sqlite3
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+IMPORTS_DONE = time.time()
 
-DB_PATH = Path("S:/fixed-perfect-memory/database/memory.db")
+MEMORY_ROOT = Path(os.environ.get("PERFECT_MEMORY_ROOT", "S:/fixed-perfect-memory"))
+DB_PATH = MEMORY_ROOT / "database" / "memory.db"
+JOURNAL_DIR = MEMORY_ROOT / "short-term" / "journal"
 
 def get_connection():
     """Get database connection."""
     return sqlite3.connect(DB_PATH)
 
-def load_abilities():
+def load_journal_tail(conn):
+    """Short-term writes not yet compacted out of the write journal: category -> key -> (value, at)."""
+    tail = {}
+    # memory_core costs more to import than a session start may take; only pay for it when there is a tail
+    if not any(JOURNAL_DIR.glob("*.log")):
+        return tail
+    import memory_core
+    for key, value, category, at in memory_core.iter_journal_tail(conn):
+        tail.setdefault(category, {})[key] = (value, at)
+    return tail
+
+def overlay_journal(rows, category, journal_tail):
+    """Values of (key, value, updated_at) rows with newer journaled values laid over them."""
+    values = {key: (value, updated_at) for key, value, updated_at in rows}
+    for key, (value, at) in journal_tail.get(category, {}).items():
+        if key not in values or values[key][1] is None or at >= values[key][1]:
+            values[key] = (value, at)
+    return [value for value, _ in values.values()]
+
+def load_abilities(conn=None, journal_tail=None):
     """Load all stored abilities."""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     c = conn.cursor()
     
-    c.execute('''SELECT key, value FROM short_term_memory WHERE category = 'ability' ''')
+    if journal_tail is None:
+        journal_tail = load_journal_tail(conn)
+    c.execute('''SELECT key, value, updated_at FROM short_term_memory WHERE category = 'ability' ''')
     abilities = []
     
-    for row in c.fetchall():
-        abilities.append(json.loads(row[1]))
+    for value in overlay_journal(c.fetchall(), 'ability', journal_tail):
+        abilities.append(json.loads(value))
     
-    conn.close()
+    if own_conn:
+        conn.close()
     return abilities
 
-def load_permissions():
+def load_permissions(conn=None, journal_tail=None):
     """Load all stored permissions."""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     c = conn.cursor()
     
-    c.execute('''SELECT key, value FROM short_term_memory WHERE category = 'permission' ''')
+    if journal_tail is None:
+        journal_tail = load_journal_tail(conn)
+    c.execute('''SELECT key, value, updated_at FROM short_term_memory WHERE category = 'permission' ''')
     permissions = []
     
-    for row in c.fetchall():
-        permissions.append(json.loads(row[1]))
+    for value in overlay_journal(c.fetchall(), 'permission', journal_tail):
+        permissions.append(json.loads(value))
     
-    conn.close()
+    if own_conn:
+        conn.close()
     return permissions
 
-def load_context_data():
+def load_context_data(conn=None, journal_tail=None):
     """Load any context entries."""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     c = conn.cursor()
     
-    c.execute('''SELECT key, value FROM short_term_memory WHERE category = 'context' ''')
+    if journal_tail is None:
+        journal_tail = load_journal_tail(conn)
+    c.execute('''SELECT key, value, updated_at FROM short_term_memory WHERE category = 'context' ''')
     context = []
     
-    for row in c.fetchall():
-        context.append(json.loads(row[1]))
+    for value in overlay_journal(c.fetchall(), 'context', journal_tail):
+        context.append(json.loads(value))
     
-    conn.close()
+    if own_conn:
+        conn.close()
     return context
 
-def get_recent_entities(limit=10):
+def get_recent_entities(limit=10, conn=None):
     """Get recently updated entities."""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     c = conn.cursor()
     
     c.execute('''SELECT entity_id, name, entity_type, summary, importance_score
@@ -77,11 +122,17 @@ def get_recent_entities(limit=10):
             "importance": row[4]
         })
     
-    conn.close()
+    if own_conn:
+        conn.close()
     return entities
 
 def main():
-    """Load and output all persistent context."""
+    """Load and output all persistent context.
+    
+    With PERFECT_MEMORY_TIMING set, wall-clock phase boundaries are written
+    to stderr as JSON for benchmarks/session_start.py.
+    """
+    marks = {"script_start": SCRIPT_START, "imports": IMPORTS_DONE}
     
     if not DB_PATH.exists():
         print(json.dumps({
@@ -90,10 +141,16 @@ def main():
         }, indent=2))
         return
     
-    abilities = load_abilities()
-    permissions = load_permissions()
-    context = load_context_data()
-    recent_entities = get_recent_entities(10)
+    conn = get_connection()
+    marks["db_open"] = time.time()
+    
+    journal_tail = load_journal_tail(conn)
+    abilities = load_abilities(conn, journal_tail)
+    permissions = load_permissions(conn, journal_tail)
+    context = load_context_data(conn, journal_tail)
+    recent_entities = get_recent_entities(10, conn)
+    conn.close()
+    marks["queries"] = time.time()
     
     output = {
         "status": "loaded",
@@ -105,7 +162,15 @@ def main():
         "message": "Perfect Memory loaded. All abilities and permissions active."
     }
     
-    print(json.dumps(output, indent=2))
+    text = json.dumps(output, indent=2)
+    marks["json_encode"] = time.time()
+    
+    print(text)
+    sys.stdout.flush()
+    marks["output"] = time.time()
+    
+    if os.environ.get("PERFECT_MEMORY_TIMING"):
+        print(json.dumps({"timings": marks}), file=sys.stderr)
 
 if __name__ == "__main__":
     main()
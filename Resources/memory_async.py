@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+asyncio front end for memory_core.
+
+AsyncMemoryStore exposes every memory_core operation that opens its own
+connection as a coroutine, so an async agent never blocks its event loop
+on SQLite or file I/O. (The building blocks that run inside a caller's
+connection or transaction, such as migrate or reindex_memory_search, and
+the pure helpers, such as alias_key or fuse_results, are left to
+memory_core.) Reads run on
+a bounded thread pool, each worker thread keeping its own connection, so
+concurrent searches and entity fetches overlap (SQLite and file reads
+release the GIL). Writes go through a queue drained by a single writer
+task, one at a time, so they never contend with each other for the
+database lock.
+
+    async with AsyncMemoryStore() as store:
+        results, entity = await asyncio.gather(
+            store.search_memory("robinson"), store.get_entity(entity_id))
+"""
+
+import asyncio
+import sqlite3
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Callable
+
+import memory_core
+
+READ_WORKERS = 4
+
+class AsyncMemoryStore:
+    """Awaitable memory_core operations: pooled reads, serialized writes."""
+    
+    def __init__(self, read_workers: int = READ_WORKERS):
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="memory-read")
+        self._writer_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-write")
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    # ==================== READS ====================
+    
+    def _thread_connection(self):
+        """This reader thread's connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can close it from the loop thread
+            conn = sqlite3.connect(memory_core.DB_PATH, factory=memory_core.CONNECTION_FACTORY,
+                                   check_same_thread=False)
+            memory_core._ensure_schema(conn)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _call_with_connection(self, func, args, kwargs):
+        conn = self._thread_connection()
+        try:
+            return func(*args, conn=conn, **kwargs)
+        finally:
+            # No transaction is open after a read; this just flushes any slow-query entries
+            conn.commit()
+    
+    async def _read(self, func, *args, **kwargs):
+        if self._closed:
+            raise RuntimeError("AsyncMemoryStore is closed")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._call_with_connection, func, args, kwargs)
+    
+    async def search_memory(self, query: str, content_types: List[str] = None, limit: int = 20,
+                            snippet_tokens: int = 0, highlight: bool = False,
+                            markers: tuple = memory_core.SNIPPET_MARKERS, weights: Optional[Dict[str, float]] = None,
+                            boosts: Optional[Dict[str, float]] = None, cursor: Optional[str] = None,
+                            since=None, until=None, time_field: str = "updated_at",
+                            facets: Optional[List[str]] = None, fuzzy: bool = False,
+                            expand_aliases: bool = True, hydrate: Optional[str] = None,
+                            max_bytes: int = memory_core.HYDRATE_MAX_BYTES):
+        return await self._read(memory_core.search_memory, query, content_types, limit,
+                                snippet_tokens=snippet_tokens, highlight=highlight, markers=markers,
+                                weights=weights, boosts=boosts, cursor=cursor,
+                                since=since, until=until, time_field=time_field, facets=facets, fuzzy=fuzzy,
+                                expand_aliases=expand_aliases, hydrate=hydrate, max_bytes=max_bytes)
+    
+    async def search_many(self, queries: List[str], limit: int = 20, merge: bool = False, **options):
+        """memory_core.search_many with the distinct queries spread across the reader pool."""
+        distinct = list(dict.fromkeys(queries))
+        results = await asyncio.gather(*(self.search_memory(query, limit=limit, **options) for query in distinct))
+        by_query = dict(zip(distinct, results))
+        if not merge:
+            return by_query
+        return {"by_query": by_query, "merged": memory_core.fuse_results(by_query, limit)}
+    
+    async def fuzzy_search_names(self, query: str, content_types: List[str] = None, limit: int = 20,
+                                 since=None, until=None, time_field: str = "updated_at") -> List[Dict]:
+        return await self._read(memory_core.fuzzy_search_names, query, content_types, limit,
+                                since=since, until=until, time_field=time_field)
+    
+    async def suggest(self, prefix: str, k: int = 10, content_types: List[str] = None) -> List[Dict]:
+        return await self._read(memory_core.suggest, prefix, k, content_types)
+    
+    async def get_entity(self, entity_id: str) -> Dict:
+        return await self._read(memory_core.get_entity, entity_id)
+    
+    async def get_entities(self, entity_ids: List[str],
+                           workers: int = memory_core.ENTITY_READ_WORKERS) -> Dict[str, Dict]:
+        return await self._read(memory_core.get_entities, entity_ids, workers=workers)
+    
+    async def get_entity_sections(self, entity_id: str) -> List[Dict]:
+        return await self._read(memory_core.get_entity_sections, entity_id)
+    
+    async def get_entity_section(self, entity_id: str, section_idx: int) -> Dict:
+        return await self._read(memory_core.get_entity_section, entity_id, section_idx)
+    
+    async def get_chat_window(self, chat_id: str, message_idx: int, before: int = 2, after: int = 2) -> Dict:
+        return await self._read(memory_core.get_chat_window, chat_id, message_idx, before, after)
+    
+    async def get_aliases(self, entity_id: str) -> List[Dict]:
+        return await self._read(memory_core.get_aliases, entity_id)
+    
+    async def list_entities(self, limit: int = 20, cursor: Optional[str] = None, since=None, until=None,
+                            order_by: str = "updated_at", entity_type: Optional[str] = None) -> List[Dict]:
+        return await self._read(memory_core.list_entities, limit, cursor, since, until, order_by, entity_type)
+    
+    async def list_chats(self, limit: int = 20, cursor: Optional[str] = None, since=None, until=None,
+                         order_by: str = "updated_at") -> List[Dict]:
+        return await self._read(memory_core.list_chats, limit, cursor, since, until, order_by)
+    
+    async def get_all_abilities(self) -> List[Dict]:
+        return await self._read(memory_core.get_all_abilities)
+    
+    async def get_all_permissions(self) -> List[Dict]:
+        return await self._read(memory_core.get_all_permissions)
+    
+    async def index_status(self) -> Dict:
+        return await self._read(memory_core.index_status)
+    
+    async def wait_indexed(self, job_id: Optional[int] = None, timeout: Optional[float] = None) -> Dict:
+        """Read-after-write barrier for the job id a store_chat/create_entity result carries."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, memory_core.wait_indexed, job_id, timeout)
+    
+    async def get_slow_queries(self, limit: int = 50, full_scans_only: bool = False) -> List[Dict]:
+        return await self._read(memory_core.get_slow_queries, limit, full_scans_only)
+    
+    async def write_journal_status(self) -> Dict:
+        return await self._read(memory_core.write_journal_status)
+    
+    # ==================== WRITES ====================
+    
+    async def _writer_loop(self):
+        """Run queued writes one at a time on the writer thread."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            func, args, kwargs, future = item
+            try:
+                result = await loop.run_in_executor(self._writer_thread, functools.partial(func, *args, **kwargs))
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+    
+    async def _write(self, func, *args, **kwargs):
+        if self._closed:
+            raise RuntimeError("AsyncMemoryStore is closed")
+        if self._writer is None:
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._writer_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((func, args, kwargs, future))
+        return await future
+    
+    async def store_ability(self, ability: str, description: str):
+        return await self._write(memory_core.store_ability, ability, description)
+    
+    async def store_permission(self, permission: str, details: str):
+        return await self._write(memory_core.store_permission, permission, details)
+    
+    async def store_chat(self, chat_id: str, url: str, title: str, content: str,
+                         summary: str = "", tools_used: List[str] = None, topics: List[str] = None) -> Dict:
+        return await self._write(memory_core.store_chat, chat_id, url, title, content, summary, tools_used, topics)
+    
+    async def create_entity(self, name: str, entity_type: str, content: str,
+                            summary: str = "", importance: float = 0.5) -> Dict:
+        return await self._write(memory_core.create_entity, name, entity_type, content, summary, importance)
+    
+    async def update_entity(self, entity_id: str, new_content: str, append: bool = True) -> Dict:
+        return await self._write(memory_core.update_entity, entity_id, new_content, append)
+    
+    async def create_relation(self, from_entity: str, to_entity: str, relation_type: str,
+                              strength: float = 0.5) -> Dict:
+        return await self._write(memory_core.create_relation, from_entity, to_entity, relation_type, strength)
+    
+    async def add_alias(self, entity_id: str, alias: str) -> Dict:
+        return await self._write(memory_core.add_alias, entity_id, alias)
+    
+    async def remove_alias(self, entity_id: str, alias: str) -> Dict:
+        return await self._write(memory_core.remove_alias, entity_id, alias)
+    
+    # Group-committed short-term writes bypass the writer task; they resolve once durable
+    async def queue_ability(self, ability: str, description: str) -> Dict:
+        return await asyncio.wrap_future(memory_core.queue_ability(ability, description))
+    
+    async def queue_permission(self, permission: str, details: str) -> Dict:
+        return await asyncio.wrap_future(memory_core.queue_permission(permission, details))
+    
+    async def flush_short_term(self, timeout: Optional[float] = None) -> Dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, memory_core.flush_short_term, timeout)
+    
+    async def clear_slow_queries(self) -> Dict:
+        return await self._write(memory_core.clear_slow_queries)
+    
+    async def recover_write_journal(self, stale_seconds: float = memory_core.JOURNAL_STALE_SECONDS) -> Dict:
+        return await self._write(memory_core.recover_write_journal, stale_seconds)
+    
+    async def reconcile_orphans(self, action: str = "report") -> Dict:
+        return await self._write(memory_core.reconcile_orphans, action)
+    
+    # progress callbacks run on the writer thread, not the event loop
+    async def weekly_maintenance(self, workers: int = memory_core.REINDEX_WORKERS,
+                                 batch_size: int = memory_core.REINDEX_BATCH_SIZE,
+                                 progress: Optional[Callable[[int, int], None]] = None,
+                                 orphan_action: str = "report", max_seconds: Optional[float] = None) -> Dict:
+        return await self._write(memory_core.weekly_maintenance, workers, batch_size, progress,
+                                 orphan_action, max_seconds)
+    
+    async def rebuild_memory_search(self, workers: int = memory_core.REINDEX_WORKERS,
+                                    batch_size: int = memory_core.REINDEX_BATCH_SIZE,
+                                    progress: Optional[Callable[[int, int], None]] = None,
+                                    tokenize: Optional[str] = None) -> Dict:
+        return await self._write(memory_core.rebuild_memory_search, workers, batch_size, progress, tokenize)
+    
+    async def initialize_database(self) -> Dict:
+        return await self._write(memory_core.initialize_database)
+    
+    # ==================== SHUTDOWN ====================
+    
+    async def close(self):
+        """Finish queued writes, then release the threads and connections."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            await self._queue.put(None)
+            await self._writer
+    
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._readers.shutdown)
+        await loop.run_in_executor(None, self._writer_thread.shutdown)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
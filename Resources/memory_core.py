@@ -4,31 +4,143 @@ Claude's Perfect Memory MCP Server
 Provides comprehensive, flawless memory persistence across all sessions.
 """
 
+import os
+import re
 import json
+import shutil
 import sqlite3
 import hashlib
 import pickle
-from datetime import datetime, timedelta
+import zlib
+import base64
+import unicodedata
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Callable
+from collections import deque, OrderedDict
+from itertools import combinations
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future
+import time
 import uuid
+import weakref
+import atexit
+import threading
 
 # Base paths
-MEMORY_ROOT = Path("S:/fixed-perfect-memory")
+MEMORY_ROOT = Path(os.environ.get("PERFECT_MEMORY_ROOT", "S:/fixed-perfect-memory"))
 DB_PATH = MEMORY_ROOT / "database" / "memory.db"
 CHATS_DIR = MEMORY_ROOT / "chats"
 ENTITIES_DIR = MEMORY_ROOT / "entities"
 SHORT_TERM_DIR = MEMORY_ROOT / "short-term"
 IMAGES_DIR = MEMORY_ROOT / "images"
 EMBEDDINGS_DIR = MEMORY_ROOT / "embeddings"
+QUARANTINE_DIR = MEMORY_ROOT / "quarantine"
+
+# Full-text indexing
+FTS_CONTENT_LIMIT = 10000
+FTS_TOKENIZE = "porter unicode61"
+SEARCH_TABLE = "memory_search"
+NAME_SEARCH_TABLE = "name_search"
+SUGGEST_TIERS = 10  # importance bands suggest() walks from the top
+FUZZY_SEARCH_TABLE = "fuzzy_search"
+SECTION_SEARCH_TABLE = "section_search"
+MESSAGE_SEARCH_TABLE = "message_search"
+ALIAS_MAX_WORDS = 5  # longest alias derived from a summary
+SEARCH_FUSION_K = 60  # reciprocal rank fusion constant for search_many(merge=True)
+FUZZY_POOL = 1000  # most trigram candidates fuzzy search checks by edit distance
+SHADOW_SEARCH_TABLE = "memory_search_shadow"
+RETIRED_SEARCH_TABLE = "memory_search_retired"
+REINDEX_BATCH_SIZE = 500
+REINDEX_WORKERS = 8
+SNIPPET_MAX_TOKENS = 64  # FTS5's own cap for snippet()
+SNIPPET_MARKERS = ("[", "]")
+SNIPPET_ELLIPSIS = "..."
+
+# Search ranking: bm25 column weights, in memory_search column order, and the
+# boosts that scale them (0 turns one off). An item's bm25 score is multiplied
+# by 1 + importance * importance_score + access * n / (n + ACCESS_SATURATION)
+# + recency / (1 + age_days / RECENCY_HALF_LIFE_DAYS); rational rather than
+# exp/log decay, since SQLite's math functions are a compile-time option.
+SEARCH_COLUMN_WEIGHTS = {"content_id": 0.0, "content_type": 0.0, "title": 10.0, "summary": 5.0, "content": 1.0}
+SEARCH_BOOSTS = {"importance": 1.0, "access": 0.5, "recency": 0.5}
+ACCESS_SATURATION = 10
+RECENCY_HALF_LIFE_DAYS = 30.0
+# Boosts are first computed for this many of the best bm25 matches; if a match
+# outside them could still rank higher, a second pass takes every such match
+SEARCH_RERANK_POOL = 200
+
+# Keyset pagination: columns a since/until range or a listing can be ordered on
+TIME_FIELDS = ("created_at", "updated_at")
+
+# Facets search_memory can count over the whole match set (month is of time_field)
+SEARCH_FACETS = ("content_type", "entity_type", "month")
+
+# Content search_memory(hydrate=...) attaches to results in rank order until
+# max_bytes are used: the stored summary, a window of the file around the
+# densest cluster of matches, or the file from the top
+HYDRATE_MODES = ("summary", "section", "full")
+HYDRATE_MAX_BYTES = 64 * 1024
+HYDRATE_SECTION_BYTES = 2048
+HYDRATE_MARKERS = ("\x02", "\x03")  # highlight() markers that locate matches in the indexed text
+
+# Slow-query log: statements at or over this many ms are recorded ("off" disables)
+_slow_query_setting = os.environ.get("PERFECT_MEMORY_SLOW_QUERY_MS", "100")
+SLOW_QUERY_MS = None if _slow_query_setting.lower() == "off" else float(_slow_query_setting)
+SLOW_QUERY_LOG_SIZE = 1000
+SLOW_QUERY_LOCK_TIMEOUT_MS = 50
+
+# Group commit for queued short-term writes: a batch commits when either limit is hit
+GROUP_COMMIT_INTERVAL_MS = 50
+GROUP_COMMIT_MAX_ITEMS = 500
+
+# Background indexing ("off" leaves jobs queued for index_worker.py or wait_indexed())
+INDEX_WORKER_ENABLED = os.environ.get("PERFECT_MEMORY_INDEX_WORKER", "on").lower() != "off"
+INDEX_WORKER_POLL_SECONDS = 1.0
+INDEX_MAX_ATTEMPTS = 3
+
+# Log-structured short-term writes ("on" appends them to a checksummed journal
+# that a background compactor replays into SQLite)
+WRITE_JOURNAL_ENABLED = os.environ.get("PERFECT_MEMORY_WRITE_JOURNAL", "off").lower() == "on"
+JOURNAL_DIR = SHORT_TERM_DIR / "journal"
+JOURNAL_COMPACT_INTERVAL_SECONDS = 2.0
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+JOURNAL_STALE_SECONDS = 3600
+
+# Entity file cache: get_entity/get_entities keep recently read files in memory,
+# checked against the file's mtime and size on every hit; least recently used
+# files are evicted past the cap ("0" disables it)
+ENTITY_CACHE_BYTES = int(float(os.environ.get("PERFECT_MEMORY_ENTITY_CACHE_MB", "32")) * 1024 * 1024)
+ENTITY_READ_WORKERS = 8
 
 # Ensure directories exist
-for dir_path in [CHATS_DIR, ENTITIES_DIR, SHORT_TERM_DIR, IMAGES_DIR, EMBEDDINGS_DIR]:
+for dir_path in [DB_PATH.parent, CHATS_DIR, ENTITIES_DIR, SHORT_TERM_DIR, IMAGES_DIR, EMBEDDINGS_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
 
 def init_database():
-    """Initialize the SQLite database with schema."""
+    """Create the SQLite database, or upgrade an existing one, to the current schema."""
     conn = sqlite3.connect(DB_PATH)
+    result = migrate(conn)
+    conn.close()
+    return result
+
+# ==================== SCHEMA MIGRATIONS ====================
+
+def _columns(conn, table: str) -> set:
+    """Return the column names of a table (empty if it does not exist)."""
+    c = conn.cursor()
+    c.execute(f'PRAGMA table_info({table})')
+    return {row[1] for row in c.fetchall()}
+
+def _add_missing_columns(conn, table: str, columns: List[tuple]):
+    """ALTER TABLE ADD COLUMN for each (name, declaration) the table lacks."""
+    existing = _columns(conn, table)
+    for name, declaration in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {declaration}')
+
+def _migrate_v1_base_tables(conn):
+    """v1: the core tables, as memory_core has always created them."""
     c = conn.cursor()
     
     # Short-term memory for abilities and permissions
@@ -78,12 +190,37 @@ def init_database():
     )''')
     
     # Full-text search index
-    c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS memory_search USING fts5(
-        content_id,
-        content_type,
-        title,
-        summary,
-        content
+    create_search_table(conn, tokenize="unicode61")
+
+def _migrate_v2_converge_schema_sql(conn):
+    """v2: bring databases created from database/schema.sql onto the same table shapes.
+    
+    schema.sql used memory_index for embedding chunks and a status/message
+    maintenance_log; memory_core used memory_index for access tracking and a
+    counts-based maintenance_log. Chunk rows move to memory_embeddings and
+    both logs gain the union of their columns.
+    """
+    c = conn.cursor()
+    
+    # Columns schema.sql left out
+    for table in ("short_term_memory", "chats"):
+        if "created_at" not in _columns(conn, table):
+            c.execute(f'ALTER TABLE {table} ADD COLUMN created_at TIMESTAMP')
+            c.execute(f'UPDATE {table} SET created_at = updated_at')
+    
+    # Embedding chunks
+    if "chunk_index" in _columns(conn, "memory_index"):
+        c.execute('DROP INDEX IF EXISTS idx_memory_index_content')
+        c.execute('ALTER TABLE memory_index RENAME TO memory_embeddings')
+    c.execute('''CREATE TABLE IF NOT EXISTS memory_embeddings (
+        index_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_id TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        chunk_index INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        embedding_path TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(content_id, chunk_index)
     )''')
     
     # Memory access tracking
@@ -96,7 +233,7 @@ def init_database():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )''')
     
-    # Maintenance log
+    # Maintenance log, including per-stage checkpoints
     c.execute('''CREATE TABLE IF NOT EXISTS maintenance_log (
         log_id INTEGER PRIMARY KEY AUTOINCREMENT,
         operation TEXT NOT NULL,
@@ -104,15 +241,626 @@ def init_database():
         items_deleted INTEGER DEFAULT 0,
         items_updated INTEGER DEFAULT 0,
         duration_seconds REAL,
-        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        run_id TEXT,
+        stage TEXT,
+        status TEXT,
+        checkpoint TEXT,
+        message TEXT
     )''')
+    _add_missing_columns(conn, "maintenance_log", [
+        ("items_processed", "INTEGER DEFAULT 0"),
+        ("items_deleted", "INTEGER DEFAULT 0"),
+        ("items_updated", "INTEGER DEFAULT 0"),
+        ("duration_seconds", "REAL"),
+        ("run_id", "TEXT"),
+        ("stage", "TEXT"),
+        ("status", "TEXT"),
+        ("checkpoint", "TEXT"),
+        ("message", "TEXT"),
+    ])
+
+def _migrate_v3_indexes(conn):
+    """v3: secondary indexes for the hot lookup and ordering paths."""
+    c = conn.cursor()
+    c.execute('CREATE INDEX IF NOT EXISTS idx_short_term_category ON short_term_memory(category)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_chats_updated ON chats(updated_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_entities_type ON entities(entity_type)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_entities_importance ON entities(importance_score DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_entities_updated ON entities(updated_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_relations_from ON relations(from_entity_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_relations_to ON relations(to_entity_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_log_run ON maintenance_log(run_id, stage)')
+
+def _migrate_v4_porter_tokenizer(conn):
+    """v4: switch memory_search to the porter tokenizer schema.sql always asked for.
+    
+    The existing rows are copied straight across, so no memory files are read.
+    """
+    if _live_tokenize(conn) == FTS_TOKENIZE:
+        return
+    c = conn.cursor()
+    c.execute(f'DROP TABLE IF EXISTS {SHADOW_SEARCH_TABLE}')
+    create_search_table(conn, SHADOW_SEARCH_TABLE, FTS_TOKENIZE)
+    c.execute(f'''INSERT INTO {SHADOW_SEARCH_TABLE} (content_id, content_type, title, summary, content)
+                  SELECT content_id, content_type, title, summary, content FROM {SEARCH_TABLE}''')
+    c.execute(f'DROP TABLE {SEARCH_TABLE}')
+    c.execute(f'ALTER TABLE {SHADOW_SEARCH_TABLE} RENAME TO {SEARCH_TABLE}')
+
+def _migrate_v5_slow_query_log(conn):
+    """v5: ring buffer of slow statements; slot = seq % SLOW_QUERY_LOG_SIZE."""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS slow_query_log (
+        slot INTEGER PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        duration_ms REAL NOT NULL,
+        statement TEXT NOT NULL,
+        params TEXT,
+        query_plan TEXT,
+        full_scan INTEGER DEFAULT 0,
+        temp_btree INTEGER DEFAULT 0
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_slow_query_seq ON slow_query_log(seq)')
+
+def _migrate_v6_index_queue(conn):
+    """v6: durable queue of documents waiting to be (re)indexed."""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS index_queue (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_type TEXT NOT NULL,
+        content_id TEXT NOT NULL,
+        enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        attempts INTEGER DEFAULT 0,
+        last_error TEXT
+    )''')
+
+def _migrate_v7_journal_segments(conn):
+    """v7: how far each write-journal segment has been replayed into SQLite."""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS journal_segments (
+        segment TEXT PRIMARY KEY,
+        applied_bytes INTEGER NOT NULL DEFAULT 0,
+        records INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+def _migrate_v8_keyset_indexes(conn):
+    """v8: (time, id) indexes so keyset pages of chats and entities are index seeks."""
+    c = conn.cursor()
+    for table, key in (("chats", "chat_id"), ("entities", "entity_id")):
+        for field in TIME_FIELDS:
+            c.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{field}_id ON {table}({field}, {key})')
+    # Prefixes of the new updated_at indexes
+    c.execute('DROP INDEX IF EXISTS idx_chats_updated')
+    c.execute('DROP INDEX IF EXISTS idx_entities_updated')
+
+def _name_importance_sql(importance: str) -> tuple:
+    """SQL for the importance and tier columns of a name_search row."""
+    importance = f"MIN(1.0, MAX(0.0, COALESCE({importance}, 0.5)))"
+    return importance, f"'t' || MIN({SUGGEST_TIERS - 1}, CAST({importance} * {SUGGEST_TIERS} AS INTEGER))"
+
+def _migrate_v9_name_search(conn):
+    """v9: names-only prefix index behind suggest(), kept in step by triggers.
+    
+    Entity rows sit at rowid 2 * entities.rowid and chat rows at
+    2 * chats.rowid + 1. The BEFORE INSERT triggers clear the old row that
+    an INSERT OR REPLACE is about to remove without firing DELETE triggers.
+    A chat's importance lives in memory_index, so changes there re-tier it.
+    """
+    c = conn.cursor()
+    c.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS {NAME_SEARCH_TABLE} USING fts5(
+        name,
+        tier,
+        content_type UNINDEXED,
+        content_id UNINDEXED,
+        importance UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '1 2 3'
+    )''')
+    chat_importance = "(SELECT importance_score FROM memory_index WHERE content_id = {}.chat_id)"
+    for table, key, name, importance, offset, content_type in (
+            ("entities", "entity_id", "name", "{}.importance_score", 0, "entity"),
+            ("chats", "chat_id", "title", chat_importance, 1, "chat")):
+        insert = f'''INSERT INTO {NAME_SEARCH_TABLE} (rowid, name, content_type, content_id, importance, tier)
+                      VALUES (2 * NEW.rowid + {offset}, NEW.{name}, '{content_type}', NEW.{key},
+                              {', '.join(_name_importance_sql(importance.format("NEW")))});'''
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_name_replace BEFORE INSERT ON {table} BEGIN
+                          DELETE FROM {NAME_SEARCH_TABLE}
+                          WHERE rowid = (SELECT 2 * rowid + {offset} FROM {table} WHERE {key} = NEW.{key});
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_name_insert AFTER INSERT ON {table} BEGIN
+                          {insert}
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_name_update
+                      AFTER UPDATE OF {key}, {name}{", importance_score" if offset == 0 else ""} ON {table} BEGIN
+                          DELETE FROM {NAME_SEARCH_TABLE} WHERE rowid = 2 * OLD.rowid + {offset};
+                          {insert}
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_name_delete AFTER DELETE ON {table} BEGIN
+                          DELETE FROM {NAME_SEARCH_TABLE} WHERE rowid = 2 * OLD.rowid + {offset};
+                      END''')
+        c.execute(f'''INSERT OR REPLACE INTO {NAME_SEARCH_TABLE} (rowid, name, content_type, content_id, importance, tier)
+                      SELECT 2 * rowid + {offset}, {name}, '{content_type}', {key},
+                             {', '.join(_name_importance_sql(importance.format(table)))}
+                      FROM {table}''')
+    
+    for event, row, importance in (("INSERT", "NEW", "NEW.importance_score"),
+                                   ("UPDATE OF importance_score", "NEW", "NEW.importance_score"),
+                                   ("DELETE", "OLD", "NULL")):
+        importance, tier = _name_importance_sql(importance)
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS memory_index_name_{event.split()[0].lower()}
+                      AFTER {event} ON memory_index WHEN {row}.content_type = 'chat' BEGIN
+                          UPDATE {NAME_SEARCH_TABLE} SET importance = {importance}, tier = {tier}
+                          WHERE rowid = (SELECT 2 * rowid + 1 FROM chats WHERE chat_id = {row}.content_id);
+                      END''')
+
+def _migrate_v10_fuzzy_search(conn):
+    """v10: trigram index over names, titles and summaries for fuzzy search.
     
+    Same rowids and trigger scheme as name_search (v9).
+    """
+    c = conn.cursor()
+    c.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS {FUZZY_SEARCH_TABLE} USING fts5(
+        name,
+        summary,
+        content_type UNINDEXED,
+        content_id UNINDEXED,
+        tokenize = 'trigram'
+    )''')
+    for table, key, name, offset, content_type in (("entities", "entity_id", "name", 0, "entity"),
+                                                   ("chats", "chat_id", "title", 1, "chat")):
+        insert = f'''INSERT INTO {FUZZY_SEARCH_TABLE} (rowid, name, summary, content_type, content_id)
+                      VALUES (2 * NEW.rowid + {offset}, NEW.{name}, NEW.summary, '{content_type}', NEW.{key});'''
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fuzzy_replace BEFORE INSERT ON {table} BEGIN
+                          DELETE FROM {FUZZY_SEARCH_TABLE}
+                          WHERE rowid = (SELECT 2 * rowid + {offset} FROM {table} WHERE {key} = NEW.{key});
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fuzzy_insert AFTER INSERT ON {table} BEGIN
+                          {insert}
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fuzzy_update
+                      AFTER UPDATE OF {key}, {name}, summary ON {table} BEGIN
+                          DELETE FROM {FUZZY_SEARCH_TABLE} WHERE rowid = 2 * OLD.rowid + {offset};
+                          {insert}
+                      END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fuzzy_delete AFTER DELETE ON {table} BEGIN
+                          DELETE FROM {FUZZY_SEARCH_TABLE} WHERE rowid = 2 * OLD.rowid + {offset};
+                      END''')
+        c.execute(f'''INSERT OR REPLACE INTO {FUZZY_SEARCH_TABLE} (rowid, name, summary, content_type, content_id)
+                      SELECT 2 * rowid + {offset}, {name}, summary, '{content_type}', {key} FROM {table}''')
+
+def _migrate_v11_entity_aliases(conn):
+    """v11: alternative names of entities, seeded from their names and summaries."""
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS entity_aliases (
+        alias_key TEXT NOT NULL,
+        entity_id TEXT NOT NULL,
+        alias TEXT NOT NULL,
+        source TEXT NOT NULL DEFAULT 'manual',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (alias_key, entity_id)
+    ) WITHOUT ROWID''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_entity_aliases_entity ON entity_aliases(entity_id, alias_key)')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS entities_alias_delete AFTER DELETE ON entities BEGIN
+                     DELETE FROM entity_aliases WHERE entity_id = OLD.entity_id;
+                 END''')
+    c.execute('SELECT entity_id, name, summary FROM entities')
+    for entity_id, name, summary in c.fetchall():
+        _store_derived_aliases(c, entity_id, name, summary)
+
+def _migrate_v12_entity_sections(conn):
+    """v12: entity files split into sections, each indexed with its byte range.
+    
+    Existing entities are queued for indexing rather than read here, so the
+    upgrade does not wait on every file; the index worker fills the tables.
+    """
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS entity_sections (
+        section_id INTEGER PRIMARY KEY,
+        entity_id TEXT NOT NULL,
+        section_idx INTEGER NOT NULL,
+        heading TEXT NOT NULL,
+        byte_start INTEGER NOT NULL,
+        byte_end INTEGER NOT NULL,
+        UNIQUE (entity_id, section_idx)
+    )''')
+    # entity_id is indexed so one MATCH can be confined to a page of entities
+    c.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS {SECTION_SEARCH_TABLE} USING fts5(
+        entity_id, heading, body, tokenize = '{FTS_TOKENIZE}'
+    )''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS entities_section_delete AFTER DELETE ON entities BEGIN
+                     DELETE FROM {SECTION_SEARCH_TABLE} WHERE rowid IN
+                         (SELECT section_id FROM entity_sections WHERE entity_id = OLD.entity_id);
+                     DELETE FROM entity_sections WHERE entity_id = OLD.entity_id;
+                 END''')
+    c.execute("INSERT INTO index_queue (content_type, content_id) SELECT 'entity', entity_id FROM entities")
+
+def _migrate_v13_chat_messages(conn):
+    """v13: chat transcripts split into messages, each indexed with its byte range.
+    
+    Like v12, existing chats are queued for the index worker rather than read here.
+    """
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS chat_messages (
+        message_id INTEGER PRIMARY KEY,
+        chat_id TEXT NOT NULL,
+        message_idx INTEGER NOT NULL,
+        role TEXT,
+        timestamp TEXT,
+        byte_start INTEGER NOT NULL,
+        byte_end INTEGER NOT NULL,
+        UNIQUE (chat_id, message_idx)
+    )''')
+    c.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS {MESSAGE_SEARCH_TABLE} USING fts5(
+        chat_id, role, body, tokenize = '{FTS_TOKENIZE}'
+    )''')
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS chats_message_delete AFTER DELETE ON chats BEGIN
+                     DELETE FROM {MESSAGE_SEARCH_TABLE} WHERE rowid IN
+                         (SELECT message_id FROM chat_messages WHERE chat_id = OLD.chat_id);
+                     DELETE FROM chat_messages WHERE chat_id = OLD.chat_id;
+                 END''')
+    c.execute("INSERT INTO index_queue (content_type, content_id) SELECT 'chat', chat_id FROM chats")
+
+def _migrate_v14_content_hashes(conn):
+    """v14: the hash of what the index worker last indexed for each chat and entity.
+    
+    NULL until a document is next indexed; a later migration that needs
+    documents re-indexed clears it.
+    """
+    for table in ("chats", "entities"):
+        _add_missing_columns(conn, table, [("content_hash", "TEXT")])
+
+MIGRATIONS = [
+    (1, _migrate_v1_base_tables),
+    (2, _migrate_v2_converge_schema_sql),
+    (3, _migrate_v3_indexes),
+    (4, _migrate_v4_porter_tokenizer),
+    (5, _migrate_v5_slow_query_log),
+    (6, _migrate_v6_index_queue),
+    (7, _migrate_v7_journal_segments),
+    (8, _migrate_v8_keyset_indexes),
+    (9, _migrate_v9_name_search),
+    (10, _migrate_v10_fuzzy_search),
+    (11, _migrate_v11_entity_aliases),
+    (12, _migrate_v12_entity_sections),
+    (13, _migrate_v13_chat_messages),
+    (14, _migrate_v14_content_hashes),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn) -> int:
+    """Read the schema version stored in PRAGMA user_version."""
+    c = conn.cursor()
+    c.execute('PRAGMA user_version')
+    return c.fetchone()[0]
+
+def migrate(conn) -> Dict:
+    """Upgrade a database in place to SCHEMA_VERSION.
+    
+    Each pending migration runs in its own transaction together with the
+    PRAGMA user_version bump, so an interrupted upgrade resumes at the first
+    step that did not commit. ANALYZE runs once if anything was applied.
+    """
+    conn.commit()
+    from_version = get_schema_version(conn)
+    applied = []
+    
+    for version, step in MIGRATIONS:
+        if version <= from_version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()  # another process applied it while we waited for the lock
+                continue
+            step(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        applied.append(version)
+    
+    if applied:
+        conn.execute('ANALYZE')
+        conn.commit()
+    
+    return {
+        "status": "migrated" if applied else "current",
+        "from_version": from_version,
+        "schema_version": get_schema_version(conn),
+        "applied": applied
+    }
+
+def create_search_table(conn, table: str = SEARCH_TABLE, tokenize: str = FTS_TOKENIZE):
+    """Create a memory_search-shaped FTS5 table if it does not exist."""
+    conn.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+        content_id,
+        content_type,
+        title,
+        summary,
+        content,
+        tokenize = '{tokenize}'
+    )''')
+
+def fts_id_query(content_id: str) -> str:
+    """Build a MATCH expression that finds an id through the FTS index instead of a scan."""
+    return 'content_id : "{}"'.format(content_id.replace('"', '""'))
+
+# ==================== SLOW-QUERY LOG ====================
+
+_BARE_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)[^ (]+$')
+_FTS_FULL_SCAN = re.compile(r'^SCAN \S+ VIRTUAL TABLE INDEX \d+:$')
+
+# Entries a flush could not write yet; the next flush, on any connection, writes them
+_parked_slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+def _redact_params(params) -> Optional[str]:
+    """Describe bound parameters by type and size only, never by value."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return json.dumps({key: _redact_value(value) for key, value in params.items()})
+    return json.dumps([_redact_value(value) for value in params])
+
+def _redact_value(value) -> str:
+    """Placeholder for one parameter, e.g. <str:42>."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+def _explain(conn, statement: str, params) -> tuple:
+    """Return (indented plan text, full_scan, temp_btree) for a statement, or (None, 0, 0)."""
+    try:
+        # A plain cursor, so the EXPLAIN itself is not timed or logged
+        rows = sqlite3.Cursor(conn).execute(f'EXPLAIN QUERY PLAN {statement}', params or ()).fetchall()
+    except (sqlite3.Error, ValueError):
+        return None, 0, 0
+    if not rows:
+        return None, 0, 0
+    
+    depth = {0: -1}
+    lines = []
+    full_scan = temp_btree = 0
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+        if _BARE_SCAN.match(detail) or _FTS_FULL_SCAN.match(detail):
+            full_scan = 1
+        if detail.startswith("USE TEMP B-TREE"):
+            temp_btree = 1
+    return "\n".join(lines), full_scan, temp_btree
+
+class MemoryCursor(sqlite3.Cursor):
+    """Cursor that times each statement, execute plus fetches, for the slow-query log."""
+    
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._statement = None
+        self._params = None
+        self._elapsed = 0.0
+    
+    def _run(self, statement: str, params, call):
+        self._finish_statement()
+        start = time.perf_counter()
+        returns_rows = False
+        try:
+            result = call()
+            returns_rows = self.description is not None
+            return result
+        finally:
+            self._statement, self._params = statement, params
+            self._elapsed = time.perf_counter() - start
+            if not returns_rows:
+                self._finish_statement()
+    
+    def _fetched(self, start: float, exhausted: bool):
+        self._elapsed += time.perf_counter() - start
+        if exhausted:
+            self._finish_statement()
+    
+    def _finish_statement(self):
+        """Hand the statement that just completed to the connection's slow-query check."""
+        if self._statement is not None:
+            statement, self._statement = self._statement, None
+            self.connection._check_slow_query(statement, self._params, self._elapsed)
+    
+    def execute(self, statement, params=()):
+        return self._run(statement, params, lambda: super(MemoryCursor, self).execute(statement, params))
+    
+    def executemany(self, statement, seq_of_params):
+        # Only a list can be peeked at for EXPLAIN without consuming it
+        first = seq_of_params[0] if isinstance(seq_of_params, list) and seq_of_params else None
+        return self._run(statement, first,
+                         lambda: super(MemoryCursor, self).executemany(statement, seq_of_params))
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is None)
+        return row
+    
+    def fetchmany(self, *args):
+        start = time.perf_counter()
+        rows = super().fetchmany(*args)
+        self._fetched(start, not rows)
+        return rows
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, True)
+        return rows
+    
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, True)
+            raise
+        self._fetched(start, False)
+        return row
+    
+    def close(self):
+        self._finish_statement()
+        super().close()
+
+class MemoryConnection(sqlite3.Connection):
+    """Connection that logs statements slower than SLOW_QUERY_MS to slow_query_log.
+    
+    The plan is captured on the spot, but rows are only written after the
+    caller commits (or at close), on this same connection, so logging never
+    joins or blocks the caller's own transaction.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors = weakref.WeakSet()
+        self._slow_queries = []
+    
+    def cursor(self, factory=MemoryCursor):
+        cursor = super().cursor(factory)
+        if isinstance(cursor, MemoryCursor):
+            self._cursors.add(cursor)
+        return cursor
+
+    # Connection.execute() builds its cursor internally; route it through cursor() instead
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def _check_slow_query(self, statement: str, params, seconds: float):
+        duration_ms = seconds * 1000
+        if SLOW_QUERY_MS is None or duration_ms < SLOW_QUERY_MS:
+            return
+        plan, full_scan, temp_btree = _explain(self, statement, params)
+        self._slow_queries.append((round(duration_ms, 3), " ".join(statement.split()),
+                                   _redact_params(params), plan, full_scan, temp_btree))
+    
+    def _flush_slow_queries(self):
+        """Write pending entries into the ring buffer, best effort.
+        
+        A reader that turns writer here must not stall (or deadlock with) a
+        long maintenance pass: while another thread holds _maintenance_lock,
+        or the database stays busy past SLOW_QUERY_LOCK_TIMEOUT_MS, entries
+        are parked for a later flush instead.
+        """
+        pending, self._slow_queries = self._slow_queries, []
+        if not pending and not _parked_slow_queries:
+            return
+        if not _maintenance_lock.acquire(blocking=False):
+            _parked_slow_queries.extend(pending)
+            return
+        try:
+            while _parked_slow_queries:
+                pending.insert(0, _parked_slow_queries.pop())
+        except IndexError:
+            pass  # drained by another thread's flush
+        try:
+            self._write_slow_queries(pending)
+        finally:
+            _maintenance_lock.release()
+    
+    def _write_slow_queries(self, pending: List[tuple]):
+        c = sqlite3.Cursor(self)
+        busy_timeout = c.execute('PRAGMA busy_timeout').fetchone()[0]
+        c.execute(f'PRAGMA busy_timeout = {SLOW_QUERY_LOCK_TIMEOUT_MS}')
+        try:
+            for entry in pending:
+                c.execute('''INSERT OR REPLACE INTO slow_query_log
+                             (slot, seq, duration_ms, statement, params, query_plan, full_scan, temp_btree)
+                             SELECT (COALESCE(MAX(seq), 0) + 1) % ?, COALESCE(MAX(seq), 0) + 1,
+                                    ?, ?, ?, ?, ?, ?
+                             FROM slow_query_log''', (SLOW_QUERY_LOG_SIZE,) + entry)
+            super().commit()
+        except sqlite3.OperationalError as e:
+            super().rollback()
+            if "no such table" not in str(e):
+                _parked_slow_queries.extend(pending)
+        except sqlite3.Error:
+            super().rollback()
+        finally:
+            c.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+    
+    def commit(self):
+        super().commit()
+        self._flush_slow_queries()
+    
+    def close(self):
+        # Closing the cursors also releases the read lock a half-read one would keep
+        for cursor in list(self._cursors):
+            cursor.close()
+        if self._slow_queries:
+            # Closing would discard an open transaction anyway; do it first so only the log commits
+            super().rollback()
+            self._flush_slow_queries()
+        super().close()
+
+# Swapped for an instrumented subclass by memory_metrics.enable()
+CONNECTION_FACTORY = MemoryConnection
+
+def get_slow_queries(limit: int = 50, full_scans_only: bool = False, conn=None) -> List[Dict]:
+    """Most recent slow-query log entries, newest first."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    scan_filter = "WHERE full_scan = 1 " if full_scans_only else ""
+    c.execute(f'''SELECT seq, logged_at, duration_ms, statement, params, query_plan, full_scan, temp_btree
+                  FROM slow_query_log {scan_filter}ORDER BY seq DESC LIMIT ?''', (limit,))
+    
+    results = []
+    for row in c.fetchall():
+        results.append({
+            "seq": row[0],
+            "logged_at": row[1],
+            "duration_ms": row[2],
+            "statement": row[3],
+            "params": json.loads(row[4]) if row[4] else None,
+            "query_plan": row[5],
+            "full_scan": bool(row[6]),
+            "temp_btree": bool(row[7])
+        })
+    
+    if own_conn:
+        conn.close()
+    return results
+
+def clear_slow_queries() -> Dict:
+    """Empty the slow-query log."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('DELETE FROM slow_query_log')
+    cleared = c.rowcount
     conn.commit()
     conn.close()
+    return {"status": "cleared", "entries": cleared}
 
 def get_connection():
-    """Get database connection."""
-    return sqlite3.connect(DB_PATH)
+    """Get database connection, upgraded to SCHEMA_VERSION on this process's first."""
+    conn = sqlite3.connect(DB_PATH, factory=CONNECTION_FACTORY)
+    _ensure_schema(conn)
+    return conn
+
+_schema_checked = False
+_schema_lock = threading.Lock()
+
+def _ensure_schema(conn):
+    """Run pending migrations once per process, so a pre-upgrade database works without init_database()."""
+    global _schema_checked
+    if _schema_checked:
+        return
+    with _schema_lock:
+        if not _schema_checked:
+            if get_schema_version(conn) < SCHEMA_VERSION:
+                migrate(conn)
+            _schema_checked = True
 
 def generate_id(prefix: str = "") -> str:
     """Generate unique ID."""
@@ -124,21 +872,43 @@ def calculate_hash(content: str) -> str:
 
 # ==================== SHORT-TERM MEMORY ====================
 
-def store_ability(ability: str, description: str):
-    """Store a discovered ability in persistent memory."""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    key = f"ability_{ability.lower().replace(' ', '_')}"
+SHORT_TERM_UPSERT = '''INSERT OR REPLACE INTO short_term_memory (key, value, category, updated_at)
+                        VALUES (?, ?, ?, CURRENT_TIMESTAMP)'''
+
+def _short_term_key(category: str, name: str) -> str:
+    """Key a name is stored under: the same for "Web Search", "web-search" and "web_search"."""
+    return f"{category}_{name.lower().replace(' ', '_').replace('-', '_')}"
+
+def _ability_row(ability: str, description: str) -> tuple:
+    """(key, value, category) for an ability."""
+    key = _short_term_key("ability", ability)
     value = json.dumps({
         "ability": ability,
         "description": description,
         "discovered_at": datetime.now().isoformat()
     })
+    return (key, value, "ability")
+
+def _permission_row(permission: str, details: str) -> tuple:
+    """(key, value, category) for a permission."""
+    key = _short_term_key("permission", permission)
+    value = json.dumps({
+        "permission": permission,
+        "details": details,
+        "granted_at": datetime.now().isoformat()
+    })
+    return (key, value, "permission")
+
+def store_ability(ability: str, description: str):
+    """Store a discovered ability in persistent memory."""
+    if WRITE_JOURNAL_ENABLED:
+        get_write_journal().append(_ability_row(ability, description))
+        return {"status": "stored", "ability": ability}
+    
+    conn = get_connection()
+    c = conn.cursor()
     
-    c.execute('''INSERT OR REPLACE INTO short_term_memory (key, value, category, updated_at)
-                 VALUES (?, ?, 'ability', CURRENT_TIMESTAMP)''',
-              (key, value))
+    c.execute(SHORT_TERM_UPSERT, _ability_row(ability, description))
     
     conn.commit()
     conn.close()
@@ -147,53 +917,571 @@ def store_ability(ability: str, description: str):
 
 def store_permission(permission: str, details: str):
     """Store a granted permission in persistent memory."""
+    if WRITE_JOURNAL_ENABLED:
+        get_write_journal().append(_permission_row(permission, details))
+        return {"status": "stored", "permission": permission}
+    
     conn = get_connection()
     c = conn.cursor()
     
-    key = f"permission_{permission.lower().replace(' ', '_')}"
-    value = json.dumps({
-        "permission": permission,
-        "details": details,
-        "granted_at": datetime.now().isoformat()
-    })
-    
-    c.execute('''INSERT OR REPLACE INTO short_term_memory (key, value, category, updated_at)
-                 VALUES (?, ?, 'permission', CURRENT_TIMESTAMP)''',
-              (key, value))
+    c.execute(SHORT_TERM_UPSERT, _permission_row(permission, details))
     
     conn.commit()
     conn.close()
     
     return {"status": "stored", "permission": permission}
 
-def get_all_abilities() -> List[Dict]:
+def get_all_abilities(conn=None) -> List[Dict]:
     """Get all stored abilities."""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     c = conn.cursor()
     
     c.execute('''SELECT key, value FROM short_term_memory WHERE category = 'ability' ''')
-    abilities = []
-    
-    for row in c.fetchall():
-        abilities.append(json.loads(row[1]))
+    values = dict(c.fetchall())
+    values.update(_journal_overlay('ability'))
+    abilities = [json.loads(value) for value in values.values()]
     
-    conn.close()
+    if own_conn:
+        conn.close()
     return abilities
 
-def get_all_permissions() -> List[Dict]:
+def get_all_permissions(conn=None) -> List[Dict]:
     """Get all stored permissions."""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     c = conn.cursor()
     
     c.execute('''SELECT key, value FROM short_term_memory WHERE category = 'permission' ''')
-    permissions = []
-    
-    for row in c.fetchall():
-        permissions.append(json.loads(row[1]))
+    values = dict(c.fetchall())
+    values.update(_journal_overlay('permission'))
+    permissions = [json.loads(value) for value in values.values()]
     
-    conn.close()
+    if own_conn:
+        conn.close()
     return permissions
 
+# ==================== GROUP COMMIT ====================
+
+# Held for the whole of weekly_maintenance() and rebuild_memory_search(): their
+# streaming passes keep a read open while they write, so another in-process
+# writer committing in between would deadlock with them. Background writers
+# take it per batch; slow-query flushes skip writing while another thread has it.
+_maintenance_lock = threading.RLock()
+
+class GroupCommitWriter:
+    """Background thread that commits queued short-term writes in batches.
+    
+    A batch is committed GROUP_COMMIT_INTERVAL_MS after its first write
+    arrived, as soon as GROUP_COMMIT_MAX_ITEMS are waiting, or on flush(),
+    so a burst of small writes pays for one fsync instead of one each.
+    """
+    
+    def __init__(self, interval_ms: float = GROUP_COMMIT_INTERVAL_MS,
+                 max_items: int = GROUP_COMMIT_MAX_ITEMS):
+        self.interval = interval_ms / 1000
+        self.max_items = max_items
+        self._cond = threading.Condition()
+        self._pending = []
+        self._oldest = 0.0
+        self._submitted = 0
+        self._committed = 0
+        self._flush_requested = False
+        self._closed = False
+        self._thread = None
+    
+    def submit(self, row: tuple, result: Dict) -> Future:
+        """Queue one (key, value, category) row; the future resolves to `result` once committed."""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((row, result, future))
+            self._submitted += 1
+            # Wake the writer to start a batch's clock, or to commit a full one
+            if len(self._pending) == 1 or len(self._pending) >= self.max_items:
+                self._cond.notify_all()
+        return future
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Commit everything submitted so far; False if `timeout` ran out first."""
+        with self._cond:
+            target = self._submitted
+            if self._committed >= target:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._committed >= target, timeout)
+    
+    def pending(self) -> int:
+        with self._cond:
+            return self._submitted - self._committed
+    
+    def close(self, timeout: Optional[float] = None):
+        """Commit what is queued, then stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _next_batch(self) -> Optional[List]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or self._closed)
+            if not self._pending:
+                return None
+            while (len(self._pending) < self.max_items and not self._flush_requested
+                   and not self._closed):
+                remaining = self._oldest + self.interval - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_items]
+            del self._pending[:self.max_items]
+            if self._pending:
+                self._oldest = time.monotonic()
+            else:
+                self._flush_requested = False
+            return batch
+    
+    def _run(self):
+        conn = get_connection()
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                try:
+                    with _maintenance_lock:
+                        conn.executemany(SHORT_TERM_UPSERT, [row for row, _, _ in batch])
+                        conn.commit()
+                    error = None
+                except sqlite3.Error as e:
+                    conn.rollback()
+                    error = e
+                for _, result, future in batch:
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+                with self._cond:
+                    self._committed += len(batch)
+                    self._cond.notify_all()
+        finally:
+            conn.close()
+
+_short_term_writer = None
+_short_term_writer_lock = threading.Lock()
+
+def get_short_term_writer() -> GroupCommitWriter:
+    """The process-wide group-commit writer, started on first use and flushed at exit."""
+    global _short_term_writer
+    with _short_term_writer_lock:
+        if _short_term_writer is None:
+            _short_term_writer = GroupCommitWriter()
+            atexit.register(_short_term_writer.close)
+        return _short_term_writer
+
+def queue_ability(ability: str, description: str) -> Future:
+    """Like store_ability, but group-committed; the future resolves once it is durable."""
+    return get_short_term_writer().submit(_ability_row(ability, description),
+                                          {"status": "stored", "ability": ability})
+
+def queue_permission(permission: str, details: str) -> Future:
+    """Like store_permission, but group-committed; the future resolves once it is durable."""
+    return get_short_term_writer().submit(_permission_row(permission, details),
+                                          {"status": "stored", "permission": permission})
+
+def flush_short_term(timeout: Optional[float] = None) -> Dict:
+    """Durability point: block until every queued short-term write is committed."""
+    writer = _short_term_writer
+    if writer is None or writer.flush(timeout):
+        return {"status": "flushed"}
+    return {"status": "timeout", "pending": writer.pending()}
+
+# ==================== WRITE JOURNAL ====================
+
+# Replays never move a key back in time: a record older than the row already
+# in SQLite (say, a direct store_ability made after it was journaled) is skipped
+JOURNAL_REPLAY_UPSERT = '''INSERT INTO short_term_memory (key, value, category, updated_at)
+                           VALUES (?, ?, ?, ?)
+                           ON CONFLICT(key) DO UPDATE SET value = excluded.value,
+                               category = excluded.category, updated_at = excluded.updated_at
+                           WHERE short_term_memory.updated_at IS NULL
+                              OR excluded.updated_at >= short_term_memory.updated_at'''
+
+def _encode_journal_record(row: tuple) -> bytes:
+    """One journal line: CRC-32 of the JSON payload, a space, the payload."""
+    key, value, category = row
+    payload = json.dumps({
+        "key": key,
+        "value": value,
+        "category": category,
+        # Same format and clock (UTC) as SQLite's CURRENT_TIMESTAMP
+        "at": datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    }, separators=(',', ':'))
+    return f"{zlib.crc32(payload.encode('utf-8')):08x} {payload}\n".encode('utf-8')
+
+def _read_journal_records(path: Path, offset: int = 0) -> tuple:
+    """Valid records of a segment from `offset`: (records, end_offset, state).
+    
+    state is "complete" when every byte was consumed, "torn" when the segment
+    ends in a partial line (a write in progress or cut short by a crash) and
+    "corrupt" when a line fails its checksum; reading stops there.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    
+    records = []
+    end = 0
+    while end < len(data):
+        newline = data.find(b'\n', end)
+        if newline < 0:
+            return records, offset + end, "torn"
+        line = data[end:newline]
+        try:
+            checksum, payload = line.split(b' ', 1)
+            if int(checksum, 16) != zlib.crc32(payload):
+                raise ValueError("checksum mismatch")
+            record = json.loads(payload)
+        except ValueError:
+            return records, offset + end, "corrupt"
+        records.append((record["key"], record["value"], record["category"], record["at"]))
+        end = newline + 1
+    return records, offset + end, "complete"
+
+def replay_journal_segment(conn, path: Path) -> Dict:
+    """Apply a segment's records past its recorded offset to short_term_memory.
+    
+    The records and the new offset commit in one transaction, so a segment
+    is replayed exactly once however many processes (or crashes) get to it.
+    """
+    c = conn.cursor()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        c.execute('SELECT applied_bytes FROM journal_segments WHERE segment = ?', (path.name,))
+        row = c.fetchone()
+        offset = row[0] if row else 0
+        records, end, state = _read_journal_records(path, offset)
+        if end > offset:
+            c.executemany(JOURNAL_REPLAY_UPSERT, records)
+            c.execute('''INSERT INTO journal_segments (segment, applied_bytes, records) VALUES (?, ?, ?)
+                         ON CONFLICT(segment) DO UPDATE SET applied_bytes = excluded.applied_bytes,
+                             records = records + excluded.records, updated_at = CURRENT_TIMESTAMP''',
+                      (path.name, end, len(records)))
+        conn.commit()
+    except (sqlite3.Error, OSError):
+        conn.rollback()
+        raise
+    
+    return {"segment": path.name, "replayed": len(records), "applied_bytes": end, "state": state}
+
+def _forget_journal_segment(conn, path: Path, quarantine: bool = False):
+    """Remove a replayed segment (or move a corrupt one aside), then its offset row."""
+    if quarantine:
+        _quarantine_file(str(path))
+    else:
+        path.unlink(missing_ok=True)
+    conn.execute('DELETE FROM journal_segments WHERE segment = ?', (path.name,))
+    conn.commit()
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this pid is running (errs towards yes)."""
+    if os.name == 'nt':
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() == 5  # access denied: it exists
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _segment_owner_alive(path: Path, journal=None) -> bool:
+    """Whether the process that wrote segment `path` may still append to it.
+    
+    Segment names carry the owner's pid. One with our pid that our journal
+    does not own is a leftover from an earlier process that had the same pid.
+    """
+    try:
+        pid = int(path.name.split('-')[1])
+    except (IndexError, ValueError):
+        return False
+    if pid == os.getpid():
+        return journal is not None and journal.owns(path.name)
+    return _process_alive(pid)
+
+class WriteJournal:
+    """Append-only, checksummed log of short-term writes, compacted into SQLite.
+    
+    append() costs one sequential write and fsync to this process's current
+    segment under JOURNAL_DIR; SQLite's journal and page writes are paid
+    later, by a background thread that seals the segment and replays it in a
+    single transaction every JOURNAL_COMPACT_INTERVAL_SECONDS (sooner once
+    JOURNAL_COMPACT_BYTES have piled up). Until then overlay() serves the
+    unreplayed tail to readers.
+    """
+    
+    def __init__(self, directory: Path = JOURNAL_DIR,
+                 compact_interval: float = JOURNAL_COMPACT_INTERVAL_SECONDS,
+                 compact_bytes: int = JOURNAL_COMPACT_BYTES):
+        self.directory = directory
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+        self._cond = threading.Condition()
+        self._compact_lock = threading.Lock()
+        self._file = None
+        self._segment = None
+        self._bytes = 0
+        self._sealed = []
+        self._tails: Dict[str, Dict[str, tuple]] = {}
+        self._compact_requested = False
+        self._closed = False
+        self._thread = None
+    
+    def owns(self, segment: str) -> bool:
+        """Whether `segment` is one of this journal's own (live) segments."""
+        with self._cond:
+            return segment in self._tails
+    
+    def append(self, row: tuple):
+        """Durably log one (key, value, category) row."""
+        data = _encode_journal_record(row)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteJournal is closed")
+            if self._file is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._segment = self.directory / f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.log"
+                self._file = open(self._segment, 'ab')
+                self._bytes = 0
+                self._tails[self._segment.name] = {}
+            try:
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError:
+                # Leave no partial line behind for the records after it
+                self._file.truncate(self._bytes)
+                raise
+            self._bytes += len(data)
+            self._tails[self._segment.name][row[0]] = row
+            
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="journal-compactor", daemon=True)
+                self._thread.start()
+            if self._bytes >= self.compact_bytes:
+                self._compact_requested = True
+                self._cond.notify_all()
+    
+    def overlay(self, category: str) -> Dict[str, str]:
+        """key -> value of journaled rows in `category` not yet replayed, newest last."""
+        with self._cond:
+            return {key: value
+                    for tail in self._tails.values()
+                    for key, value, row_category in tail.values() if row_category == category}
+    
+    def pending_bytes(self) -> int:
+        with self._cond:
+            return self._bytes + sum(path.stat().st_size for path in self._sealed if path.exists())
+    
+    def _seal(self):
+        """Close the current segment; later appends start a new one."""
+        with self._cond:
+            if self._file is not None:
+                self._file.close()
+                self._sealed.append(self._segment)
+                self._file = None
+                self._segment = None
+                self._bytes = 0
+            self._compact_requested = False
+    
+    def compact(self) -> Dict:
+        """Seal the current segment and replay every sealed one into SQLite."""
+        with self._compact_lock:
+            self._seal()
+            with self._cond:
+                sealed = list(self._sealed)
+            
+            totals = {"segments": 0, "replayed": 0, "quarantined": 0, "missing": 0}
+            conn = get_connection()
+            try:
+                for path in sealed:
+                    with _maintenance_lock:
+                        try:
+                            result = replay_journal_segment(conn, path)
+                        except FileNotFoundError:
+                            result = None
+                        if result is None:
+                            # Removed by something else; nothing left to replay
+                            conn.execute('DELETE FROM journal_segments WHERE segment = ?', (path.name,))
+                            conn.commit()
+                        else:
+                            # Our own segments are never torn: append() truncates a failed write
+                            _forget_journal_segment(conn, path, quarantine=result["state"] != "complete")
+                    with self._cond:
+                        self._sealed.remove(path)
+                        del self._tails[path.name]
+                    if result is None:
+                        totals["missing"] += 1
+                        continue
+                    totals["segments"] += 1
+                    totals["replayed"] += result["replayed"]
+                    totals["quarantined"] += result["state"] != "complete"
+            finally:
+                conn.close()
+            return totals
+    
+    def close(self, timeout: Optional[float] = None):
+        """Stop the compactor, then replay what is left on the calling thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        try:
+            self.compact()
+        except (sqlite3.Error, OSError):
+            pass  # the segments stay on disk; the next process recovers them
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._compact_requested or self._closed, self.compact_interval)
+                if self._closed:
+                    return
+            try:
+                self.compact()
+            except (sqlite3.Error, OSError):
+                pass  # e.g. locked by a long writer; the sealed segments wait for the next pass
+
+_write_journal = None
+_write_journal_lock = threading.Lock()
+
+def get_write_journal() -> WriteJournal:
+    """This process's write journal, recovering other processes' segments on first use."""
+    global _write_journal
+    with _write_journal_lock:
+        if _write_journal is None:
+            _write_journal = WriteJournal()
+            atexit.register(_write_journal.close)
+            try:
+                recover_write_journal()
+            except sqlite3.Error:
+                pass  # locked right now; left for the next process (or weekly maintenance)
+        return _write_journal
+
+def _journal_overlay(category: str) -> Dict[str, str]:
+    """Unreplayed journaled values for a short-term read to lay over SQLite's."""
+    if not WRITE_JOURNAL_ENABLED:
+        return {}
+    return get_write_journal().overlay(category)
+
+def recover_write_journal(stale_seconds: float = JOURNAL_STALE_SECONDS) -> Dict:
+    """Replay segments left by processes that are no longer running.
+    
+    Whatever they hold up to a torn or corrupt line becomes visible in
+    SQLite now. Segments of live processes are left alone: their owner still
+    appends to them and compacts them itself. A segment is only deleted (or,
+    if corrupt, quarantined) once it has also been untouched for
+    `stale_seconds`.
+    """
+    journal = _write_journal
+    totals = {"segments": 0, "replayed": 0, "removed": 0, "quarantined": 0}
+    if not JOURNAL_DIR.exists():
+        return totals
+    
+    conn = get_connection()
+    try:
+        for path in sorted(JOURNAL_DIR.glob("*.log")):
+            if _segment_owner_alive(path, journal):
+                continue
+            with _maintenance_lock:
+                try:
+                    result = replay_journal_segment(conn, path)
+                    age = time.time() - path.stat().st_mtime
+                except FileNotFoundError:
+                    continue  # recovered by another process meanwhile
+                totals["segments"] += 1
+                totals["replayed"] += result["replayed"]
+                if age >= stale_seconds:
+                    corrupt = result["state"] != "complete"
+                    _forget_journal_segment(conn, path, quarantine=corrupt)
+                    totals["quarantined" if corrupt else "removed"] += 1
+    finally:
+        conn.close()
+    return totals
+
+def iter_journal_tail(conn=None):
+    """Yield (key, value, category, at) for each journaled record SQLite does not have yet.
+    
+    Read-only: every segment is read from its applied offset up to its first
+    torn or corrupt line, oldest segment first, in the order a replay would
+    apply them. Nothing is replayed or removed.
+    """
+    if not JOURNAL_DIR.exists():
+        return
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        applied = dict(conn.execute('SELECT segment, applied_bytes FROM journal_segments'))
+    except sqlite3.OperationalError:
+        applied = {}  # a database not yet migrated has no journal_segments
+    finally:
+        if own_conn:
+            conn.close()
+    
+    for path in sorted(JOURNAL_DIR.glob("*.log")):
+        try:
+            records, _, _ = _read_journal_records(path, applied.get(path.name, 0))
+        except FileNotFoundError:
+            continue  # compacted away meanwhile
+        yield from records
+
+def write_journal_status(conn=None) -> Dict:
+    """Segments under JOURNAL_DIR with their size and how much of each is in SQLite."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    
+    c.execute('SELECT segment, applied_bytes FROM journal_segments')
+    applied = dict(c.fetchall())
+    segments = []
+    for path in sorted(JOURNAL_DIR.glob("*.log")) if JOURNAL_DIR.exists() else []:
+        size = path.stat().st_size
+        segments.append({"segment": path.name, "bytes": size, "applied_bytes": applied.get(path.name, 0)})
+    
+    if own_conn:
+        conn.close()
+    return {
+        "enabled": WRITE_JOURNAL_ENABLED,
+        "segments": segments,
+        "pending_bytes": sum(segment["bytes"] - segment["applied_bytes"] for segment in segments)
+    }
+
 # ==================== CHAT STORAGE ====================
 
 def store_chat(chat_id: str, url: str, title: str, content: str, 
@@ -222,15 +1510,14 @@ def store_chat(chat_id: str, url: str, title: str, content: str,
                json.dumps(topics or []),
                str(chat_file)))
     
-    # Add to full-text search
-    c.execute('''INSERT INTO memory_search (content_id, content_type, title, summary, content)
-                 VALUES (?, 'chat', ?, ?, ?)''',
-              (chat_id, title, summary, content[:10000]))  # Limit content for FTS
+    # Full-text indexing happens in the background
+    job_id = _enqueue_index(c, 'chat', chat_id)
     
     conn.commit()
     conn.close()
+    _notify_index_worker()
     
-    return {"status": "stored", "chat_id": chat_id, "file": str(chat_file)}
+    return {"status": "stored", "chat_id": chat_id, "file": str(chat_file), "index_job": job_id}
 
 # ==================== ENTITY STORAGE ====================
 
@@ -248,6 +1535,8 @@ def create_entity(name: str, entity_type: str, content: str,
         f.write(f"# {name}\n\n")
         f.write(f"**Type:** {entity_type}\n")
         f.write(f"**Created:** {datetime.now().isoformat()}\n\n")
+        if summary:
+            f.write(f"**Summary:** {summary}\n\n")
         f.write("---\n\n")
         f.write(content)
     
@@ -258,16 +1547,17 @@ def create_entity(name: str, entity_type: str, content: str,
     c.execute('''INSERT INTO entities (entity_id, entity_type, name, summary, file_path, importance_score)
                  VALUES (?, ?, ?, ?, ?, ?)''',
               (entity_id, entity_type, name, summary, str(entity_file), importance))
+    _store_derived_aliases(c, entity_id, name, summary)
     
-    # Add to full-text search
-    c.execute('''INSERT INTO memory_search (content_id, content_type, title, summary, content)
-                 VALUES (?, 'entity', ?, ?, ?)''',
-              (entity_id, name, summary, content[:10000]))
+    # Full-text indexing happens in the background
+    job_id = _enqueue_index(c, 'entity', entity_id)
     
     conn.commit()
     conn.close()
+    _notify_index_worker()
     
-    return {"status": "created", "entity_id": entity_id, "name": name, "file": str(entity_file)}
+    return {"status": "created", "entity_id": entity_id, "name": name, "file": str(entity_file),
+            "index_job": job_id}
 
 def update_entity(entity_id: str, new_content: str, append: bool = True) -> Dict:
     """Update an existing entity."""
@@ -290,12 +1580,15 @@ def update_entity(entity_id: str, new_content: str, append: bool = True) -> Dict
     else:
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(new_content)
+    _entity_files.discard(file_path)
     
     c.execute('UPDATE entities SET updated_at = CURRENT_TIMESTAMP WHERE entity_id = ?', (entity_id,))
+    job_id = _enqueue_index(c, 'entity', entity_id)
     conn.commit()
     conn.close()
+    _notify_index_worker()
     
-    return {"status": "updated", "entity_id": entity_id}
+    return {"status": "updated", "entity_id": entity_id, "index_job": job_id}
 
 def create_relation(from_entity: str, to_entity: str, relation_type: str, strength: float = 0.5) -> Dict:
     """Create a relation between two entities."""
@@ -312,59 +1605,1085 @@ def create_relation(from_entity: str, to_entity: str, relation_type: str, streng
     
     return {"status": "created", "relation_id": relation_id}
 
-# ==================== SEARCH & RETRIEVAL ====================
+# ==================== ENTITY ALIASES ====================
 
-def search_memory(query: str, content_types: List[str] = None, limit: int = 20) -> List[Dict]:
-    """Full-text search across all memory."""
+# "Shared network drive (S: drive)", "also known as the shared drive"
+_ALIAS_PATTERNS = [
+    re.compile(r'\(([^\W\d][^()]{1,59})\)'),
+    re.compile(r'\b(?:also known as|also called|a\.?k\.?a\.?|formerly|nicknamed)\s+(?:the\s+)?'
+               r'["\'\u201c]?([^,;.()"\u201d]{2,60})', re.IGNORECASE),
+]
+
+def alias_key(text: str) -> str:
+    """Normalized form aliases are matched on: case, accents' width and punctuation ignored."""
+    return ' '.join(re.findall(r'\w+', unicodedata.normalize('NFKC', text).lower()))
+
+def _derived_aliases(name: str, summary: Optional[str]) -> List[str]:
+    """The entity's own name plus alternative names spelled out in its summary."""
+    aliases = [name]
+    for pattern in _ALIAS_PATTERNS:
+        aliases.extend(match.strip() for match in pattern.findall(summary or ""))
+    # Longer parentheticals and clauses are descriptions, not names
+    return [alias for alias in aliases if 0 < len(alias_key(alias).split()) <= ALIAS_MAX_WORDS]
+
+def _store_derived_aliases(c, entity_id: str, name: str, summary: Optional[str]):
+    """Replace an entity's name- and summary-derived aliases; manual ones stay."""
+    c.execute("DELETE FROM entity_aliases WHERE entity_id = ? AND source != 'manual'", (entity_id,))
+    rows = [(alias_key(alias), entity_id, alias, "name" if i == 0 else "summary")
+            for i, alias in enumerate(_derived_aliases(name, summary))]
+    c.executemany('''INSERT OR IGNORE INTO entity_aliases (alias_key, entity_id, alias, source)
+                     VALUES (?, ?, ?, ?)''', rows)
+
+def add_alias(entity_id: str, alias: str) -> Dict:
+    """Record another name an entity goes by, so searches for it find the entity too."""
+    key = alias_key(alias)
+    if not key:
+        return {"status": "error", "message": "Alias has no words"}
     conn = get_connection()
     c = conn.cursor()
     
-    if content_types:
-        type_filter = " AND content_type IN ({})".format(','.join('?' * len(content_types)))
-        c.execute(f'''SELECT content_id, content_type, title, summary, rank
-                     FROM memory_search 
-                     WHERE memory_search MATCH ?{type_filter}
-                     ORDER BY rank
-                     LIMIT ?''',
-                  [query] + content_types + [limit])
-    else:
-        c.execute('''SELECT content_id, content_type, title, summary, rank
-                     FROM memory_search 
-                     WHERE memory_search MATCH ?
-                     ORDER BY rank
-                     LIMIT ?''',
-                  (query, limit))
+    c.execute('SELECT 1 FROM entities WHERE entity_id = ?', (entity_id,))
+    if not c.fetchone():
+        conn.close()
+        return {"status": "error", "message": "Entity not found"}
     
-    results = []
-    for row in c.fetchall():
-        results.append({
-            "content_id": row[0],
-            "content_type": row[1],
-            "title": row[2],
-            "summary": row[3],
-            "relevance": row[4]
-        })
+    c.execute('''INSERT OR REPLACE INTO entity_aliases (alias_key, entity_id, alias, source)
+                 VALUES (?, ?, ?, 'manual')''', (key, entity_id, alias))
+    conn.commit()
+    conn.close()
     
+    return {"status": "added", "entity_id": entity_id, "alias": alias, "alias_key": key}
+
+def remove_alias(entity_id: str, alias: str) -> Dict:
+    """Forget one alias of an entity (derived ones return when the entity is re-created)."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('DELETE FROM entity_aliases WHERE alias_key = ? AND entity_id = ?', (alias_key(alias), entity_id))
+    removed = c.rowcount
+    conn.commit()
     conn.close()
+    
+    return {"status": "removed" if removed else "not_found", "entity_id": entity_id, "alias": alias}
+
+def get_aliases(entity_id: str, conn=None) -> List[Dict]:
+    """Every alias of an entity with where it came from (name, summary or manual)."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    c.execute('''SELECT alias, alias_key, source FROM entity_aliases
+                 WHERE entity_id = ? ORDER BY alias_key''', (entity_id,))
+    aliases = [{"alias": row[0], "alias_key": row[1], "source": row[2]} for row in c.fetchall()]
+    if own_conn:
+        conn.close()
+    return aliases
+
+_PLAIN_QUERY = re.compile(r'[^\W_]+(?:\s+[^\W_]+)*')
+_FTS_OPERATORS = {"AND", "OR", "NOT", "NEAR"}
+
+def _expand_aliases(c, query: str) -> str:
+    """MATCH expression for `query`: if it is an alias, OR'd with every alias of its entities as phrases.
+    
+    Only plain words are expanded; a query using FTS syntax (prefix *,
+    column filters, quotes, operators) is the caller's exact intent and is
+    returned unchanged, as is one that is no alias. One lookup: the
+    alias_key primary key finds the entities, their (entity_id, alias_key)
+    index their other aliases.
+    """
+    query = query.strip()
+    if not _PLAIN_QUERY.fullmatch(query) or _FTS_OPERATORS & set(query.split()):
+        return query
+    c.execute('''SELECT DISTINCT other.alias_key
+                 FROM entity_aliases hit
+                 JOIN entity_aliases other ON other.entity_id = hit.entity_id
+                 WHERE hit.alias_key = ?''', (alias_key(query),))
+    keys = [row[0] for row in c.fetchall()]
+    if not keys:
+        return query
+    return ' OR '.join(['({})'.format(query)] + ['"{}"'.format(key) for key in keys])
+
+# ==================== ENTITY SECTIONS ====================
+
+_SECTION_HEADING = re.compile(rb'#{1,6}[ \t]+(.*?)[ \t#]*$')
+_UPDATE_STAMP = re.compile(rb'\*\*Updated:\*\*[ \t]*(\S+)')
+
+def _split_sections(data: bytes) -> List[tuple]:
+    """(heading, byte_start, byte_end) of each section of a markdown entity file.
+    
+    A section starts at a heading line, or after a --- rule: update_entity's
+    update blocks, headed "Updated <timestamp>" from their stamp. Headings
+    and rules inside fenced code do not split; blank sections are dropped
+    and the rest trimmed of surrounding blank lines.
+    """
+    cuts = [(0, 0, "")]  # (end of the section before, start of the next, its heading)
+    fenced = False
+    position = 0
+    for line in data.splitlines(keepends=True):
+        stripped = line.strip()
+        if stripped.startswith((b'```', b'~~~')):
+            fenced = not fenced
+        elif not fenced:
+            heading = _SECTION_HEADING.match(stripped)
+            if heading:
+                cuts.append((position, position, heading.group(1).decode('utf-8', errors='replace')))
+            elif stripped == b'---':
+                cuts.append((position, position + len(line), None))
+        position += len(line)
+    cuts.append((len(data), None, None))
+    
+    sections = []
+    for (_, start, heading), (end, _, _) in zip(cuts, cuts[1:]):
+        body = data[start:end]
+        if not body.strip():
+            continue
+        if heading is None:
+            stamp = _UPDATE_STAMP.match(body.lstrip())
+            heading = f"Updated {stamp.group(1).decode('utf-8', errors='replace')}" if stamp else ""
+        start += len(body) - len(body.lstrip())
+        sections.append((heading, start, start + len(body.strip())))
+    return sections
+
+def get_entity_sections(entity_id: str, conn=None) -> List[Dict]:
+    """Outline of an entity file: each section's index, heading and byte range, as last indexed."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    c.execute('''SELECT section_idx, heading, byte_start, byte_end FROM entity_sections
+                 WHERE entity_id = ? ORDER BY section_idx''', (entity_id,))
+    sections = [{"section_idx": row[0], "heading": row[1], "byte_range": [row[2], row[3]]} for row in c.fetchall()]
+    if own_conn:
+        conn.close()
+    return sections
+
+def get_entity_section(entity_id: str, section_idx: int, conn=None) -> Dict:
+    """One section of an entity file, reading only its byte range."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    c.execute('''SELECT e.file_path, s.heading, s.byte_start, s.byte_end
+                 FROM entity_sections s JOIN entities e ON e.entity_id = s.entity_id
+                 WHERE s.entity_id = ? AND s.section_idx = ?''', (entity_id, section_idx))
+    row = c.fetchone()
+    if own_conn:
+        conn.close()
+    
+    if not row:
+        return {"status": "error", "message": "Section not found"}
+    file_path, heading, start, end = row
+    try:
+        with open(file_path, 'rb') as f:
+            text, start, end = _read_range(f, start, end - start)
+    except FileNotFoundError:
+        return {"status": "error", "message": "Entity file missing"}
+    return {
+        "entity_id": entity_id,
+        "section_idx": section_idx,
+        "heading": heading,
+        "byte_range": [start, end],
+        "content": text.replace('\r\n', '\n')
+    }
+
+# ==================== CHAT MESSAGES ====================
+
+_CHAT_HEADER_END = re.compile(rb'^---[ \t]*\r?$', re.M)
+_MESSAGE_START = re.compile(
+    rb'(?:\[(?P<stamp>[^\]\r\n]{4,40})\][ \t]*)?(?P<heading>#{1,6}[ \t]+)?(?:\*\*)?'
+    rb'(?P<role>user|human|assistant|claude|ai|system|tool)\b[ \t]*'
+    rb'(?:\((?P<stamp_after>[^)\r\n]{4,40})\))?[ \t]*(?P<colon>:?)(?:\*\*)?(?P<colon_after>:?)', re.I)
+_MESSAGE_ROLES = {"human": "user", "claude": "assistant", "ai": "assistant"}
+
+def _split_messages(data: bytes) -> List[tuple]:
+    """(role, timestamp, byte_start, byte_end) of each message of a chat transcript.
+    
+    A message starts at a line like "**User:**", "Assistant:", "## Human" or
+    "[2025-01-02 10:00] Claude:", a timestamp in brackets or in parentheses
+    after the role being kept. store_chat's header (up to its --- rule) is
+    skipped and fenced code never splits. Text before the first such line,
+    or a transcript without any, is one message with role None.
+    """
+    position = 0
+    if data.startswith(b'# '):
+        header = _CHAT_HEADER_END.search(data, 0, 4096)
+        if header:
+            position = header.end()
+    
+    starts = [(position, None, None)]
+    fenced = False
+    for line in data[position:].splitlines(keepends=True):
+        stripped = line.strip()
+        if stripped.startswith((b'```', b'~~~')):
+            fenced = not fenced
+        elif not fenced:
+            found = _MESSAGE_START.match(stripped)
+            if found and (found.group('colon') or found.group('colon_after')
+                          or (found.group('heading') and found.end() == len(stripped))):
+                role = found.group('role').decode('ascii').lower()
+                stamp = found.group('stamp') or found.group('stamp_after')
+                starts.append((position, _MESSAGE_ROLES.get(role, role),
+                               stamp.decode('utf-8', errors='replace').strip() if stamp else None))
+        position += len(line)
+    starts.append((len(data), None, None))
+    
+    messages = []
+    for (start, role, stamp), (end, _, _) in zip(starts, starts[1:]):
+        body = data[start:end]
+        if not body.strip():
+            continue
+        start += len(body) - len(body.lstrip())
+        messages.append((role, stamp, start, start + len(body.strip())))
+    return messages
+
+def get_chat_window(chat_id: str, message_idx: int, before: int = 2, after: int = 2, conn=None) -> Dict:
+    """Message `message_idx` of a chat with up to `before` and `after` around it.
+    
+    Only the byte range those messages span is read from the transcript.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT file_path FROM chats WHERE chat_id = ?', (chat_id,))
+    chat = c.fetchone()
+    c.execute('''SELECT message_idx, role, timestamp, byte_start, byte_end FROM chat_messages
+                 WHERE chat_id = ? AND message_idx BETWEEN ? AND ?
+                 ORDER BY message_idx''', (chat_id, message_idx - max(0, before), message_idx + max(0, after)))
+    rows = c.fetchall()
+    if own_conn:
+        conn.close()
+    
+    if not chat:
+        return {"status": "error", "message": "Chat not found"}
+    if message_idx not in [row[0] for row in rows]:
+        return {"status": "error", "message": "Message not found"}
+    start, end = rows[0][3], rows[-1][4]
+    try:
+        with open(chat[0], 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+    except FileNotFoundError:
+        return {"status": "error", "message": "Chat file missing"}
+    
+    messages = [{
+        "message_idx": idx,
+        "role": role,
+        "timestamp": stamp,
+        "content": data[low - start:high - start].decode('utf-8', errors='replace').replace('\r\n', '\n')
+    } for idx, role, stamp, low, high in rows]
+    return {"chat_id": chat_id, "message_idx": message_idx, "byte_range": [start, end], "messages": messages}
+
+# ==================== SEARCH & RETRIEVAL ====================
+
+def _encode_cursor(values: list) -> str:
+    """Opaque page cursor for a list of keyset values."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor: str, size: int) -> list:
+    """Keyset values of a cursor from _encode_cursor; ValueError if it is not one."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return values
+
+def _time_bound(value) -> str:
+    """since/until as stored timestamps compare (UTC 'YYYY-MM-DD HH:MM:SS'); strings pass through."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+def search_memory(query: str, content_types: List[str] = None, limit: int = 20, conn=None,
+                  snippet_tokens: int = 0, highlight: bool = False,
+                  markers: tuple = SNIPPET_MARKERS, weights: Optional[Dict[str, float]] = None,
+                  boosts: Optional[Dict[str, float]] = None, cursor: Optional[str] = None,
+                  since=None, until=None, time_field: str = "updated_at",
+                  facets: Optional[List[str]] = None, fuzzy: bool = False,
+                  expand_aliases: bool = True, hydrate: Optional[str] = None,
+                  max_bytes: int = HYDRATE_MAX_BYTES):
+    """Full-text search across all memory.
+    
+    Results are ordered by field-weighted bm25 (SEARCH_COLUMN_WEIGHTS, so a
+    title match outranks one buried in content) scaled by importance, access
+    count and recency (SEARCH_BOOSTS, non-negative), all computed in SQL.
+    `weights` and `boosts` override individual entries. Lower relevance
+    ranks first.
+    
+    Every result carries a "cursor"; passing the last one back returns the
+    next page, at the cost of the first. `since` (inclusive) and `until`
+    (exclusive) keep items whose chat or entity `time_field` is in range.
+    
+    With `facets` (any of SEARCH_FACETS) the return value is a dict: the
+    page as "results", the number of matches as "total" and per-facet
+    value counts over all of them as "facets", from the same scan.
+    
+    When the whole query is an alias of an entity (see add_alias), the
+    MATCH becomes every alias of that entity as a phrase, OR'd, so "S: drive"
+    also finds "shared drive"; expand_aliases=False searches the query as is.
+    
+    fuzzy=True falls back to fuzzy_search_names() when the first page of
+    the exact search is empty, so a misspelled, mid-word or CJK query still
+    finds names, titles and summaries. A query with exact hits never pays
+    for the fallback.
+    
+    Entity results carry "section": the index, heading and byte_range of
+    the section of the file that matches best, and chat results "message":
+    the index, role, timestamp and byte_range of the best message (see
+    _attach_parts); None when the match is only in the title or summary.
+    
+    snippet_tokens > 0 adds a "snippet": the window of that many tokens (at
+    most SNIPPET_MAX_TOKENS) around the best match, cut by FTS5 from the
+    indexed text, so no file is read. highlight=True returns title and
+    summary with matched terms wrapped in `markers`.
+    
+    hydrate (one of HYDRATE_MODES) adds "content", "byte_range" and
+    "truncated" to each result, so the top hits need no get_entity call;
+    see _hydrate_results. Only the needed byte range of each file is read,
+    and no more than max_bytes in total; results past the budget get None.
+    """
+    if time_field not in TIME_FIELDS:
+        raise ValueError(f"time_field must be one of {TIME_FIELDS}")
+    unknown = set(facets or ()) - set(SEARCH_FACETS)
+    if unknown:
+        raise ValueError(f"Unknown facets {sorted(unknown)}; choose from {SEARCH_FACETS}")
+    if facets and fuzzy:
+        raise ValueError("fuzzy cannot be combined with facets")
+    if hydrate is not None and hydrate not in HYDRATE_MODES:
+        raise ValueError(f"hydrate must be one of {HYDRATE_MODES}")
+    weights = {**SEARCH_COLUMN_WEIGHTS, **(weights or {})}
+    boosts = {name: max(0.0, value) for name, value in {**SEARCH_BOOSTS, **(boosts or {})}.items()}
+    bm25_weights = [weights[column] for column in SEARCH_COLUMN_WEIGHTS]
+    # Each boost term is at most its weight, so relevance lies in [score * max_boost, score]
+    max_boost = 1 + boosts["importance"] + boosts["access"] + boosts["recency"]
+    # The cursor pins "now" so recency, and with it the order, holds across pages
+    after = None
+    now = time.time() / 86400 + 2440587.5  # Julian day, as julianday('now')
+    if cursor is not None:
+        after_relevance, after_rowid, now = _decode_cursor(cursor, 3)
+        after = (after_relevance, after_rowid)
+    
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    match = _expand_aliases(c, query) if expand_aliases else query
+    
+    # 1. a pool of the best matches by weighted bm25 (no row data read unless
+    # filtering by type or time); 2. boosts from primary-key lookups on just
+    # those; 3. highlight/snippet for the final `limit`, which needs the MATCH
+    # again. A last row reports the pool's worst score and size.
+    candidate_join = ""
+    candidate_columns = ""
+    candidate_filter = ""
+    # content_id/content_type of the scored rows: looked up by rowid, unless the scan reads them anyway
+    doc, doc_join = "doc", "\n                 JOIN memory_search doc ON doc.rowid = candidates.rowid"
+    pool_params = list(bm25_weights) + [match]
+    if content_types:
+        candidate_filter += " AND memory_search.content_type IN ({})".format(','.join('?' * len(content_types)))
+        pool_params += content_types
+    if since is not None or until is not None:
+        candidate_join = '''
+                     LEFT JOIN entities e ON memory_search.content_type = 'entity'
+                                         AND e.entity_id = memory_search.content_id
+                     LEFT JOIN chats ch ON memory_search.content_type = 'chat'
+                                       AND ch.chat_id = memory_search.content_id'''
+        candidate_columns = ", memory_search.content_id AS content_id, memory_search.content_type AS content_type"
+        doc, doc_join = "candidates", ""
+        for bound, op in ((since, ">="), (until, "<")):
+            if bound is not None:
+                candidate_filter += f" AND COALESCE(e.{time_field}, ch.{time_field}) {op} ?"
+                pool_params.append(_time_bound(bound))
+    if after is not None and not facets:
+        # relevance <= score, so nothing after the cursor scores below its relevance
+        candidate_filter += " AND bm25(memory_search, ?, ?, ?, ?, ?) >= ?"
+        pool_params += bm25_weights + [after[0]]
+    
+    page_params = [boosts["importance"], boosts["access"], ACCESS_SATURATION,
+                   boosts["recency"], now, RECENCY_HALF_LIFE_DAYS]
+    keyset = ""
+    if after is not None:
+        keyset = "WHERE (relevance, rowid) > (?, ?)"
+        page_params += list(after)
+    page_params += [limit]
+    
+    columns = ["memory_search.content_id", "memory_search.content_type",
+               "memory_search.title", "memory_search.summary", "ranked.relevance", "ranked.rowid"]
+    if highlight:
+        columns[2:4] = ["highlight(memory_search, 2, ?, ?)", "highlight(memory_search, 3, ?, ?)"]
+        page_params += list(markers) * 2
+    if snippet_tokens:
+        columns.append("snippet(memory_search, -1, ?, ?, ?, ?)")
+        page_params += [markers[0], markers[1], SNIPPET_ELLIPSIS, min(snippet_tokens, SNIPPET_MAX_TOKENS)]
+    if hydrate == "section":
+        columns.append("highlight(memory_search, 4, ?, ?)")
+        page_params += list(HYDRATE_MARKERS)
+    page_params += [match]
+    
+    # Facet counts are extra rows over every scored match
+    facet_rows = ""
+    for facet in facets or ():
+        facet_rows += f'''
+             UNION ALL
+             SELECT 2, ?, {facet}, {', '.join(['NULL'] * (len(columns) - 2))}, COUNT(*), NULL
+             FROM scored WHERE {facet} IS NOT NULL GROUP BY {facet}'''
+        page_params.append(facet)
+    
+    sql = '''WITH candidates AS (
+                 SELECT memory_search.rowid AS rowid, bm25(memory_search, ?, ?, ?, ?, ?) AS score{candidate_columns}
+                 FROM memory_search{candidate_join}
+                 WHERE memory_search MATCH ?{candidate_filter}{pool_limit}
+             ), scored AS (
+                 SELECT candidates.rowid AS rowid, candidates.score * (1
+                            + ? * MIN(1.0, MAX(0.0, COALESCE(e.importance_score, m.importance_score, 0.5)))
+                            + ? * COALESCE(m.access_count, 0) / (COALESCE(m.access_count, 0) + ?)
+                            + COALESCE(? / (1 + MAX(0, ? - julianday(COALESCE(e.updated_at, ch.updated_at))) / ?), 0)
+                        ) AS relevance,
+                        {doc}.content_type AS content_type, e.entity_type AS entity_type,
+                        strftime('%Y-%m', COALESCE(e.{time_field}, ch.{time_field})) AS month
+                 FROM candidates{doc_join}
+                 LEFT JOIN entities e ON {doc}.content_type = 'entity' AND e.entity_id = {doc}.content_id
+                 LEFT JOIN chats ch ON {doc}.content_type = 'chat' AND ch.chat_id = {doc}.content_id
+                 LEFT JOIN memory_index m ON m.content_id = {doc}.content_id
+             ), ranked AS (
+                 SELECT rowid, relevance FROM scored
+                 {keyset}
+                 ORDER BY relevance, rowid
+                 LIMIT ?
+             )
+             SELECT 0, {columns}, NULL, NULL
+             FROM ranked
+             JOIN memory_search ON memory_search.rowid = ranked.rowid AND memory_search MATCH ?
+             UNION ALL
+             SELECT 1, {nulls}, MAX(score), COUNT(*) FROM candidates{facet_rows}
+             ORDER BY 1, 6, 7'''
+    sql_parts = {"candidate_join": candidate_join, "candidate_columns": candidate_columns,
+                 "doc": doc, "doc_join": doc_join, "keyset": keyset, "time_field": time_field,
+                 "columns": ', '.join(columns), "nulls": ', '.join(['NULL'] * len(columns)),
+                 "facet_rows": facet_rows}
+    
+    if facets:
+        # Facets count every match, so score all of them; the page is then exact
+        c.execute(sql.format(candidate_filter=candidate_filter, pool_limit="", **sql_parts),
+                  pool_params + page_params)
+        rows = c.fetchall()
+        total = next(row[-1] for row in rows if row[0] == 1)
+        facet_counts = {facet: {} for facet in facets}
+        for row in rows:
+            if row[0] == 2:
+                facet_counts[row[1]][row[2]] = row[-2]
+        page = _search_results(rows, now, snippet_tokens)
+        _attach_parts(c, page, match)
+        if hydrate:
+            _hydrate_results(c, page, hydrate, max_bytes, _marked_content(rows, hydrate, snippet_tokens))
+        if own_conn:
+            conn.close()
+        return {"results": page, "total": total, "facets": facet_counts}
+    
+    # A match outside the pool scores no better than the pool's worst, and its
+    # relevance is at least score * max_boost. If that cannot beat the page's
+    # last item the page is exact; otherwise the second pass takes every match
+    # that still could (all of them if the page came up short).
+    pool = max(SEARCH_RERANK_POOL, limit)
+    c.execute(sql.format(candidate_filter=candidate_filter, pool_limit="\n                 ORDER BY score LIMIT ?",
+                         **sql_parts),
+              pool_params + [pool] + page_params)
+    *rows, (_, *_, worst, pooled) = c.fetchall()
+    if pooled == pool and not (len(rows) == limit and rows[-1][5] <= worst * max_boost):
+        ceiling_filter, ceiling_params = "", []
+        if len(rows) == limit:
+            ceiling_filter = " AND bm25(memory_search, ?, ?, ?, ?, ?) <= ?"
+            ceiling_params = bm25_weights + [rows[-1][5] / max_boost]
+        c.execute(sql.format(candidate_filter=candidate_filter + ceiling_filter, pool_limit="", **sql_parts),
+                  pool_params + ceiling_params + page_params)
+        rows = c.fetchall()[:-1]
+    
+    results = _search_results(rows, now, snippet_tokens)
+    _attach_parts(c, results, match)
+    if fuzzy and not results and cursor is None:
+        results = fuzzy_search_names(query, content_types, limit, conn=conn, since=since, until=until,
+                                     time_field=time_field)
+    if hydrate:
+        _hydrate_results(c, results, hydrate, max_bytes, _marked_content(rows, hydrate, snippet_tokens))
+    
+    if own_conn:
+        conn.close()
+    return results
+
+def _search_results(rows: List[tuple], now: float, snippet_tokens: int) -> List[Dict]:
+    """Result dicts for the page rows (kind 0) of search_memory's query."""
+    results = []
+    for row in rows:
+        if row[0] != 0:
+            continue
+        result = {
+            "content_id": row[1],
+            "content_type": row[2],
+            "title": row[3],
+            "summary": row[4],
+            "relevance": row[5],
+            "cursor": _encode_cursor([row[5], row[6], now])
+        }
+        if snippet_tokens:
+            result["snippet"] = row[7]
+        results.append(result)
     return results
 
-def get_entity(entity_id: str) -> Dict:
+def _attach_parts(c, results: List[Dict], match: str):
+    """Point each entity result at its best-matching section and each chat at its best message.
+    
+    Sets "section" / "message" (index, labels and byte_range) or None. One
+    MATCH per content type over its DOCUMENT_PARTS FTS table, confined to
+    the page's documents through the indexed owner id. Parts rank by match
+    count from highlight(), section headings counting double, then by size:
+    bm25() would count every phrase over the whole table first. A query the
+    table cannot parse (a filter on a memory_search column) leaves them None.
+    """
+    for content_type, key, match_columns in (('entity', 'section', 'heading body'), ('chat', 'message', 'body')):
+        table, id_column, owner, index, labels, fts_table, _ = DOCUMENT_PARTS[content_type]
+        typed = [result for result in results if result["content_type"] == content_type]
+        if not typed:
+            continue
+        for result in typed:
+            result[key] = None
+        ids = ' OR '.join('"{}"'.format(result["content_id"].replace('"', '""')) for result in typed)
+        try:
+            c.execute(f'''SELECT p.{owner}, p.{index}, {", ".join(f"p.{label}" for label in labels)},
+                                 p.byte_start, p.byte_end,
+                                 highlight({fts_table}, 1, ?, ?), highlight({fts_table}, 2, ?, ?)
+                          FROM {fts_table} JOIN {table} p ON p.{id_column} = {fts_table}.rowid
+                          WHERE {fts_table} MATCH ?''',
+                      list(HYDRATE_MARKERS) * 2 + [f'{{{match_columns}}} : ({match}) AND {owner} : ({ids})'])
+            rows = c.fetchall()
+        except sqlite3.OperationalError:
+            continue
+        
+        best = {}
+        for row in rows:
+            *values, start, end, marked_label, marked_body = row
+            # A message before the first turn has no role, and a NULL highlight
+            rank = (-2 * (marked_label or '').count(HYDRATE_MARKERS[0]) - marked_body.count(HYDRATE_MARKERS[0]),
+                    end - start)
+            if values[0] not in best or rank < best[values[0]][0]:
+                part = dict(zip((index,) + labels, values[1:]))
+                part["byte_range"] = [start, end]
+                best[values[0]] = (rank, part)
+        for result in typed:
+            if result["content_id"] in best:
+                result[key] = best[result["content_id"]][1]
+
+def _marked_content(rows: List[tuple], hydrate: Optional[str], snippet_tokens: int) -> Dict[str, str]:
+    """content_id -> indexed content with matches in HYDRATE_MARKERS, for hydrate="section"."""
+    if hydrate != "section":
+        return {}
+    column = 8 if snippet_tokens else 7
+    return {row[1]: row[column] for row in rows if row[0] == 0}
+
+def _densest_match_prefix(marked: Optional[str], window: int) -> Optional[str]:
+    """Plain indexed text before the first match of the `window`-char span holding the most matches."""
+    pieces = (marked or "").split(HYDRATE_MARKERS[0])
+    if len(pieces) < 2:
+        return None
+    plain, starts, position = [], [], 0
+    for i, piece in enumerate(pieces):
+        if i:
+            starts.append(position)
+        piece = piece.replace(HYDRATE_MARKERS[1], "")
+        plain.append(piece)
+        position += len(piece)
+    
+    best, first, low = 0, 0, 0
+    for high, start in enumerate(starts):
+        while start - starts[low] > window:
+            low += 1
+        if high - low + 1 > best:
+            best, first = high - low + 1, starts[low]
+    return "".join(plain)[:first]
+
+def _read_range(f, start: int, length: int) -> tuple:
+    """(text, start, end) of up to `length` bytes of binary file f from `start`, cut to whole UTF-8 characters."""
+    f.seek(start)
+    data = f.read(length)
+    lead = 0
+    while lead < min(3, len(data)) and 0x80 <= data[lead] < 0xC0:
+        lead += 1
+    text = data[lead:].decode('utf-8', errors='ignore')
+    start += lead
+    return text, start, start + len(text.encode('utf-8'))
+
+def _hydrate_file(path: str, prefix: Optional[str], length: int,
+                  byte_range: Optional[List[int]] = None) -> Optional[tuple]:
+    """(text, start, end, range_end) of at most `length` bytes of a file, or None if it is missing.
+    
+    Reads within byte_range (an indexed section), else the whole file. When
+    that is longer than `length` and a prefix (the indexed text before the
+    best match) places the match inside it, the window starts a quarter of
+    `length` before the match; otherwise at the top. A cut window starts and
+    ends on line boundaries where it can, unless `prefix` and `byte_range`
+    are both None (a plain read from the top).
+    """
+    try:
+        with open(path, 'rb') as f:
+            low, high = byte_range or (0, os.fstat(f.fileno()).st_size)
+            start = low
+            if prefix and high - low > length:
+                # The index read the file with universal newlines; it may have \r\n
+                head = f.read(512)
+                newline = head.find(b'\n')
+                crlf = newline > 0 and head[newline - 1:newline] == b'\r'
+                match = len(prefix.encode('utf-8')) + (prefix.count('\n') if crlf else 0)
+                if low <= match < high:
+                    start = min(max(low, match - length // 4), high - length)
+            text, start, end = _read_range(f, start, min(length, high - start))
+    except FileNotFoundError:
+        return None
+    
+    if prefix is not None or byte_range is not None:
+        newline = text.find('\n')
+        if start > low and 0 <= newline < len(text) // 4:
+            start += len(text[:newline + 1].encode('utf-8'))
+            text = text[newline + 1:]
+        newline = text.rfind('\n')
+        if end < high and newline >= len(text) * 3 // 4:
+            text = text[:newline + 1]
+            end = start + len(text.encode('utf-8'))
+    return text.replace('\r\n', '\n'), start, end, high
+
+def _hydrate_results(c, results: List[Dict], mode: str, max_bytes: int, marked: Dict[str, str]):
+    """Attach "content", "byte_range" and "truncated" to results in place, in rank order.
+    
+    "summary" is the stored summary (no file read). "section" gives each
+    result up to HYDRATE_SECTION_BYTES: its matching section or message,
+    else the window around its densest cluster of matches in the indexed
+    text (the top of the file when the match was in the title or summary),
+    read concurrently. "full" reads each file from the start until the
+    budget runs out. "truncated" means the content was cut short.
+    """
+    sources = {}
+    for content_type, table, key in (('chat', 'chats', 'chat_id'), ('entity', 'entities', 'entity_id')):
+        ids = [result["content_id"] for result in results if result["content_type"] == content_type]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            c.execute(f'SELECT {key}, summary, file_path FROM {table} WHERE {key} IN ({",".join("?" * len(chunk))})',
+                      chunk)
+            for content_id, summary, file_path in c.fetchall():
+                sources[(content_type, content_id)] = (summary or "", file_path)
+    
+    remaining = max_bytes
+    sections = []
+    for result in results:
+        result.update({"content": None, "byte_range": None, "truncated": False})
+        source = sources.get((result["content_type"], result["content_id"]))
+        if source is None:
+            continue
+        if remaining <= 0:
+            result["truncated"] = True
+        elif mode == "summary":
+            data = source[0].encode('utf-8')
+            result["content"] = data[:remaining].decode('utf-8', errors='ignore')
+            result["truncated"] = len(data) > remaining
+            remaining -= len(data)
+        elif mode == "section":
+            # Allotted up front so the files can be read concurrently
+            byte_range = (result.get("section") or result.get("message") or {}).get("byte_range")
+            wanted = min(HYDRATE_SECTION_BYTES, byte_range[1] - byte_range[0]) if byte_range else HYDRATE_SECTION_BYTES
+            allotment = min(wanted, remaining)
+            prefix = _densest_match_prefix(marked.get(result["content_id"]), HYDRATE_SECTION_BYTES // 2)
+            sections.append((result, source[1], prefix, allotment, byte_range))
+            remaining -= allotment
+        else:
+            read = _hydrate_file(source[1], None, remaining)
+            if read is not None:
+                text, start, end, size = read
+                result.update({"content": text, "byte_range": [start, end], "truncated": end < size})
+                remaining -= end - start
+    
+    reads = _bounded_map(lambda section: _hydrate_file(*section[1:]), sections,
+                         min(ENTITY_READ_WORKERS, len(sections)), ENTITY_READ_WORKERS * 2)
+    for (result, _, _, allotment, byte_range), read in zip(sections, reads):
+        if read is not None:
+            text, start, end, range_end = read
+            truncated = end < range_end if byte_range else allotment < HYDRATE_SECTION_BYTES and end < range_end
+            result.update({"content": text, "byte_range": [start, end], "truncated": truncated})
+
+def search_many(queries: List[str], limit: int = 20, merge: bool = False, conn=None, **options):
+    """Run several searches on one connection; identical queries run once.
+    
+    Returns {query: results} with `options` passed to every search_memory
+    call; with facets each value is search_memory's {"results", "total",
+    "facets"} dict. merge=True returns {"by_query": ..., "merged": [...]}
+    where "merged" is every hit once, ranked by reciprocal rank fusion,
+    each with the "queries" that found it and its "fusion_score".
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    
+    by_query = {}
+    for query in queries:
+        if query not in by_query:
+            by_query[query] = search_memory(query, limit=limit, conn=conn, **options)
+    
+    if own_conn:
+        conn.close()
+    if not merge:
+        return by_query
+    return {"by_query": by_query, "merged": fuse_results(by_query, limit)}
+
+def fuse_results(by_query: Dict[str, List[Dict]], limit: int = 20) -> List[Dict]:
+    """Merge ranked result lists (or faceted searches' "results") into one by reciprocal rank fusion.
+    
+    bm25 relevance is not comparable across queries, rank is: a hit scores
+    1 / (SEARCH_FUSION_K + rank) per list it is in. Each item keeps the
+    fields from its best-ranked appearance.
+    """
+    fused = {}
+    for query, results in by_query.items():
+        if isinstance(results, dict):
+            results = results["results"]  # a faceted search
+        for rank, result in enumerate(results, 1):
+            key = (result["content_type"], result["content_id"])
+            if key not in fused:
+                fused[key] = {**result, "queries": [], "fusion_score": 0.0, "_best_rank": rank}
+            elif rank < fused[key]["_best_rank"]:
+                fused[key].update({**result, "_best_rank": rank})
+            fused[key]["queries"].append(query)
+            fused[key]["fusion_score"] += 1.0 / (SEARCH_FUSION_K + rank)
+    merged = sorted(fused.values(), key=lambda item: (-item["fusion_score"], item["_best_rank"]))
+    for item in merged:
+        del item["_best_rank"]
+    return merged[:limit]
+
+def _edit_distance(a: str, b: str, max_edits: int) -> int:
+    """Levenshtein distance of a and b, or max_edits + 1 once it must exceed max_edits.
+    
+    Only the band of cells within max_edits of the diagonal is computed.
+    """
+    over = max_edits + 1
+    if abs(len(a) - len(b)) > max_edits:
+        return over
+    previous = [j if j <= max_edits else over for j in range(len(b) + 1)]
+    for i, char in enumerate(a, 1):
+        low, high = max(1, i - max_edits), min(len(b), i + max_edits)
+        current = [i if i <= max_edits else over] + [over] * len(b)
+        for j in range(low, high + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != b[j - 1]))
+        if min(current[low - 1:high + 1]) > max_edits:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+def _allowed_edits(word: str) -> int:
+    """Typos tolerated in one query word: 1 up to 8 characters, 2 from 9."""
+    return 1 if len(word) < 9 else 2
+
+def _word_pieces(word: str) -> List[str]:
+    """Substrings of `word` at least one of which survives its allowed edits intact.
+    
+    k edits touch at most k of k + 1 disjoint pieces (pigeonhole), so words
+    long enough for pieces of 3+ characters need only those. Shorter words
+    fall back to all their trigrams, which a typo usually leaves one of.
+    """
+    count = _allowed_edits(word) + 1
+    if len(word) < 3 * count:
+        return [word[i:i + 3] for i in range(len(word) - 2)]
+    size = len(word) // count
+    return [word[i * size:(i + 1) * size if i < count - 1 else None] for i in range(count)]
+
+def _trigram_phrase(text: str) -> str:
+    """Quote text as one trigram MATCH phrase (matches it as a substring)."""
+    return '"{}"'.format(text.replace('"', '""'))
+
+def fuzzy_search_names(query: str, content_types: List[str] = None, limit: int = 20, conn=None,
+                       since=None, until=None, time_field: str = "updated_at") -> List[Dict]:
+    """Typo-tolerant search over entity names, chat titles and summaries.
+    
+    Two passes over the fuzzy_search trigram index. First the whole query
+    as a substring (mid-word and CJK text, at least 3 characters), best
+    trigram bm25 first. Then, to fill the page, candidates holding the
+    _word_pieces of every query word of 3+ characters (two of them near
+    each other first, then any one), newest first: each is kept if every
+    such word is within _allowed_edits of a word of its name or summary,
+    until the page is full or FUZZY_POOL have been checked. Ranking all
+    candidates by bm25 instead would sort every item sharing a common
+    trigram. Fuzzy hits are ordered by total edits, then bm25.
+    
+    Results are shaped like search_memory's with "match" ("substring" or
+    "fuzzy") and "edits" added; they are a single page, so "cursor" is None.
+    """
+    if time_field not in TIME_FIELDS:
+        raise ValueError(f"time_field must be one of {TIME_FIELDS}")
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    
+    joins = ""
+    filters = ""
+    filter_params = []
+    if content_types:
+        filters += f" AND f.content_type IN ({','.join('?' * len(content_types))})"
+        filter_params += content_types
+    if since is not None or until is not None:
+        joins = '''
+              LEFT JOIN entities e ON f.content_type = 'entity' AND e.entity_id = f.content_id
+              LEFT JOIN chats ch ON f.content_type = 'chat' AND ch.chat_id = f.content_id'''
+        for bound, op in ((since, ">="), (until, "<")):
+            if bound is not None:
+                filters += f" AND COALESCE(e.{time_field}, ch.{time_field}) {op} ?"
+                filter_params.append(_time_bound(bound))
+    sql = f'''SELECT f.rowid, f.content_id, f.content_type, f.name, f.summary, bm25({FUZZY_SEARCH_TABLE})
+              FROM {FUZZY_SEARCH_TABLE} f{joins}
+              WHERE {FUZZY_SEARCH_TABLE} MATCH ?{filters}
+              ORDER BY {{order}}
+              LIMIT ?'''
+    
+    def result(row, match, edits):
+        return {"content_id": row[1], "content_type": row[2], "title": row[3], "summary": row[4],
+                "relevance": row[5], "cursor": None, "match": match, "edits": edits}
+    
+    results = []
+    seen = set()
+    phrase = query.strip()
+    if len(phrase) >= 3:
+        c.execute(sql.format(order=f"bm25({FUZZY_SEARCH_TABLE})"), [_trigram_phrase(phrase)] + filter_params + [limit])
+        for row in c.fetchall():
+            seen.add(row[0])
+            results.append(result(row, "substring", 0))
+    
+    words = [word.lower() for word in re.findall(r'\w+', query) if len(word) >= 3]
+    word_pieces = [(word, _word_pieces(word)) for word in words]
+    stages = []
+    if words:
+        # A single typo spares all but one piece, so a word with 3+ pieces
+        # keeps two within its length of each other: a far more selective
+        # first try than any one piece, which may be a very common trigram
+        stages.append(' AND '.join('({})'.format(' OR '.join(
+            f"NEAR({_trigram_phrase(a)} {_trigram_phrase(b)}, {len(word)})" for a, b in combinations(pieces, 2)))
+            if len(pieces) >= 3 else '({})'.format(' OR '.join(_trigram_phrase(piece) for piece in pieces))
+            for word, pieces in word_pieces))
+        stages.append(' AND '.join('({})'.format(' OR '.join(_trigram_phrase(piece) for piece in pieces))
+                                   for _, pieces in word_pieces))
+        if stages[0] == stages[1]:
+            stages.pop(0)
+    # Only words holding one of the pieces can be within the allowed edits
+    word_patterns = [(word, re.compile(r'\w*(?:{})\w*'.format('|'.join(map(re.escape, pieces)))))
+                     for word, pieces in word_pieces]
+    distances = {}  # (query word, candidate word) -> edits; candidates share most words
+    ranked = []
+    close = 0
+    checked = 0
+    for match in stages:
+        if len(results) + close >= limit or checked >= FUZZY_POOL:
+            break
+        c.execute(sql.format(order="f.rowid DESC"), [match] + filter_params + [FUZZY_POOL - checked + len(seen)])
+        for row in c:
+            if row[0] in seen:
+                continue
+            seen.add(row[0])
+            checked += 1
+            text = f"{row[3] or ''} {row[4] or ''}".lower()
+            edits = 0
+            for word, pattern in word_patterns:
+                allowed = _allowed_edits(word)
+                best = allowed + 1
+                for other in pattern.findall(text):
+                    if (word, other) not in distances:
+                        distances[word, other] = _edit_distance(word, other, allowed)
+                    best = min(best, distances[word, other])
+                if best > allowed:
+                    break
+                edits += best
+            else:
+                ranked.append((edits, row[5], row))
+                # Stop at a full page of hits with one typo per word or better
+                close += edits <= len(words)
+                if len(results) + close >= limit:
+                    break
+    ranked.sort(key=lambda item: item[:2])
+    results.extend(result(row, "fuzzy", edits) for edits, _, row in ranked[:limit - len(results)])
+    
+    if own_conn:
+        conn.close()
+    return results
+
+def _prefix_query(prefix: str) -> Optional[str]:
+    """MATCH expression requiring every word of `prefix` as a word prefix of a name."""
+    words = re.findall(r'\w+', prefix)
+    if not words:
+        return None
+    return 'name : ({})'.format(' '.join('"{}"*'.format(word) for word in words))
+
+def suggest(prefix: str, k: int = 10, content_types: List[str] = None, conn=None) -> List[Dict]:
+    """Entity names and chat titles with a word starting with each word of `prefix`.
+    
+    Typeahead over the names-only name_search index, never the content:
+    "robin" finds "Robinson Crusoe", "jo smi" finds "John Smith". The best
+    k come first by importance (an entity's own score, a chat's from
+    memory_index, 0.5 when neither is set), then by name. Importance tiers
+    are searched from the top down, so a short, common prefix stops after
+    the first tier that fills k instead of ranking every match.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    match = _prefix_query(prefix)
+    
+    type_filter = ""
+    if content_types:
+        type_filter = f"AND content_type IN ({','.join('?' * len(content_types))})"
+    
+    c = conn.cursor()
+    suggestions = []
+    for tier in range(SUGGEST_TIERS - 1, -1, -1):
+        if match is None or len(suggestions) >= k:
+            break
+        c.execute(f'''SELECT content_id, content_type, name, importance FROM {NAME_SEARCH_TABLE}
+                     WHERE {NAME_SEARCH_TABLE} MATCH ? {type_filter}
+                     ORDER BY importance DESC, name
+                     LIMIT ?''',
+                  [f"{match} AND tier : t{tier}"] + list(content_types or []) + [k - len(suggestions)])
+        suggestions.extend({"content_id": row[0], "content_type": row[1], "name": row[2], "importance": row[3]}
+                           for row in c.fetchall())
+    
+    if own_conn:
+        conn.close()
+    return suggestions
+
+class FileCache:
+    """LRU cache of text file contents, capped at max_bytes of file size.
+    
+    An entry is keyed by path and only served while the file's mtime and
+    size still match, so an edit from any process is a miss. Writers in this
+    process also discard() what they change, which covers rewrites inside
+    one mtime tick on coarse-grained filesystems.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> ((mtime_ns, size), content)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def read(self, path) -> Optional[str]:
+        """Contents of the file at `path`, or None if it does not exist."""
+        key = str(path)
+        try:
+            st = os.stat(key)
+            stamp = (st.st_mtime_ns, st.st_size)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == stamp:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+            with open(key, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except FileNotFoundError:
+            self.discard(key)
+            return None
+        # A change between stat and read leaves the old stamp, so the next read misses
+        self._store(key, stamp, content)
+        return content
+    
+    def _store(self, key: str, stamp: tuple, content: str):
+        with self._lock:
+            self._drop(key)
+            if self.max_bytes <= 0 or stamp[1] > self.max_bytes:
+                return
+            self._entries[key] = (stamp, content)
+            self._bytes += stamp[1]
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+    
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[0][1]
+    
+    def discard(self, path):
+        """Forget one file."""
+        with self._lock:
+            self._drop(str(path))
+    
+    def resize(self, max_bytes: int):
+        """Change the cap, evicting least recently used files to fit."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and (max_bytes <= 0 or self._bytes > max_bytes):
+                self._drop(next(iter(self._entries)))
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"files": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+_entity_files = FileCache(ENTITY_CACHE_BYTES)
+
+def set_entity_cache_limit(max_bytes: int) -> Dict:
+    """Cap the entity file cache at max_bytes (0 empties and disables it)."""
+    _entity_files.resize(max_bytes)
+    return _entity_files.stats()
+
+def entity_cache_stats() -> Dict:
+    """Files and bytes held by the entity file cache, its cap, hits and misses."""
+    return _entity_files.stats()
+
+ENTITY_COLUMNS = '''entity_id, entity_type, name, summary, file_path,
+                    importance_score, created_at, updated_at'''
+
+def get_entity(entity_id: str, conn=None) -> Dict:
     """Get full entity details."""
-    conn = get_connection()
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     c = conn.cursor()
     
-    c.execute('''SELECT entity_id, entity_type, name, summary, file_path, 
-                        importance_score, created_at, updated_at
-                 FROM entities WHERE entity_id = ?''', (entity_id,))
+    c.execute(f'SELECT {ENTITY_COLUMNS} FROM entities WHERE entity_id = ?', (entity_id,))
     
     row = c.fetchone()
-    conn.close()
+    if own_conn:
+        conn.close()
     
     if not row:
         return {"status": "error", "message": "Entity not found"}
+    return _entity_from_row(row)
+
+def get_entities(entity_ids: List[str], conn=None, workers: int = ENTITY_READ_WORKERS) -> Dict[str, Dict]:
+    """get_entity for many ids: one query for the rows, files read concurrently.
+    
+    Returns {entity_id: entity} in the order given, unknown ids mapped to the
+    error get_entity returns. Files come from the entity file cache when
+    unchanged, otherwise up to `workers` are read at once.
+    """
+    ids = list(dict.fromkeys(entity_ids))
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
     
-    file_path = Path(row[4])
-    content = file_path.read_text(encoding='utf-8') if file_path.exists() else ""
+    rows = []
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        c.execute(f'SELECT {ENTITY_COLUMNS} FROM entities WHERE entity_id IN ({",".join("?" * len(chunk))})', chunk)
+        rows += c.fetchall()
+    if own_conn:
+        conn.close()
+    
+    found = {entity["entity_id"]: entity
+             for entity in _bounded_map(_entity_from_row, rows, min(workers, len(rows)), workers * 2)}
+    return {entity_id: found.get(entity_id, {"status": "error", "message": "Entity not found"})
+            for entity_id in ids}
+
+def _entity_from_row(row) -> Dict:
+    """Entity dict for an ENTITY_COLUMNS row, with its file's content (runs on a worker thread)."""
+    content = _entity_files.read(row[4])
     
     return {
         "entity_id": row[0],
@@ -374,92 +2693,984 @@ def get_entity(entity_id: str) -> Dict:
         "importance": row[5],
         "created_at": row[6],
         "updated_at": row[7],
-        "content": content
+        "content": content or "",
+        "file_missing": content is None
     }
 
-# ==================== WEEKLY MAINTENANCE ====================
+def _list_page(conn, table: str, key: str, columns: str, limit: int, cursor: Optional[str],
+               since, until, order_by: str, filters: List[tuple]) -> List[tuple]:
+    """One keyset page of `table`, newest `order_by` first, as (row, cursor) pairs."""
+    if order_by not in TIME_FIELDS:
+        raise ValueError(f"order_by must be one of {TIME_FIELDS}")
+    where = [f"{column} = ?" for column, _ in filters]
+    params = [value for _, value in filters]
+    if since is not None:
+        where.append(f"{order_by} >= ?")
+        params.append(_time_bound(since))
+    if until is not None:
+        where.append(f"{order_by} < ?")
+        params.append(_time_bound(until))
+    if cursor is not None:
+        where.append(f"({order_by}, {key}) < (?, ?)")
+        params += _decode_cursor(cursor, 2)
+    
+    c = conn.cursor()
+    # Served by idx_<table>_<order_by>_id: a seek to the cursor, then `limit` rows
+    c.execute(f'''SELECT {columns}, {order_by}, {key} FROM {table}
+                  {"WHERE " + " AND ".join(where) if where else ""}
+                  ORDER BY {order_by} DESC, {key} DESC
+                  LIMIT ?''', params + [limit])
+    return [(row, _encode_cursor([row[-2], row[-1]])) for row in c.fetchall()]
 
-def weekly_maintenance() -> Dict:
-    """Perform weekly curation and maintenance."""
-    start_time = datetime.now()
+def list_entities(limit: int = 20, cursor: Optional[str] = None, since=None, until=None,
+                  order_by: str = "updated_at", entity_type: Optional[str] = None, conn=None) -> List[Dict]:
+    """Entities, most recent first; pass the last item's "cursor" back for the next page."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    
+    page = _list_page(conn, "entities", "entity_id",
+                      "entity_id, name, entity_type, summary, importance_score, created_at, updated_at",
+                      limit, cursor, since, until, order_by,
+                      [("entity_type", entity_type)] if entity_type else [])
+    entities = []
+    for row, row_cursor in page:
+        entities.append({
+            "entity_id": row[0],
+            "name": row[1],
+            "type": row[2],
+            "summary": row[3],
+            "importance": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+            "cursor": row_cursor
+        })
+    
+    if own_conn:
+        conn.close()
+    return entities
+
+def list_chats(limit: int = 20, cursor: Optional[str] = None, since=None, until=None,
+               order_by: str = "updated_at", conn=None) -> List[Dict]:
+    """Chats, most recent first; pass the last item's "cursor" back for the next page."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    
+    page = _list_page(conn, "chats", "chat_id", "chat_id, title, summary, url, created_at, updated_at",
+                      limit, cursor, since, until, order_by, [])
+    chats = []
+    for row, row_cursor in page:
+        chats.append({
+            "chat_id": row[0],
+            "title": row[1],
+            "summary": row[2],
+            "url": row[3],
+            "created_at": row[4],
+            "updated_at": row[5],
+            "cursor": row_cursor
+        })
+    
+    if own_conn:
+        conn.close()
+    return chats
+
+# ==================== ORPHAN RECONCILIATION ====================
+
+ORPHAN_ACTIONS = ("report", "quarantine", "delete")
+# store_chat/create_entity write the file before their row commits, so a file
+# this new without a row may just be mid-write
+ORPHAN_GRACE_SECONDS = 300
+
+def _normalize_path(path: str) -> str:
+    """Normalize a stored or scanned path so the two can be compared as strings."""
+    return os.path.normcase(os.path.abspath(path))
+
+def _scan_files(root: Path):
+    """Yield every regular file under root using os.scandir (no per-file stat calls)."""
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
+
+def _quarantine_file(path: str) -> str:
+    """Move a file under QUARANTINE_DIR, keeping its path relative to MEMORY_ROOT."""
+    try:
+        relative = Path(path).relative_to(MEMORY_ROOT)
+    except ValueError:
+        relative = Path(Path(path).name)
+    target = QUARANTINE_DIR / relative
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(path, target)
+    return str(target)
+
+def reconcile_orphans(action: str = "report", conn=None) -> Dict:
+    """Diff chats/ and entities/ on disk against the file_path columns.
+    
+    Orphan files have no database row (files younger than
+    ORPHAN_GRACE_SECONDS are left out); orphan rows point at a missing file.
+    With action="quarantine" orphan files are moved under quarantine/ and
+    orphan rows are appended to quarantine/orphan_rows.jsonl before removal;
+    action="delete" removes both outright, with the rows' search, access and
+    index-queue entries. If every row is an orphan (file_path is absolute, so
+    a moved storage root looks like that) nothing is removed and the status
+    is "refused". On a passed-in connection the caller commits.
+    """
+    if action not in ORPHAN_ACTIONS:
+        return {"status": "error", "message": f"Unknown action: {action}"}
+    
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    result = _reconcile_orphans(conn, action)
+    if own_conn:
+        conn.commit()
+        conn.close()
+    return result
+
+def _reconcile_orphans(conn, action: str) -> Dict:
+    """reconcile_orphans() body; does not commit."""
+    c = conn.cursor()
+    known = {}
+    c.execute("""SELECT chat_id, 'chat', file_path FROM chats
+                 UNION ALL
+                 SELECT entity_id, 'entity', file_path FROM entities""")
+    for content_id, content_type, file_path in c:
+        known[_normalize_path(file_path)] = (content_id, content_type, file_path)
+    
+    on_disk = {}
+    for root in (CHATS_DIR, ENTITIES_DIR):
+        for path in _scan_files(root):
+            on_disk[_normalize_path(path)] = path
+    
+    orphan_files = []
+    recent_files = 0
+    for key in on_disk.keys() - known.keys():
+        try:
+            age = time.time() - os.stat(on_disk[key]).st_mtime
+        except FileNotFoundError:
+            continue
+        if age < ORPHAN_GRACE_SECONDS:
+            recent_files += 1
+        else:
+            orphan_files.append(on_disk[key])
+    orphan_rows = [known[key] for key in known.keys() - on_disk.keys()]
+    
+    result = {
+        "status": "complete",
+        "action": action,
+        "files_scanned": len(on_disk),
+        "rows_scanned": len(known),
+        "recent_files_skipped": recent_files,
+        "orphan_files": sorted(orphan_files),
+        "orphan_rows": sorted(row[0] for row in orphan_rows)
+    }
+    if action != "report" and orphan_rows and len(orphan_rows) == len(known):
+        result["status"] = "refused"
+        result["message"] = (f"Every row points at a missing file (e.g. {orphan_rows[0][2]}); "
+                             f"was the storage root moved? Nothing was removed.")
+        return result
+    
+    if action == "quarantine":
+        for path in orphan_files:
+            _quarantine_file(path)
+        if orphan_rows:
+            QUARANTINE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(QUARANTINE_DIR / "orphan_rows.jsonl", 'a', encoding='utf-8') as f:
+                for content_id, content_type, file_path in orphan_rows:
+                    f.write(json.dumps({
+                        "content_id": content_id,
+                        "content_type": content_type,
+                        "file_path": file_path,
+                        "quarantined_at": datetime.now().isoformat()
+                    }) + "\n")
+    elif action == "delete":
+        for path in orphan_files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    
+    if action != "report" and orphan_rows:
+        chat_ids = [(row[0],) for row in orphan_rows if row[1] == 'chat']
+        entity_ids = [(row[0],) for row in orphan_rows if row[1] == 'entity']
+        c.executemany('DELETE FROM chats WHERE chat_id = ?', chat_ids)
+        c.executemany('DELETE FROM entities WHERE entity_id = ?', entity_ids)
+        c.executemany('DELETE FROM relations WHERE from_entity_id = ? OR to_entity_id = ?',
+                      [(eid, eid) for (eid,) in entity_ids])
+        c.executemany(f'''DELETE FROM {SEARCH_TABLE}
+                          WHERE rowid IN (SELECT rowid FROM {SEARCH_TABLE}
+                                          WHERE {SEARCH_TABLE} MATCH ? AND content_id = ?)''',
+                      [(fts_id_query(row[0]), row[0]) for row in orphan_rows])
+        c.executemany('DELETE FROM memory_index WHERE content_id = ?', [(row[0],) for row in orphan_rows])
+        # index_queue has no content_id index: one pass over it for all of them
+        c.execute('DELETE FROM index_queue WHERE content_id IN (SELECT value FROM json_each(?))',
+                  (json.dumps([row[0] for row in orphan_rows]),))
+    
+    return result
+
+# ==================== REINDEX PIPELINE ====================
+
+def _iter_index_sources(conn, after: Optional[tuple] = None):
+    """Stream (content_type, content_id, title, summary, file_path) in checkpoint order.
+    
+    Chats come before entities and each is walked in primary-key order, so
+    `after` (a (content_type, content_id) checkpoint) resumes without a sort.
+    """
+    after_type, after_id = after or ('', '')
+    sources = [
+        ('chat', 'SELECT chat_id, title, summary, file_path FROM chats WHERE chat_id > ? ORDER BY chat_id'),
+        ('entity', 'SELECT entity_id, name, summary, file_path FROM entities WHERE entity_id > ? ORDER BY entity_id'),
+    ]
+    for content_type, sql in sources:
+        if content_type < after_type:
+            continue
+        c = conn.cursor()
+        c.execute(sql, (after_id if content_type == after_type else '',))
+        for content_id, title, summary, file_path in c:
+            yield (content_type, content_id, title, summary, file_path)
+
+def _bounded_map(func, items, workers: int, window: int):
+    """Map func over items on a thread pool, keeping at most `window` in flight, in order."""
+    if workers <= 1:
+        yield from map(func, items)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(contextvars.copy_context().run, func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def reindex_memory_search(conn, workers: int = REINDEX_WORKERS, batch_size: int = REINDEX_BATCH_SIZE,
+                          progress: Optional[Callable[[int, int], None]] = None,
+                          resume_after: Optional[tuple] = None,
+                          on_batch: Optional[Callable[[tuple, int], None]] = None,
+                          should_stop: Optional[Callable[[], bool]] = None,
+                          table: str = SEARCH_TABLE) -> Dict:
+    """Insert every chat and entity after `resume_after` into `table` (memory_search by default).
+    
+    Rows are streamed from the database, files are read on a thread pool so
+    slow-drive latency overlaps, and inserts go out in fixed-size batches.
+    Memory use is bounded by the batch size and the in-flight window, not by
+    the corpus size. After each batch, on_batch(checkpoint, indexed) receives
+    the last (content_type, content_id) written, and should_stop() may end
+    the pass early. Files that cannot be read are left out and counted as
+    skipped. Each document's DOCUMENT_PARTS (entity sections, chat messages)
+    are replaced in their live tables from the same read, and a complete
+    pass drops parts of documents that no longer exist. Does not commit;
+    the caller owns the transaction.
+    """
+    c = conn.cursor()
+    c.execute('SELECT (SELECT COUNT(*) FROM chats) + (SELECT COUNT(*) FROM entities)')
+    total = c.fetchone()[0]
+    
+    done = 0
+    indexed = 0
+    skipped = 0
+    batch = []
+    loaded = []
+    parts = {content_type: [] for content_type in DOCUMENT_PARTS}
+    hashes = []
+    checkpoint = resume_after
+    
+    def flush():
+        c.executemany(f'''INSERT INTO {table} (content_id, content_type, title, summary, content)
+                          VALUES (?, ?, ?, ?, ?)''', batch)
+        for content_type, content_id in loaded:
+            _delete_document_parts(c, content_type, content_id)
+        for content_type, document_parts in parts.items():
+            _insert_document_parts(c, content_type, document_parts)
+            document_parts.clear()
+        _store_content_hashes(c, hashes)
+        batch.clear()
+        loaded.clear()
+        hashes.clear()
+        if on_batch:
+            on_batch(checkpoint, indexed)
+    
+    rows = _bounded_map(_load_queued_row, _iter_index_sources(conn, resume_after),
+                        workers=workers, window=max(workers * 4, batch_size))
+    for source, row, document_parts, digest, error in rows:
+        done += 1
+        checkpoint = (source[0], source[1])
+        if error is not None:
+            skipped += 1
+        else:
+            loaded.append(checkpoint)
+            hashes.append(checkpoint + (digest,))
+            parts[source[0]] += [(source[1], i) + part for i, part in enumerate(document_parts)]
+            if row is not None:
+                batch.append(row)
+                indexed += 1
+        if done % batch_size == 0:
+            flush()
+            if progress:
+                progress(done, total)
+            if should_stop and should_stop():
+                return {"indexed": indexed, "skipped": skipped, "complete": False, "checkpoint": checkpoint}
+    flush()
+    if progress and (done == 0 or done % batch_size):
+        progress(done, total)
+    
+    documents = {'chat': 'SELECT chat_id FROM chats', 'entity': 'SELECT entity_id FROM entities'}
+    for content_type, (part_table, id_column, owner, _, _, fts_table, _) in DOCUMENT_PARTS.items():
+        owners = documents[content_type]
+        c.execute(f'''DELETE FROM {fts_table} WHERE rowid IN
+                          (SELECT {id_column} FROM {part_table} WHERE {owner} NOT IN ({owners}))''')
+        c.execute(f'DELETE FROM {part_table} WHERE {owner} NOT IN ({owners})')
+    
+    return {"indexed": indexed, "skipped": skipped, "complete": True, "checkpoint": checkpoint}
+
+# ==================== INDEX QUEUE ====================
+
+def _enqueue_index(c, content_type: str, content_id: str) -> int:
+    """Queue a (re)index of one document in the caller's transaction; returns the job id."""
+    c.execute('INSERT INTO index_queue (content_type, content_id) VALUES (?, ?)', (content_type, content_id))
+    return c.lastrowid
+
+def _lookup_index_sources(conn, keys) -> tuple:
+    """({key: (content_type, content_id, title, summary, file_path)}, {key: content_hash}) for each
+    (type, id) key that still exists."""
+    c = conn.cursor()
+    found = {}
+    hashes = {}
+    for content_type, sql in (('chat', '''SELECT chat_id, title, summary, file_path, content_hash
+                                          FROM chats WHERE chat_id IN ({})'''),
+                              ('entity', '''SELECT entity_id, name, summary, file_path, content_hash
+                                            FROM entities WHERE entity_id IN ({})''')):
+        ids = [content_id for kind, content_id in keys if kind == content_type]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            c.execute(sql.format(','.join('?' * len(chunk))), chunk)
+            for content_id, title, summary, file_path, content_hash in c.fetchall():
+                found[(content_type, content_id)] = (content_type, content_id, title, summary, file_path)
+                hashes[(content_type, content_id)] = content_hash
+    return found, hashes
+
+def _store_content_hashes(c, hashes: List[tuple]):
+    """Record (content_type, content_id, content_hash) of what was just indexed."""
+    for content_type, table, id_column in (('chat', 'chats', 'chat_id'), ('entity', 'entities', 'entity_id')):
+        c.executemany(f'UPDATE {table} SET content_hash = ? WHERE {id_column} = ?',
+                      [(digest, content_id) for kind, content_id, digest in hashes if kind == content_type])
+
+# Parts documents are indexed in besides memory_search, by content type: their
+# table, its id, owner and index columns and labels, the FTS table over them
+# (rowid = part id; columns owner, first label, body) and how files split
+DOCUMENT_PARTS = {
+    'entity': ('entity_sections', 'section_id', 'entity_id', 'section_idx', ('heading',), SECTION_SEARCH_TABLE,
+               _split_sections),
+    'chat': ('chat_messages', 'message_id', 'chat_id', 'message_idx', ('role', 'timestamp'), MESSAGE_SEARCH_TABLE,
+             _split_messages),
+}
+
+def _load_document_row(source) -> tuple:
+    """(memory_search row, [(*labels, start, end, body) of each part], content hash) of a source row.
+    
+    All from one read of the file; the row is None if the file is gone.
+    """
+    content_type, content_id, title, summary, file_path = source
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None, [], None
+    text = data.decode('utf-8')
+    # memory_search gets what a text-mode read of the prefix would
+    content = text.replace('\r\n', '\n').replace('\r', '\n')[:FTS_CONTENT_LIMIT]
+    parts = [part + (data[part[-2]:part[-1]].decode('utf-8')[:FTS_CONTENT_LIMIT],)
+             for part in DOCUMENT_PARTS[content_type][6](data)]
+    digest = calculate_hash(f"{title}\0{summary or ''}\0{text}")
+    return (content_id, content_type, title, summary, content), parts, digest
+
+def _load_queued_row(source) -> tuple:
+    """(source, row, parts, content_hash, error): an unreadable file is reported instead of raised
+    (runs on a worker thread)."""
+    try:
+        return (source,) + _load_document_row(source) + (None,)
+    except (OSError, UnicodeDecodeError) as e:
+        return source, None, [], None, str(e)
+
+def _delete_document_parts(c, content_type: str, content_id: str):
+    table, id_column, owner, _, _, fts_table, _ = DOCUMENT_PARTS[content_type]
+    c.execute(f'''DELETE FROM {fts_table} WHERE rowid IN
+                      (SELECT {id_column} FROM {table} WHERE {owner} = ?)''', (content_id,))
+    c.execute(f'DELETE FROM {table} WHERE {owner} = ?', (content_id,))
+
+def _insert_document_parts(c, content_type: str, parts: List[tuple]):
+    """Insert (owner, index, *labels, start, end, body) rows and their FTS rows.
+    
+    One document's parts get consecutive ids, so its FTS rows sit together.
+    """
+    table, id_column, owner, index, labels, fts_table, _ = DOCUMENT_PARTS[content_type]
+    if not parts:
+        return
+    c.execute(f'SELECT COALESCE(MAX({id_column}), 0) FROM {table}')
+    first_id = c.fetchone()[0] + 1
+    columns = (id_column, owner, index) + labels + ('byte_start', 'byte_end')
+    c.executemany(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+                  [(first_id + n,) + part[:-1] for n, part in enumerate(parts)])
+    c.executemany(f'INSERT INTO {fts_table} (rowid, {owner}, {labels[0]}, body) VALUES (?, ?, ?, ?)',
+                  [(first_id + n, part[0], part[2], part[-1]) for n, part in enumerate(parts)])
+
+def process_index_queue(conn, batch_size: int = REINDEX_BATCH_SIZE, workers: int = REINDEX_WORKERS) -> Dict:
+    """Index the oldest batch of queued jobs into memory_search and commit.
+    
+    Several jobs for the same document collapse into one, and whatever is in
+    the file now is what gets indexed, so replaying a job is harmless. Its
+    DOCUMENT_PARTS (entity sections, chat messages) are replaced in the same
+    transaction. Files are hashed here, off the write path: a document whose
+    title, summary and file hash to its stored content_hash is unchanged
+    and its job is dropped without touching the indexes. A document that
+    was deleted just loses its search rows. A file that cannot be read keeps
+    its job, with the error, until INDEX_MAX_ATTEMPTS.
+    """
+    c = conn.cursor()
+    c.execute('''SELECT job_id, content_type, content_id FROM index_queue
+                 WHERE attempts < ? ORDER BY job_id LIMIT ?''', (INDEX_MAX_ATTEMPTS, batch_size))
+    jobs = c.fetchall()
+    if not jobs:
+        return {"processed": 0, "indexed": 0, "unchanged": 0, "failed": 0}
+    
+    job_ids = {}
+    for job_id, content_type, content_id in jobs:
+        job_ids.setdefault((content_type, content_id), []).append(job_id)
+    sources, stored_hashes = _lookup_index_sources(conn, job_ids)
+    loaded = list(_bounded_map(_load_queued_row, sources.values(), workers=workers, window=workers * 4))
+    
+    done = [key for key in job_ids if key not in sources]
+    unchanged = []
+    rows = []
+    parts = {content_type: [] for content_type in DOCUMENT_PARTS}
+    hashes = []
+    failures = []
+    for source, row, document_parts, digest, error in loaded:
+        key = (source[0], source[1])
+        if error is not None:
+            failures.append((error, key))
+            continue
+        if digest is not None and digest == stored_hashes[key]:
+            unchanged.append(key)
+            continue
+        done.append(key)
+        hashes.append(key + (digest,))
+        if row is not None:
+            rows.append(row)
+        parts[source[0]] += [(source[1], i) + part for i, part in enumerate(document_parts)]
+    
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for content_type, content_id in done:
+            c.execute(f'''DELETE FROM {SEARCH_TABLE}
+                          WHERE rowid IN (SELECT rowid FROM {SEARCH_TABLE}
+                                          WHERE {SEARCH_TABLE} MATCH ? AND content_id = ?)''',
+                      (fts_id_query(content_id), content_id))
+            _delete_document_parts(c, content_type, content_id)
+        c.executemany(f'''INSERT INTO {SEARCH_TABLE} (content_id, content_type, title, summary, content)
+                          VALUES (?, ?, ?, ?, ?)''', rows)
+        for content_type, document_parts in parts.items():
+            _insert_document_parts(c, content_type, document_parts)
+        _store_content_hashes(c, hashes)
+        c.executemany('DELETE FROM index_queue WHERE job_id = ?',
+                      [(job_id,) for key in done + unchanged for job_id in job_ids[key]])
+        c.executemany('UPDATE index_queue SET attempts = attempts + 1, last_error = ? WHERE job_id = ?',
+                      [(error, job_id) for error, key in failures for job_id in job_ids[key]])
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    
+    return {"processed": len(jobs), "indexed": len(rows), "unchanged": len(unchanged), "failed": len(failures)}
+
+def index_status(conn=None) -> Dict:
+    """Freshness of memory_search: every job at or below `watermark` has been indexed."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    c = conn.cursor()
+    
+    c.execute('''SELECT MIN(job_id), MIN(enqueued_at), COUNT(*) FROM index_queue WHERE attempts < ?''',
+              (INDEX_MAX_ATTEMPTS,))
+    oldest_id, oldest_at, pending = c.fetchone()
+    c.execute('SELECT COUNT(*) FROM index_queue WHERE attempts >= ?', (INDEX_MAX_ATTEMPTS,))
+    failed = c.fetchone()[0]
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'index_queue'")
+    last = c.fetchone()
+    
+    if own_conn:
+        conn.close()
+    return {
+        "watermark": oldest_id - 1 if oldest_id is not None else (last[0] if last else 0),
+        "pending": pending,
+        "failed": failed,
+        "oldest_pending_at": oldest_at
+    }
+
+def wait_indexed(job_id: Optional[int] = None, timeout: Optional[float] = None) -> Dict:
+    """Block until job `job_id` (default: everything queued so far) is searchable.
+    
+    Waits on the background worker when this process runs one; otherwise
+    drains the queue itself, so read-after-write works from any caller.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
     conn = get_connection()
     c = conn.cursor()
+    if job_id is None:
+        c.execute('SELECT MAX(job_id) FROM index_queue')
+        job_id = c.fetchone()[0] or 0
+    
+    while True:
+        c.execute('SELECT COUNT(*) FROM index_queue WHERE job_id <= ? AND attempts < ?',
+                  (job_id, INDEX_MAX_ATTEMPTS))
+        pending = c.fetchone()[0]
+        if not pending:
+            c.execute('SELECT COUNT(*) FROM index_queue WHERE job_id <= ?', (job_id,))
+            failed = c.fetchone()[0]
+            conn.close()
+            return {"status": "indexed", "job_id": job_id, "failed": failed}
+        if deadline is not None and time.monotonic() >= deadline:
+            conn.close()
+            return {"status": "timeout", "job_id": job_id, "pending": pending}
+        
+        worker = _index_worker
+        if worker is not None and worker.is_running():
+            worker.wake()
+            time.sleep(0.01)
+        else:
+            process_index_queue(conn)
+
+class IndexWorker:
+    """Background thread that drains index_queue.
+    
+    Woken whenever this process queues a job, and otherwise polls every
+    INDEX_WORKER_POLL_SECONDS so jobs queued by other processes (or left over
+    from a crash) are picked up too.
+    """
+    
+    def __init__(self, poll_seconds: float = INDEX_WORKER_POLL_SECONDS,
+                 batch_size: int = REINDEX_BATCH_SIZE, workers: int = REINDEX_WORKERS):
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.workers = workers
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="index-worker", daemon=True)
+        self._thread.start()
+    
+    def is_running(self) -> bool:
+        return self._thread.is_alive() and not self._stopping
+    
+    def wake(self):
+        self._wake.set()
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the thread, then drain what is still queued on the calling thread."""
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+        
+        # At interpreter exit the thread pools are already closed, so finish without one
+        conn = get_connection()
+        try:
+            while process_index_queue(conn, self.batch_size, workers=1)["processed"]:
+                pass
+        except sqlite3.Error:
+            pass  # still queued; the next worker picks it up
+        finally:
+            conn.close()
+    
+    def _run(self):
+        conn = get_connection()
+        try:
+            while True:
+                self._wake.clear()
+                try:
+                    processed = True
+                    while processed:
+                        with _maintenance_lock:
+                            processed = process_index_queue(conn, self.batch_size, self.workers)["processed"]
+                except sqlite3.Error:
+                    pass  # e.g. locked by a long writer; the jobs stay queued for the next pass
+                except RuntimeError:
+                    return  # thread pools refuse work once the interpreter is exiting; stop() finishes
+                if self._stopping:
+                    return
+                self._wake.wait(self.poll_seconds)
+        finally:
+            conn.close()
+
+_index_worker = None
+_index_worker_lock = threading.Lock()
+
+def _notify_index_worker():
+    """Start (or wake) this process's index worker after jobs were committed."""
+    global _index_worker
+    if not INDEX_WORKER_ENABLED:
+        return
+    with _index_worker_lock:
+        if _index_worker is None:
+            _index_worker = IndexWorker()
+            atexit.register(_index_worker.stop)
+    _index_worker.wake()
+
+# ==================== ONLINE FTS REBUILD ====================
+
+def _table_exists(conn, table: str) -> bool:
+    """Check sqlite_master for a table."""
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return c.fetchone() is not None
+
+def _live_tokenize(conn) -> str:
+    """Read the tokenizer the live memory_search table was created with."""
+    c = conn.cursor()
+    c.execute("SELECT sql FROM sqlite_master WHERE name = ?", (SEARCH_TABLE,))
+    row = c.fetchone()
+    match = re.search(r"tokenize\s*=\s*'([^']*)'", row[0]) if row else None
+    return match.group(1) if match else "unicode61"
+
+def start_shadow_search_table(conn, tokenize: Optional[str] = None) -> str:
+    """Create an empty shadow FTS table and return the database time the rebuild started.
     
-    stats = {
-        "processed": 0,
-        "deleted": 0,
-        "updated": 0
+    The shadow keeps the live table's tokenizer unless `tokenize` overrides it.
+    """
+    conn.execute(f'DROP TABLE IF EXISTS {SHADOW_SEARCH_TABLE}')
+    create_search_table(conn, SHADOW_SEARCH_TABLE, tokenize or _live_tokenize(conn))
+    c = conn.cursor()
+    c.execute('SELECT CURRENT_TIMESTAMP')
+    started_at = c.fetchone()[0]
+    conn.commit()
+    return started_at
+
+def _load_changed_since(conn, since: str, workers: int = REINDEX_WORKERS) -> Dict[tuple, tuple]:
+    """{(content_type, content_id): _load_queued_row(...)} for everything stored at or after `since`."""
+    c = conn.cursor()
+    c.execute("""SELECT 'chat', chat_id, title, summary, file_path FROM chats WHERE updated_at >= ?
+                 UNION ALL
+                 SELECT 'entity', entity_id, name, summary, file_path FROM entities WHERE updated_at >= ?""",
+              (since, since))
+    sources = c.fetchall()
+    return {(loaded[0][0], loaded[0][1]): loaded
+            for loaded in _bounded_map(_load_queued_row, sources, workers=workers, window=workers * 4)}
+
+def _catch_up_shadow(c, loaded: Dict[tuple, tuple]) -> int:
+    """Replace the shadow table's rows, and the live parts and content hashes, of loaded documents.
+    
+    Files were read beforehand, so this only writes. One that could not be
+    read keeps what the rebuild gave it; returns how many were replaced.
+    """
+    caught_up = 0
+    for (content_type, content_id), (source, row, document_parts, digest, error) in loaded.items():
+        if error is not None:
+            continue
+        c.execute(f'''DELETE FROM {SHADOW_SEARCH_TABLE}
+                      WHERE rowid IN (SELECT rowid FROM {SHADOW_SEARCH_TABLE}
+                                      WHERE {SHADOW_SEARCH_TABLE} MATCH ? AND content_id = ?)''',
+                  (fts_id_query(content_id), content_id))
+        _delete_document_parts(c, content_type, content_id)
+        if row is not None:
+            c.execute(f'''INSERT INTO {SHADOW_SEARCH_TABLE} (content_id, content_type, title, summary, content)
+                          VALUES (?, ?, ?, ?, ?)''', row)
+        _insert_document_parts(c, content_type, [(content_id, i) + part for i, part in enumerate(document_parts)])
+        _store_content_hashes(c, [(content_type, content_id, digest)])
+        caught_up += 1
+    return caught_up
+
+def swap_search_table(conn, since: str, expected_rows: Optional[int] = None,
+                      workers: int = REINDEX_WORKERS) -> Dict:
+    """Integrity-check the shadow FTS table and swap it in for memory_search.
+    
+    Files of items stored since `since` are read before the write lock is
+    taken; writers are held off with BEGIN IMMEDIATE only while those are
+    written to the shadow (plus any stored during that read) and for the
+    two renames. Readers keep using the live table until commit. The
+    retired table is dropped afterwards in its own transaction. On a failed
+    check the live table is left untouched.
+    """
+    conn.commit()
+    c = conn.cursor()
+    try:
+        c.execute(f"INSERT INTO {SHADOW_SEARCH_TABLE}({SHADOW_SEARCH_TABLE}) VALUES('integrity-check')")
+    except sqlite3.DatabaseError as e:
+        conn.rollback()
+        return {"status": "error", "message": f"Shadow index failed integrity check: {e}"}
+    
+    if expected_rows is not None:
+        c.execute(f'SELECT COUNT(*) FROM {SHADOW_SEARCH_TABLE}')
+        actual_rows = c.fetchone()[0]
+        if actual_rows != expected_rows:
+            conn.rollback()
+            return {"status": "error",
+                    "message": f"Shadow index has {actual_rows} rows, expected {expected_rows}"}
+    c.execute('SELECT CURRENT_TIMESTAMP')
+    loaded_at = c.fetchone()[0]
+    conn.commit()
+    loaded = _load_changed_since(conn, since, workers)
+    
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        loaded.update(_load_changed_since(conn, loaded_at, workers=1))
+        caught_up = _catch_up_shadow(c, loaded)
+        c.execute(f'DROP TABLE IF EXISTS {RETIRED_SEARCH_TABLE}')
+        c.execute(f'ALTER TABLE {SEARCH_TABLE} RENAME TO {RETIRED_SEARCH_TABLE}')
+        c.execute(f'ALTER TABLE {SHADOW_SEARCH_TABLE} RENAME TO {SEARCH_TABLE}')
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    
+    c.execute(f'DROP TABLE IF EXISTS {RETIRED_SEARCH_TABLE}')
+    conn.commit()
+    return {"status": "swapped", "caught_up": caught_up}
+
+def rebuild_memory_search(workers: int = REINDEX_WORKERS, batch_size: int = REINDEX_BATCH_SIZE,
+                          progress: Optional[Callable[[int, int], None]] = None,
+                          tokenize: Optional[str] = None) -> Dict:
+    """Rebuild memory_search from scratch without taking search offline.
+    
+    The new index is filled in a shadow table, committed batch by batch, and
+    swapped in by swap_search_table() once it passes an integrity check.
+    Entity sections and chat messages are rebuilt in place along the way.
+    """
+    with _maintenance_lock:
+        conn = get_connection()
+        started_at = start_shadow_search_table(conn, tokenize)
+        result = reindex_memory_search(conn, workers=workers, batch_size=batch_size, progress=progress,
+                                       on_batch=lambda checkpoint, indexed: conn.commit(),
+                                       table=SHADOW_SEARCH_TABLE)
+        swap = swap_search_table(conn, started_at, expected_rows=result["indexed"], workers=workers)
+        conn.close()
+    return {**swap, "indexed": result["indexed"], "skipped": result["skipped"]}
+
+# ==================== WEEKLY MAINTENANCE ====================
+
+MAINTENANCE_STAGES = ("curate", "reconcile", "reindex")
+
+def _start_or_resume_run(conn) -> tuple:
+    """Return (run_id, resumed) for the newest unfinished weekly run, or start a new one."""
+    c = conn.cursor()
+    c.execute('''SELECT run_id FROM maintenance_log
+                 WHERE operation = 'weekly_curation' AND status = 'running'
+                 ORDER BY log_id DESC LIMIT 1''')
+    row = c.fetchone()
+    if row:
+        return row[0], True
+    
+    run_id = generate_id("run_")
+    c.execute('''INSERT INTO maintenance_log (operation, run_id, status)
+                 VALUES ('weekly_curation', ?, 'running')''', (run_id,))
+    conn.commit()
+    return run_id, False
+
+def _stage_checkpoint(conn, run_id: str, stage: str) -> Dict:
+    """Fetch (creating if needed) the checkpoint row for one stage of a run."""
+    c = conn.cursor()
+    c.execute('''SELECT log_id, status, checkpoint, items_processed, items_deleted, items_updated,
+                        duration_seconds
+                 FROM maintenance_log WHERE run_id = ? AND stage = ?''', (run_id, stage))
+    row = c.fetchone()
+    if not row:
+        c.execute('''INSERT INTO maintenance_log
+                     (operation, run_id, stage, status, duration_seconds)
+                     VALUES (?, ?, ?, 'running', 0)''', (f"weekly_curation:{stage}", run_id, stage))
+        row = (c.lastrowid, 'running', None, 0, 0, 0, 0)
+    return {
+        "log_id": row[0],
+        "status": row[1],
+        "checkpoint": json.loads(row[2]) if row[2] else None,
+        "processed": row[3] or 0,
+        "deleted": row[4] or 0,
+        "updated": row[5] or 0,
+        "duration_seconds": row[6] or 0
     }
+
+def _save_stage_checkpoint(conn, stage: Dict, stage_start: float, complete: bool = False):
+    """Record a stage's progress; the caller commits it together with the stage's work."""
+    conn.execute('''UPDATE maintenance_log
+                    SET status = ?, checkpoint = ?, items_processed = ?, items_deleted = ?,
+                        items_updated = ?, duration_seconds = ?, timestamp = CURRENT_TIMESTAMP
+                    WHERE log_id = ?''',
+                 ('complete' if complete else 'running',
+                  json.dumps(stage["checkpoint"]) if stage["checkpoint"] else None,
+                  stage["processed"], stage["deleted"], stage["updated"],
+                  stage["duration_seconds"] + (time.monotonic() - stage_start),
+                  stage["log_id"]))
+
+def _curate(conn, stage: Dict):
+    """Stage 1: drop stale low-value index entries and bump scores for accessed ones."""
+    c = conn.cursor()
     
-    # 1. Remove low-importance, old, unaccessed items
+    # Remove low-importance, old, unaccessed items
     cutoff_date = (datetime.now() - timedelta(days=90)).isoformat()
     c.execute('''DELETE FROM memory_index 
                  WHERE importance_score < 0.2 
                  AND last_accessed < ? 
                  AND access_count < 3''',
               (cutoff_date,))
-    stats["deleted"] += c.rowcount
+    stage["deleted"] += c.rowcount
     
-    # 2. Update importance scores based on access patterns
+    # Update importance scores based on access patterns
     c.execute('''UPDATE memory_index 
                  SET importance_score = MIN(1.0, importance_score + (access_count * 0.01))
                  WHERE access_count > 0''')
-    stats["updated"] += c.rowcount
+    stage["updated"] += c.rowcount
+    
+    # Derive aliases for entities written without create_entity (bulk loads, older scripts)
+    c.execute('''SELECT entity_id, name, summary FROM entities e
+                 WHERE NOT EXISTS (SELECT 1 FROM entity_aliases a WHERE a.entity_id = e.entity_id)''')
+    for entity_id, name, summary in c.fetchall():
+        _store_derived_aliases(c, entity_id, name, summary)
+        stage["updated"] += 1
+
+def weekly_maintenance(workers: int = REINDEX_WORKERS, batch_size: int = REINDEX_BATCH_SIZE,
+                       progress: Optional[Callable[[int, int], None]] = None,
+                       orphan_action: str = "report",
+                       max_seconds: Optional[float] = None) -> Dict:
+    """Perform weekly curation and maintenance.
+    
+    The run is split into MAINTENANCE_STAGES, each checkpointed in
+    maintenance_log and committed as it goes. A run that is killed, or that
+    stops because it ran past max_seconds, is picked up where it left off by
+    the next call. The reindex stage checkpoints after every batch.
+    """
+    with _maintenance_lock:
+        return _run_weekly_maintenance(workers, batch_size, progress, orphan_action, max_seconds)
+
+def _run_weekly_maintenance(workers: int, batch_size: int, progress: Optional[Callable[[int, int], None]],
+                            orphan_action: str, max_seconds: Optional[float]) -> Dict:
+    """weekly_maintenance() body; the caller holds _maintenance_lock."""
+    if orphan_action not in ORPHAN_ACTIONS:
+        return {"status": "error", "message": f"Unknown action: {orphan_action}"}
     
-    # 3. Clean up orphaned files
-    # (Check database vs actual files and remove orphans)
+    start_time = datetime.now()
+    deadline = time.monotonic() + max_seconds if max_seconds is not None else None
     
-    # 4. Rebuild full-text search index
-    c.execute('DELETE FROM memory_search')
+    def out_of_time() -> bool:
+        return deadline is not None and time.monotonic() >= deadline
     
-    # Re-index chats
-    c.execute('SELECT chat_id, title, summary, file_path FROM chats')
-    for row in c.fetchall():
-        file_path = Path(row[3])
-        if file_path.exists():
-            content = file_path.read_text(encoding='utf-8')[:10000]
-            c.execute('''INSERT INTO memory_search (content_id, content_type, title, summary, content)
-                         VALUES (?, 'chat', ?, ?, ?)''',
-                      (row[0], row[1], row[2], content))
-            stats["processed"] += 1
-    
-    # Re-index entities
-    c.execute('SELECT entity_id, name, summary, file_path FROM entities')
-    for row in c.fetchall():
-        file_path = Path(row[3])
-        if file_path.exists():
-            content = file_path.read_text(encoding='utf-8')[:10000]
-            c.execute('''INSERT INTO memory_search (content_id, content_type, title, summary, content)
-                         VALUES (?, 'entity', ?, ?, ?)''',
-                      (row[0], row[1], row[2], content))
-            stats["processed"] += 1
+    def partial(stage_name: str, checkpoint=None) -> Dict:
+        conn.commit()
+        conn.close()
+        return {
+            "status": "partial",
+            "run_id": run_id,
+            "stage": stage_name,
+            "checkpoint": checkpoint,
+            "duration_seconds": (datetime.now() - start_time).total_seconds()
+        }
+    
+    conn = get_connection()
+    run_id, resumed = _start_or_resume_run(conn)
+    c = conn.cursor()
     
-    duration = (datetime.now() - start_time).total_seconds()
+    extra = {}
+    for name in MAINTENANCE_STAGES:
+        stage = _stage_checkpoint(conn, run_id, name)
+        if stage["status"] == 'complete':
+            continue
+        if out_of_time():
+            return partial(name, stage["checkpoint"])
+        stage_start = time.monotonic()
+        
+        if name == "curate":
+            _curate(conn, stage)
+        
+        elif name == "reconcile":
+            orphans = reconcile_orphans(orphan_action, conn=conn)
+            extra["orphan_files"] = len(orphans["orphan_files"])
+            extra["orphan_rows"] = len(orphans["orphan_rows"])
+            if orphans["status"] == "refused":
+                extra["orphan_message"] = orphans["message"]
+            elif orphan_action != "report":
+                stage["deleted"] += extra["orphan_files"] + extra["orphan_rows"]
+        
+        elif name == "reindex":
+            # Fill a shadow table so search keeps answering from the live one
+            checkpoint = stage["checkpoint"]
+            if checkpoint is None or not _table_exists(conn, SHADOW_SEARCH_TABLE):
+                checkpoint = {"started_at": start_shadow_search_table(conn), "after": None}
+                stage["checkpoint"] = checkpoint
+                stage["processed"] = 0
+                _save_stage_checkpoint(conn, stage, stage_start)
+                conn.commit()
+            resume_after = tuple(checkpoint["after"]) if checkpoint["after"] else None
+            base_processed = stage["processed"]
+    
+            def on_batch(after, indexed):
+                checkpoint["after"] = list(after) if after else None
+                stage["processed"] = base_processed + indexed
+                _save_stage_checkpoint(conn, stage, stage_start)
+                conn.commit()
+    
+            result = reindex_memory_search(conn, workers=workers, batch_size=batch_size,
+                                           progress=progress, resume_after=resume_after,
+                                           on_batch=on_batch, should_stop=out_of_time,
+                                           table=SHADOW_SEARCH_TABLE)
+            extra["reindex_skipped"] = result["skipped"]
+            if not result["complete"]:
+                return partial(name, checkpoint)
+    
+            swap = swap_search_table(conn, checkpoint["started_at"], expected_rows=stage["processed"],
+                                     workers=workers)
+            if swap["status"] == "error":
+                # Start the shadow over on the next run
+                stage["checkpoint"] = None
+                _save_stage_checkpoint(conn, stage, stage_start)
+                conn.commit()
+                conn.close()
+                return {**swap, "run_id": run_id, "stage": name}
+        
+        _save_stage_checkpoint(conn, stage, stage_start, complete=True)
+        conn.commit()
     
     # Log maintenance
-    c.execute('''INSERT INTO maintenance_log 
-                 (operation, items_processed, items_deleted, items_updated, duration_seconds)
-                 VALUES ('weekly_curation', ?, ?, ?, ?)''',
-              (stats["processed"], stats["deleted"], stats["updated"], duration))
+    c.execute('''SELECT COALESCE(SUM(items_processed), 0), COALESCE(SUM(items_deleted), 0),
+                        COALESCE(SUM(items_updated), 0), COALESCE(SUM(duration_seconds), 0)
+                 FROM maintenance_log WHERE run_id = ? AND stage IS NOT NULL''', (run_id,))
+    processed, deleted, updated, duration = c.fetchone()
+    stats = {
+        "processed": processed,
+        "deleted": deleted,
+        "updated": updated
+    }
+    c.execute('''UPDATE maintenance_log
+                 SET status = 'complete', items_processed = ?, items_deleted = ?, items_updated = ?,
+                     duration_seconds = ?, timestamp = CURRENT_TIMESTAMP
+                 WHERE run_id = ? AND stage IS NULL''',
+              (processed, deleted, updated, duration, run_id))
     
     conn.commit()
     conn.close()
     
     return {
         "status": "complete",
+        "run_id": run_id,
+        "resumed": resumed,
         "duration_seconds": duration,
-        **stats
+        **stats,
+        **extra
     }
 
 # ==================== INITIALIZATION ====================
 
 def initialize_database():
     """Initialize database schema and default abilities/permissions."""
-    init_database()
+    schema = init_database()
     initialize_abilities_and_permissions()
     return {
         "status": "initialized",
-        "database": str(DB_PATH)
+        "database": str(DB_PATH),
+        "schema_version": schema["schema_version"]
     }
 
 def initialize_abilities_and_permissions():
@@ -487,6 +3698,11 @@ def initialize_abilities_and_permissions():
     for permission, details in permissions:
         store_permission(permission, details)
 
+# Opt-in operation metrics (see memory_metrics.py)
+if os.environ.get("PERFECT_MEMORY_METRICS") and __name__ != "__main__":
+    import memory_metrics
+    memory_metrics.enable()
+
 # ==================== MAIN ====================
 
 if __name__ == "__main__":
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Opt-in operation metrics for memory_core.
+
+Set PERFECT_MEMORY_METRICS=1 (or call enable()) and every public memory_core
+function is timed, with the SQL statements it issues, rows read and written
+and file bytes read and written counted per call. Only the outermost call
+is recorded: a public function called by another (migrate inside
+init_database, search_memory inside search_many) is part of its caller's
+time and counters, so each operation's count is the calls made into
+memory_core and totals are not counted twice. Totals are aggregated into
+latency histograms in memory and merged into metrics/stats.json under the
+storage root when the process exits, so short-lived CLI runs add up. If
+PERFECT_MEMORY_METRICS_PROM names a file, a Prometheus text export is
+written there too (for node_exporter's textfile collector).
+"""
+
+import os
+import json
+import time
+import atexit
+import inspect
+import builtins
+import functools
+import threading
+import contextvars
+from datetime import datetime
+from typing import Dict, Optional
+
+import memory_core
+
+STATS_PATH = memory_core.MEMORY_ROOT / "metrics" / "stats.json"
+BUCKETS_SECONDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNTERS = ("sql_statements", "rows_read", "rows_written", "bytes_read", "bytes_written")
+# Connection and singleton setup, and helpers that do no I/O (several run
+# inside every search); timing them adds noise, not insight. A new public
+# function in memory_core is instrumented unless listed here or a generator
+# (whose call only creates it).
+NOT_INSTRUMENTED = {
+    "get_connection", "get_write_journal", "get_short_term_writer",
+    "generate_id", "calculate_hash", "fts_id_query", "alias_key", "fuse_results",
+    "set_entity_cache_limit", "entity_cache_stats"
+}
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict] = {}
+_active_call = contextvars.ContextVar("memory_metrics_active_call", default=None)
+_enabled = False
+
+def _new_entry() -> Dict:
+    """Empty aggregate for one operation."""
+    entry = {"count": 0, "errors": 0, "sum_seconds": 0.0, "buckets": [0] * (len(BUCKETS_SECONDS) + 1)}
+    entry.update({counter: 0 for counter in COUNTERS})
+    return entry
+
+def _count(counter: str, amount: int):
+    """Add to a counter of the instrumented call active in this context."""
+    if amount <= 0:
+        return
+    call = _active_call.get()
+    if call is not None:
+        with _lock:
+            call[counter] += amount
+
+def _record(operation: str, seconds: float, call: Dict, failed: bool):
+    """Fold one finished call into the in-memory aggregates."""
+    bucket = len(BUCKETS_SECONDS)
+    for i, bound in enumerate(BUCKETS_SECONDS):
+        if seconds <= bound:
+            bucket = i
+            break
+    with _lock:
+        entry = _stats.setdefault(operation, _new_entry())
+        entry["count"] += 1
+        entry["errors"] += 1 if failed else 0
+        entry["sum_seconds"] += seconds
+        entry["buckets"][bucket] += 1
+        for counter in COUNTERS:
+            entry[counter] += call[counter]
+
+# ==================== SQLITE INSTRUMENTATION ====================
+
+class InstrumentedCursor(memory_core.MemoryCursor):
+    """Cursor that counts rows written (rowcount) and rows fetched."""
+    
+    def execute(self, *args):
+        result = super().execute(*args)
+        _count("rows_written", self.rowcount)
+        return result
+    
+    def executemany(self, *args):
+        result = super().executemany(*args)
+        _count("rows_written", self.rowcount)
+        return result
+    
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _count("rows_read", 1)
+        return row
+    
+    def fetchmany(self, *args):
+        rows = super().fetchmany(*args)
+        _count("rows_read", len(rows))
+        return rows
+    
+    def fetchall(self):
+        rows = super().fetchall()
+        _count("rows_read", len(rows))
+        return rows
+    
+    def __next__(self):
+        row = super().__next__()
+        _count("rows_read", 1)
+        return row
+
+class InstrumentedConnection(memory_core.MemoryConnection):
+    """Connection whose statements are counted via the trace callback."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(lambda statement: _count("sql_statements", 1))
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+# ==================== FILE INSTRUMENTATION ====================
+
+def _size(data) -> int:
+    """Byte size of text (as UTF-8) or binary data."""
+    return len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+
+class _CountingFile:
+    """File wrapper that counts bytes passing through read/write."""
+    
+    def __init__(self, f):
+        self._f = f
+    
+    def read(self, *args):
+        data = self._f.read(*args)
+        _count("bytes_read", _size(data))
+        return data
+    
+    def readline(self, *args):
+        data = self._f.readline(*args)
+        _count("bytes_read", _size(data))
+        return data
+    
+    def write(self, data):
+        _count("bytes_written", _size(data))
+        return self._f.write(data)
+    
+    def __iter__(self):
+        for line in self._f:
+            _count("bytes_read", _size(line))
+            yield line
+    
+    def __enter__(self):
+        self._f.__enter__()
+        return self
+    
+    def __exit__(self, *exc_info):
+        return self._f.__exit__(*exc_info)
+    
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+def _counting_open(*args, **kwargs):
+    """Drop-in for open() inside memory_core."""
+    return _CountingFile(builtins.open(*args, **kwargs))
+
+# ==================== ENABLE ====================
+
+def instrument(operation: str, func):
+    """Wrap one function so each outermost call is timed and its counters recorded."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active_call.get() is not None:
+            return func(*args, **kwargs)  # nested: the enclosing operation accounts for it
+        call = {counter: 0 for counter in COUNTERS}
+        token = _active_call.set(call)
+        start = time.perf_counter()
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _active_call.reset(token)
+            _record(operation, time.perf_counter() - start, call, failed)
+    return wrapper
+
+def enable():
+    """Instrument memory_core in place. Safe to call more than once."""
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    
+    memory_core.CONNECTION_FACTORY = InstrumentedConnection
+    memory_core.open = _counting_open
+    for name, func in list(vars(memory_core).items()):
+        if (inspect.isfunction(func) and func.__module__ == memory_core.__name__
+                and not name.startswith("_") and name not in NOT_INSTRUMENTED
+                and not inspect.isgeneratorfunction(func)):
+            setattr(memory_core, name, instrument(name, func))
+    atexit.register(save)
+
+# ==================== PERSISTENCE & EXPORT ====================
+
+def _merge(into: Dict, entry: Dict):
+    """Add one operation aggregate into another."""
+    into["count"] += entry["count"]
+    into["errors"] += entry["errors"]
+    into["sum_seconds"] += entry["sum_seconds"]
+    into["buckets"] = [a + b for a, b in zip(into["buckets"], entry["buckets"])]
+    for counter in COUNTERS:
+        into[counter] += entry[counter]
+
+def _load_saved() -> Dict:
+    """Read the persisted stats file, or an empty one."""
+    try:
+        with open(STATS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"since": datetime.now().isoformat(), "operations": {}}
+
+def save():
+    """Merge this process's aggregates into metrics/stats.json and reset them."""
+    with _lock:
+        pending = dict(_stats)
+        _stats.clear()
+    if not pending:
+        return
+    
+    saved = _load_saved()
+    for operation, entry in pending.items():
+        _merge(saved["operations"].setdefault(operation, _new_entry()), entry)
+    saved["updated"] = datetime.now().isoformat()
+    
+    STATS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATS_PATH.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(saved, f)
+    os.replace(tmp_path, STATS_PATH)
+    
+    prom_path = os.environ.get("PERFECT_MEMORY_METRICS_PROM")
+    if prom_path:
+        with open(f"{prom_path}.tmp", 'w', encoding='utf-8') as f:
+            f.write(export_prometheus(saved))
+        os.replace(f"{prom_path}.tmp", prom_path)
+
+def reset():
+    """Forget all recorded metrics, in memory and on disk."""
+    with _lock:
+        _stats.clear()
+    if STATS_PATH.exists():
+        STATS_PATH.unlink()
+
+def load_stats() -> Dict:
+    """Persisted aggregates plus anything this process has not saved yet."""
+    saved = _load_saved()
+    with _lock:
+        for operation, entry in _stats.items():
+            _merge(saved["operations"].setdefault(operation, _new_entry()), entry)
+    return saved
+
+def _histogram_quantile(buckets, q: float) -> Optional[float]:
+    """Upper bound (seconds) of the bucket holding quantile q; None past the last bound."""
+    total = sum(buckets)
+    if not total:
+        return None
+    running = 0
+    for bound, count in zip(BUCKETS_SECONDS, buckets):
+        running += count
+        if running >= q * total:
+            return bound
+    return None
+
+def export_json(stats: Optional[Dict] = None) -> Dict:
+    """Summarize aggregates per operation with mean and histogram p50/p95/p99."""
+    stats = stats or load_stats()
+    operations = {}
+    for operation, entry in sorted(stats["operations"].items()):
+        summary = {
+            "count": entry["count"],
+            "errors": entry["errors"],
+            "total_seconds": round(entry["sum_seconds"], 6),
+            "mean_ms": round(entry["sum_seconds"] / entry["count"] * 1000, 3) if entry["count"] else None
+        }
+        for label, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            bound = _histogram_quantile(entry["buckets"], q)
+            summary[label] = bound * 1000 if bound is not None else None
+        for counter in COUNTERS:
+            summary[counter] = entry[counter]
+        summary["histogram"] = {
+            str(bound): count for bound, count in zip(BUCKETS_SECONDS + ("+Inf",), entry["buckets"])
+        }
+        operations[operation] = summary
+    return {"since": stats.get("since"), "updated": stats.get("updated"), "operations": operations}
+
+def export_prometheus(stats: Optional[Dict] = None) -> str:
+    """Render aggregates in the Prometheus text exposition format."""
+    stats = stats or load_stats()
+    lines = [
+        "# HELP perfect_memory_operation_duration_seconds Time spent in memory_core operations.",
+        "# TYPE perfect_memory_operation_duration_seconds histogram",
+    ]
+    for operation, entry in sorted(stats["operations"].items()):
+        running = 0
+        for bound, count in zip(BUCKETS_SECONDS, entry["buckets"]):
+            running += count
+            lines.append(f'perfect_memory_operation_duration_seconds_bucket{{operation="{operation}",le="{bound}"}} {running}')
+        lines.append(f'perfect_memory_operation_duration_seconds_bucket{{operation="{operation}",le="+Inf"}} {entry["count"]}')
+        lines.append(f'perfect_memory_operation_duration_seconds_sum{{operation="{operation}"}} {entry["sum_seconds"]}')
+        lines.append(f'perfect_memory_operation_duration_seconds_count{{operation="{operation}"}} {entry["count"]}')
+    
+    for counter in ("errors",) + COUNTERS:
+        metric = f"perfect_memory_{counter}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for operation, entry in sorted(stats["operations"].items()):
+            lines.append(f'{metric}{{operation="{operation}"}} {entry[counter]}')
+    return "\n".join(lines) + "\n"
@@ -17,6 +17,14 @@ print("""
    python S:/skills/fixed-perfect-memory/resources/store_permission.py \\
      "Permission Name" "Details"
 
+[MANY SMALL WRITES] (group commit: one fsync per batch)
+   futures = [memory_core.queue_ability(name, desc) for name, desc in facts]
+   memory_core.flush_short_term()   # durability point
+
+[WRITE JOURNAL] (opt-in: PERFECT_MEMORY_WRITE_JOURNAL=on; store_ability/permission append to short-term/journal)
+   python S:/skills/fixed-perfect-memory/resources/write_journal.py \\
+     [status|recover [stale_seconds]]   # recover replays segments left by crashed processes
+
 [CREATE ENTITY]
    # With content from stdin:
    echo "Full markdown content" | \\
@@ -27,10 +35,84 @@ print("""
 
 [SEARCH MEMORY]
    python S:/skills/fixed-perfect-memory/resources/search_memory.py \\
-     "search query" [limit]
+     "search query" [limit] [snippet_tokens] [summary|section|full]   # snippet_tokens > 0: [matched] snippets
+   memory_core.search_memory(q, snippet_tokens=16, highlight=True)   # no file reads
+   memory_core.search_memory(q, weights={"title": 20.0}, boosts={"recency": 0})   # ranking knobs
+   memory_core.search_memory(q, cursor=results[-1]["cursor"], since="2025-01-01")   # next page
+   memory_core.search_memory(q, facets=["content_type", "entity_type", "month"])   # {"results", "total", "facets"}
+   memory_core.search_memory("Robinsn", fuzzy=True)   # typo / substring fallback when nothing matches
+   memory_core.search_memory(q, hydrate="section", max_bytes=16384)   # attach content; no get_entity needed
+
+[SEARCH MANY] (one connection; repeated queries run once; merged by rank fusion)
+   python S:/skills/fixed-perfect-memory/resources/search_many.py \\
+     "query one" "query two" ...   # {"by_query": {...}, "merged": [...]}
+   memory_core.search_many(queries, merge=True, snippet_tokens=16)   # options go to every search
+
+[GET ENTITIES] (one query, files read concurrently, unchanged files served from memory)
+   memory_core.get_entities([r["content_id"] for r in results if r["content_type"] == "entity"])
+   memory_core.set_entity_cache_limit(64 * 1024 * 1024)   # or PERFECT_MEMORY_ENTITY_CACHE_MB; 0 disables
+   memory_core.entity_cache_stats()   # files, bytes, hits, misses
+
+[ENTITY SECTIONS] (headings and --- update blocks, indexed with byte ranges)
+   memory_core.get_entity_sections(entity_id)   # outline: section_idx, heading, byte_range
+   memory_core.get_entity_section(entity_id, result["section"]["section_idx"])   # reads just that range
+   # Entity search results carry "section"; hydrate="section" returns it
+
+[CHAT WINDOW] (transcripts indexed per message with role, timestamp and byte range)
+   python S:/skills/fixed-perfect-memory/resources/chat_window.py \
+     chat_id message_idx [before] [after]
+   memory_core.get_chat_window(chat_id, result["message"]["message_idx"], before=2, after=2)   # reads just those messages
+   # Chat search results carry "message"; hydrate="section" returns that message
+
+[ENTITY ALIASES] (a search for any alias also matches the others)
+   python S:/skills/fixed-perfect-memory/resources/aliases.py \\
+     [list entity_id | add entity_id "alias" | remove entity_id "alias"]
+   # Names and "(S: drive)" / "also known as ..." in summaries are added automatically
+
+[SUGGEST NAMES] (typeahead on entity names and chat titles, by importance)
+   python S:/skills/fixed-perfect-memory/resources/suggest.py \\
+     "robin" [k]   # every word of the prefix must start a word of the name
+
+[LIST CHATS / ENTITIES] (newest first; pass the last item's cursor for the next page)
+   python S:/skills/fixed-perfect-memory/resources/list_memory.py \\
+     [entities|chats] [limit] [cursor]
+
+[SEARCH INDEXING] (runs in the background after store_chat / create_entity)
+   python S:/skills/fixed-perfect-memory/resources/index_worker.py \\
+     [status|drain|watch]   # PERFECT_MEMORY_INDEX_WORKER=off disables the in-process worker
+   memory_core.wait_indexed(result["index_job"])   # read-after-write
 
 [WEEKLY MAINTENANCE]
-   python S:/skills/fixed-perfect-memory/resources/weekly_maintenance.py
+   python S:/skills/fixed-perfect-memory/resources/weekly_maintenance.py \\
+     [max_seconds]   # resumes an interrupted run from its last checkpoint
+
+[REBUILD SEARCH INDEX] (search stays online)
+   python S:/skills/fixed-perfect-memory/resources/rebuild_search.py \\
+     ["porter unicode61"]
+
+[ORPHAN FILES / ROWS]
+   python S:/skills/fixed-perfect-memory/resources/reconcile_orphans.py \\
+     [report|quarantine|delete]
+
+[BENCHMARKS] (synthetic corpora, JSON results)
+   python S:/skills/fixed-perfect-memory/resources/benchmarks/run_benchmarks.py \\
+     --scales 10000 100000 --output results.json [--compare baseline.json]
+   python S:/skills/fixed-perfect-memory/resources/benchmarks/session_start.py \\
+     --items 100000 --budget-ms 50   # fails if load_context.py is too slow
+   python S:/skills/fixed-perfect-memory/resources/benchmarks/async_reads.py \\
+     --items 100000 --workers 1 2 4 8   # AsyncMemoryStore read concurrency
+
+[ASYNC API] (asyncio agents)
+   from memory_async import AsyncMemoryStore
+   async with AsyncMemoryStore() as store:
+       results = await store.search_memory("query")
+
+[OPERATION METRICS] (opt-in: set PERFECT_MEMORY_METRICS=1)
+   python S:/skills/fixed-perfect-memory/resources/stats.py [json|prometheus|reset]
+
+[SLOW QUERIES] (threshold: PERFECT_MEMORY_SLOW_QUERY_MS, default 100, "off" disables)
+   python S:/skills/fixed-perfect-memory/resources/slow_queries.py \\
+     [list [limit]|scans [limit]|clear]   # scans = full table scans only
 
 [CHECK DATABASE STATS]
    sqlite3 S:/fixed-perfect-memory/database/memory.db \\
@@ -49,11 +131,13 @@ print("""
 CURRENT STATUS:
 """)
 
+import os
 import json
 import sqlite3
 from pathlib import Path
 
-DB_PATH = Path("S:/fixed-perfect-memory/database/memory.db")
+MEMORY_ROOT = Path(os.environ.get("PERFECT_MEMORY_ROOT", "S:/fixed-perfect-memory"))
+DB_PATH = MEMORY_ROOT / "database" / "memory.db"
 
 if DB_PATH.exists():
     conn = sqlite3.connect(DB_PATH)
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""Rebuild the full-text search index online via a shadow table swap."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import rebuild_memory_search
+
+def report_progress(done: int, total: int):
+    """Print rebuild progress to stderr."""
+    print(f"   indexed {done}/{total}", file=sys.stderr)
+
+if __name__ == "__main__":
+    # Optional tokenizer, e.g. "porter unicode61"; defaults to the live table's
+    tokenize = sys.argv[1] if len(sys.argv) > 1 else None
+    
+    result = rebuild_memory_search(progress=report_progress, tokenize=tokenize)
+    print(json.dumps(result, indent=2))
+    if result["status"] == "error":
+        sys.exit(1)
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Find (and optionally quarantine or delete) orphaned memory files and rows."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import reconcile_orphans, ORPHAN_ACTIONS
+
+if __name__ == "__main__":
+    action = sys.argv[1] if len(sys.argv) > 1 else "report"
+    if action not in ORPHAN_ACTIONS:
+        print(json.dumps({"error": "Usage: reconcile_orphans.py [report|quarantine|delete]"}, indent=2))
+        sys.exit(1)
+    
+    result = reconcile_orphans(action)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""Run several searches at once and merge the hits into one ranked list."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import search_many
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({"error": "Usage: search_many.py 'query' 'query' ..."}, indent=2))
+        sys.exit(1)
+    
+    print(json.dumps(search_many(sys.argv[1:], merge=True), indent=2))
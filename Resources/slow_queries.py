@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""Show (or clear) statements recorded in the slow-query log."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import get_slow_queries, clear_slow_queries
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    
+    if command == "list":
+        print(json.dumps(get_slow_queries(limit), indent=2))
+    elif command == "scans":
+        print(json.dumps(get_slow_queries(limit, full_scans_only=True), indent=2))
+    elif command == "clear":
+        print(json.dumps(clear_slow_queries(), indent=2))
+    else:
+        print(json.dumps({"error": "Usage: slow_queries.py [list [limit]|scans [limit]|clear]"}, indent=2))
+        sys.exit(1)
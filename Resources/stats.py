@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""Show operation metrics recorded with PERFECT_MEMORY_METRICS=1."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import memory_metrics
+
+if __name__ == "__main__":
+    fmt = sys.argv[1] if len(sys.argv) > 1 else "json"
+    
+    if fmt == "json":
+        print(json.dumps(memory_metrics.export_json(), indent=2))
+    elif fmt == "prometheus":
+        print(memory_metrics.export_prometheus(), end="")
+    elif fmt == "reset":
+        memory_metrics.reset()
+        print(json.dumps({"status": "reset", "file": str(memory_metrics.STATS_PATH)}, indent=2))
+    else:
+        print(json.dumps({"error": "Usage: stats.py [json|prometheus|reset]"}, indent=2))
+        sys.exit(1)
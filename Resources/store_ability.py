@@ -3,32 +3,17 @@
 
 import sys
 import json
-import sqlite3
-from datetime import datetime
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
 
-DB_PATH = Path("S:/fixed-perfect-memory/database/memory.db")
+import memory_core
 
 def store_ability(ability: str, description: str):
     """Store an ability."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    key = f"ability_{ability.lower().replace(' ', '_').replace('-', '_')}"
-    value = json.dumps({
-        "ability": ability,
-        "description": description,
-        "discovered_at": datetime.now().isoformat()
-    })
-    
-    c.execute('''INSERT OR REPLACE INTO short_term_memory (key, value, category, updated_at)
-                 VALUES (?, ?, 'ability', CURRENT_TIMESTAMP)''',
-              (key, value))
-    
-    conn.commit()
-    conn.close()
-    
-    return {"status": "stored", "ability": ability, "description": description}
+    # memory_core writes through the write journal when it is enabled
+    result = memory_core.store_ability(ability, description)
+    result["description"] = description
+    return result
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
@@ -3,32 +3,17 @@
 
 import sys
 import json
-import sqlite3
-from datetime import datetime
 from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
 
-DB_PATH = Path("S:/fixed-perfect-memory/database/memory.db")
+import memory_core
 
 def store_permission(permission: str, details: str):
     """Store a permission."""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    key = f"permission_{permission.lower().replace(' ', '_').replace('-', '_')}"
-    value = json.dumps({
-        "permission": permission,
-        "details": details,
-        "granted_at": datetime.now().isoformat()
-    })
-    
-    c.execute('''INSERT OR REPLACE INTO short_term_memory (key, value, category, updated_at)
-                 VALUES (?, ?, 'permission', CURRENT_TIMESTAMP)''',
-              (key, value))
-    
-    conn.commit()
-    conn.close()
-    
-    return {"status": "stored", "permission": permission, "details": details}
+    # memory_core writes through the write journal when it is enabled
+    result = memory_core.store_permission(permission, details)
+    result["details"] = details
+    return result
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
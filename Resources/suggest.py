@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""Suggest entity names and chat titles starting with a prefix, most important first."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import suggest
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "Usage: suggest.py 'prefix' [k]"}, indent=2))
+        sys.exit(1)
+    
+    prefix = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    
+    print(json.dumps(suggest(prefix, k), indent=2))
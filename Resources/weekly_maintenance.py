@@ -8,7 +8,14 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from memory_core import weekly_maintenance
 
+def report_progress(done: int, total: int):
+    """Print reindex progress to stderr."""
+    print(f"   reindexed {done}/{total}", file=sys.stderr)
+
 if __name__ == "__main__":
+    # Optional time budget in seconds; an unfinished run resumes next time
+    max_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    
     print("🧹 Running weekly maintenance...")
-    result = weekly_maintenance()
+    result = weekly_maintenance(progress=report_progress, max_seconds=max_seconds)
     print(json.dumps(result, indent=2))
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""Inspect the short-term write journal, or replay what it holds into SQLite."""
+
+import sys
+import json
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from memory_core import write_journal_status, recover_write_journal, JOURNAL_STALE_SECONDS
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command not in ("status", "recover"):
+        print(json.dumps({"error": "Usage: write_journal.py [status|recover [stale_seconds]]"}, indent=2))
+        sys.exit(1)
+    
+    if command == "recover":
+        stale_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else JOURNAL_STALE_SECONDS
+        print(json.dumps({**recover_write_journal(stale_seconds), **write_journal_status()}, indent=2))
+    else:
+        print(json.dumps(write_journal_status(), indent=2))
@@ -0,0 +1,44 @@
+"""Shared fixtures: every test gets memory_core pointed at its own empty storage root."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+RESOURCES = Path(__file__).resolve().parent.parent / "Resources"
+sys.path.insert(0, str(RESOURCES))
+
+# memory_core reads these at import; tests drain the index queue themselves
+os.environ["PERFECT_MEMORY_ROOT"] = tempfile.mkdtemp(prefix="perfect_memory_tests_")
+os.environ["PERFECT_MEMORY_INDEX_WORKER"] = "off"
+os.environ["PERFECT_MEMORY_WRITE_JOURNAL"] = "off"
+
+import memory_core
+
+@pytest.fixture
+def memory(tmp_path, monkeypatch):
+    """memory_core with its paths under tmp_path and its per-process state reset."""
+    root = tmp_path / "memory"
+    paths = {
+        "MEMORY_ROOT": root,
+        "DB_PATH": root / "database" / "memory.db",
+        "CHATS_DIR": root / "chats",
+        "ENTITIES_DIR": root / "entities",
+        "SHORT_TERM_DIR": root / "short-term",
+        "IMAGES_DIR": root / "images",
+        "EMBEDDINGS_DIR": root / "embeddings",
+        "QUARANTINE_DIR": root / "quarantine",
+        "JOURNAL_DIR": root / "short-term" / "journal",
+    }
+    for name, path in paths.items():
+        monkeypatch.setattr(memory_core, name, path)
+    for path in (paths["DB_PATH"].parent, paths["CHATS_DIR"], paths["ENTITIES_DIR"], paths["SHORT_TERM_DIR"]):
+        path.mkdir(parents=True, exist_ok=True)
+    
+    monkeypatch.setattr(memory_core, "_schema_checked", False)
+    monkeypatch.setattr(memory_core, "_write_journal", None)
+    monkeypatch.setattr(memory_core, "_entity_files", memory_core.FileCache(memory_core.ENTITY_CACHE_BYTES))
+    memory_core.init_database()
+    return memory_core
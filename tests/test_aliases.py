@@ -0,0 +1,44 @@
+"""Alias expansion: plain-word queries also find an entity's other names; FTS syntax is left alone."""
+
+import pytest
+
+@pytest.fixture
+def castaways(memory):
+    robin = memory.create_entity("Robin", "person", "Robin keeps the lighthouse.",
+                                 summary="Keeper, also known as Castaway Bob")["entity_id"]
+    crusoe = memory.create_entity("Robinson Crusoe", "person", "Shipwrecked for years.")["entity_id"]
+    memory.wait_indexed()
+    return robin, crusoe
+
+def _ids(results):
+    return {r["content_id"] for r in results}
+
+def test_prefix_query_is_not_narrowed_to_one_alias(memory, castaways):
+    robin, crusoe = castaways
+    assert _ids(memory.search_memory("robin*")) == {robin, crusoe}
+    assert _ids(memory.search_memory("robin*", expand_aliases=False)) == {robin, crusoe}
+
+def test_summary_alias_finds_the_entity(memory, castaways):
+    robin, _ = castaways
+    assert _ids(memory.search_memory("castaway bob")) == {robin}
+
+def test_expansion_keeps_the_original_query(memory, castaways):
+    robin, _ = castaways
+    memory.store_chat("c1", "url", "Beach log", "User: Robin was seen on the beach\n")
+    memory.wait_indexed()
+    assert _ids(memory.search_memory("robin")) == {robin, "c1"}
+
+def test_manual_alias_expands(memory, castaways):
+    robin, _ = castaways
+    assert memory.add_alias(robin, "Lamplighter")["status"] == "added"
+    assert _ids(memory.search_memory("lamplighter")) == {robin}
+    assert _ids(memory.search_memory("lamplighter", expand_aliases=False)) == set()
+    assert memory.add_alias(robin, "--")["status"] == "error"
+
+def test_fts_syntax_passes_through(memory, castaways):
+    conn = memory.get_connection()
+    c = conn.cursor()
+    for query in ('title: robin', '"castaway bob"', 'robin OR crusoe', 'castaway NOT bob', 'robin*'):
+        assert memory._expand_aliases(c, query) == query
+    assert memory._expand_aliases(c, 'castaway bob') == '(castaway bob) OR "castaway bob" OR "robin"'
+    conn.close()
@@ -0,0 +1,60 @@
+"""AsyncMemoryStore: pooled reads and serialized writes complete, and close() drains queued writes."""
+
+import asyncio
+
+import pytest
+
+from memory_async import AsyncMemoryStore
+
+def test_gathered_reads_and_writes_complete(memory):
+    entity_id = memory.create_entity("Async", "concept", "wombat")["entity_id"]
+    memory.wait_indexed()
+    
+    async def run():
+        async with AsyncMemoryStore(read_workers=2) as store:
+            return await asyncio.gather(store.search_memory("wombat"), store.get_entity(entity_id),
+                                        store.store_ability("Async Ability", "d"),
+                                        store.create_entity("Written", "concept", "wombat too"))
+    
+    results, entity, stored, created = asyncio.run(run())
+    assert [r["content_id"] for r in results] == [entity_id]
+    assert entity["name"] == "Async"
+    assert stored["status"] == "stored" and created["status"] == "created"
+    assert "Async Ability" in [a["ability"] for a in memory.get_all_abilities()]
+
+def test_close_drains_queued_writes(memory):
+    async def run():
+        store = AsyncMemoryStore()
+        writes = [asyncio.ensure_future(store.store_chat(f"c{i}", "url", f"Chat {i}", "text")) for i in range(5)]
+        await asyncio.sleep(0)  # let every write reach the queue
+        await store.close()
+        with pytest.raises(RuntimeError):
+            await store.get_entity("anything")
+        return [write.result()["status"] for write in writes]
+    
+    assert asyncio.run(run()) == ["stored"] * 5
+    assert len(memory.list_chats(limit=10)) == 5
+
+def test_search_many_with_facets(memory):
+    memory.create_entity("Faceted", "concept", "numbat")
+    memory.store_chat("c1", "url", "Numbat chat", "User: numbat\n")
+    memory.wait_indexed()
+    
+    async def run():
+        async with AsyncMemoryStore() as store:
+            return await store.search_many(["numbat", "numbat"], merge=True, facets=["content_type"])
+    
+    result = asyncio.run(run())
+    assert result["by_query"]["numbat"]["facets"] == {"content_type": {"chat": 1, "entity": 1}}
+    assert len(result["merged"]) == 2
+    assert memory.search_many(["numbat"], facets=["content_type"])["numbat"]["total"] == 2
+
+def test_maintenance_and_journal_operations(memory):
+    async def run():
+        async with AsyncMemoryStore() as store:
+            return await asyncio.gather(store.reconcile_orphans(), store.write_journal_status(),
+                                        store.recover_write_journal(), store.fuzzy_search_names("nothing"))
+    
+    orphans, journal, recovered, fuzzy = asyncio.run(run())
+    assert orphans["status"] == "complete"
+    assert journal["segments"] == [] and recovered["segments"] == 0 and fuzzy == []
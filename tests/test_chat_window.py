@@ -0,0 +1,44 @@
+"""Chat windows: edges clamp to the transcript and byte ranges are exact on non-ASCII text."""
+
+import pytest
+
+TRANSCRIPT = ("**User:** première question ☕\n\n"
+              "**Assistant:** réponse une\n\n"
+              "**User:** 第二の質問\n\n"
+              "**Assistant:** code:\n```\nUser: inside a fence\n```\n\n"
+              "**User:** dernière\n")
+
+@pytest.fixture
+def chat(memory):
+    memory.store_chat("c1", "url", "Fenêtre", TRANSCRIPT)
+    memory.wait_indexed()
+    with open(memory.CHATS_DIR / "c1.md", 'rb') as f:
+        return f.read()
+
+def _indexes(window):
+    return [m["message_idx"] for m in window["messages"]]
+
+def test_window_at_the_first_message(memory, chat):
+    window = memory.get_chat_window("c1", 0, before=2, after=1)
+    assert _indexes(window) == [0, 1]
+    assert window["messages"][0] == {"message_idx": 0, "role": "user", "timestamp": None,
+                                     "content": "**User:** première question ☕"}
+
+def test_window_at_the_last_message(memory, chat):
+    window = memory.get_chat_window("c1", 4, before=1, after=2)
+    assert _indexes(window) == [3, 4]
+    assert window["messages"][0]["content"] == "**Assistant:** code:\n```\nUser: inside a fence\n```"
+    assert window["messages"][-1]["content"] == "**User:** dernière"
+
+def test_byte_range_spans_the_window(memory, chat):
+    window = memory.get_chat_window("c1", 2, before=1, after=1)
+    start, end = window["byte_range"]
+    assert chat[start:end].decode("utf-8") == "\n\n".join(m["content"] for m in window["messages"])
+    assert window["messages"][1]["content"] == "**User:** 第二の質問"
+
+@pytest.mark.parametrize("message_idx", [-1, 5, 99])
+def test_out_of_range_message(memory, chat, message_idx):
+    assert memory.get_chat_window("c1", message_idx) == {"status": "error", "message": "Message not found"}
+
+def test_unknown_chat(memory):
+    assert memory.get_chat_window("nope", 0) == {"status": "error", "message": "Chat not found"}
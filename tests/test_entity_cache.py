@@ -0,0 +1,46 @@
+"""The entity file cache: LRU within a byte cap, never serving a file after it changes."""
+
+import os
+
+def test_least_recently_used_files_are_evicted_at_the_byte_limit(memory, tmp_path):
+    paths = []
+    for name in "abc":
+        path = tmp_path / f"{name}.md"
+        path.write_text(name * 100, encoding="utf-8")
+        paths.append(path)
+    cache = memory.FileCache(250)
+    
+    cache.read(paths[0])
+    cache.read(paths[1])
+    cache.read(paths[0])  # b is now the least recently used
+    cache.read(paths[2])
+    assert cache.stats()["files"] == 2 and cache.stats()["bytes"] == 200
+    
+    assert cache.read(paths[0]) == "a" * 100
+    assert cache.read(paths[2]) == "c" * 100
+    assert (cache.hits, cache.misses) == (3, 3)
+    cache.read(paths[1])
+    assert cache.misses == 4
+    
+    cache.resize(100)
+    assert cache.stats()["files"] == 1
+    assert cache.read(paths[1]) == "b" * 100 and cache.hits == 4
+
+def test_a_file_larger_than_the_cap_is_not_cached(memory, tmp_path):
+    path = tmp_path / "big.md"
+    path.write_text("x" * 300, encoding="utf-8")
+    cache = memory.FileCache(250)
+    
+    assert cache.read(path) == "x" * 300
+    assert cache.stats()["files"] == 0
+
+def test_update_entity_invalidates_even_within_one_mtime_tick(memory):
+    entity_id = memory.create_entity("Cached", "concept", "first")["entity_id"]
+    path = memory.ENTITIES_DIR / "concept" / f"{entity_id}.md"
+    stat = os.stat(path)
+    assert memory.get_entity(entity_id)["content"].endswith("first")
+    
+    memory.update_entity(entity_id, path.read_text(encoding="utf-8").replace("first", "later"), append=False)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # same size and mtime as the cached copy
+    assert memory.get_entity(entity_id)["content"].endswith("later")
+    assert memory.entity_cache_stats()["files"] == 1
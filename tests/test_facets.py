@@ -0,0 +1,20 @@
+"""Facets: totals and per-value counts cover every match, not just the page."""
+
+def test_facet_totals_match_an_unfiltered_count(memory):
+    for i in range(4):
+        memory.create_entity(f"Person {i}", "person", "walrus sightings")
+    for i in range(3):
+        memory.create_entity(f"Place {i}", "place", "walrus colony")
+    for i in range(5):
+        memory.store_chat(f"chat{i}", "url", f"Chat {i}", "User: tell me about the walrus\n")
+    memory.create_entity("Unrelated", "person", "penguins only")
+    memory.wait_indexed()
+    
+    everything = memory.search_memory("walrus", limit=100)
+    faceted = memory.search_memory("walrus", limit=2, facets=["content_type", "entity_type"])
+    
+    assert len(faceted["results"]) == 2
+    assert faceted["total"] == len(everything) == 12
+    assert faceted["facets"]["content_type"] == {"entity": 7, "chat": 5}
+    assert faceted["facets"]["entity_type"] == {"person": 4, "place": 3}
+    assert [r["content_id"] for r in faceted["results"]] == [r["content_id"] for r in everything[:2]]
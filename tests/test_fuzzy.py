@@ -0,0 +1,32 @@
+"""fuzzy=True: a fallback for queries the exact search cannot answer, never paid for otherwise."""
+
+def test_fuzzy_fallback_only_when_the_exact_search_is_empty(memory, monkeypatch):
+    entity_id = memory.create_entity("Archipelago", "place", "islands")["entity_id"]
+    memory.wait_indexed()
+    
+    fallbacks = []
+    fuzzy_search_names = memory.fuzzy_search_names
+    
+    def counting(query, *args, **kwargs):
+        fallbacks.append(query)
+        return fuzzy_search_names(query, *args, **kwargs)
+    monkeypatch.setattr(memory, "fuzzy_search_names", counting)
+    
+    exact = memory.search_memory("archipelago", fuzzy=True)
+    assert [r["content_id"] for r in exact] == [entity_id]
+    assert "match" not in exact[0]
+    assert fallbacks == []
+    
+    misspelled = memory.search_memory("archipelgo", fuzzy=True)
+    assert fallbacks == ["archipelgo"]
+    assert [(r["content_id"], r["match"], r["edits"]) for r in misspelled] == [(entity_id, "fuzzy", 1)]
+    
+    assert memory.search_memory("archipelgo") == []
+    assert fallbacks == ["archipelgo"]
+
+def test_fuzzy_substring_finds_mid_word_text(memory):
+    entity_id = memory.create_entity("Thunderstorm", "concept", "weather")["entity_id"]
+    memory.wait_indexed()
+    
+    results = memory.search_memory("derst", fuzzy=True)
+    assert [(r["content_id"], r["match"]) for r in results] == [(entity_id, "substring")]
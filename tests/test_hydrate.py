@@ -0,0 +1,35 @@
+"""hydrate: search results carry file content, within a max_bytes budget in rank order."""
+
+import pytest
+
+@pytest.fixture
+def ranked(memory):
+    """Three entities matching "ocelot", best first, each with a 1000-byte body."""
+    ids = [memory.create_entity(f"Ocelot {i}", "animal", f"ocelot\n{'spots ' * 166}\n",
+                                summary=f"ocelot summary {i}", importance=1.0 - i / 10)["entity_id"]
+           for i in range(3)]
+    memory.wait_indexed()
+    assert [r["content_id"] for r in memory.search_memory("ocelot")] == ids
+    return ids
+
+def test_full_hydration_stops_at_max_bytes(memory, ranked):
+    results = memory.search_memory("ocelot", hydrate="full", max_bytes=1500)
+    
+    first, second, third = results
+    assert first["truncated"] is False
+    assert first["content"] == memory.get_entity(ranked[0])["content"]
+    used = first["byte_range"][1] - first["byte_range"][0]
+    assert second["truncated"] is True
+    assert second["byte_range"] == [0, 1500 - used]
+    assert len(second["content"].encode("utf-8")) == 1500 - used
+    assert (third["content"], third["byte_range"], third["truncated"]) == (None, None, True)
+
+def test_summary_hydration_cuts_the_last_summary_that_fits(memory, ranked):
+    results = memory.search_memory("ocelot", hydrate="summary", max_bytes=20)
+    
+    assert [(r["content"], r["truncated"]) for r in results] == [
+        ("ocelot summary 0", False), ("ocel", True), (None, True)]
+
+def test_unknown_hydrate_mode_is_rejected(memory):
+    with pytest.raises(ValueError):
+        memory.search_memory("ocelot", hydrate="everything")
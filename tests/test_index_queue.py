@@ -0,0 +1,78 @@
+"""Background index queue: jobs are durable, unchanged documents are skipped, failures are counted."""
+
+import pytest
+
+def _queued(memory):
+    conn = memory.get_connection()
+    rows = conn.execute("SELECT content_type, content_id, attempts FROM index_queue ORDER BY job_id").fetchall()
+    conn.close()
+    return rows
+
+def _ids(results):
+    return [r["content_id"] for r in results]
+
+@pytest.fixture
+def worker(memory, monkeypatch):
+    """A running background worker for this test's storage root."""
+    monkeypatch.setattr(memory, "INDEX_WORKER_ENABLED", True)
+    monkeypatch.setattr(memory, "_index_worker", None)
+    yield
+    if memory._index_worker is not None:
+        memory._index_worker.stop(timeout=5)
+
+def test_stored_chat_is_queued_then_indexed(memory):
+    job = memory.store_chat("c1", "url", "Queued", "User: platypus\n")["index_job"]
+    assert _queued(memory) == [("chat", "c1", 0)]
+    assert memory.search_memory("platypus") == []
+    
+    conn = memory.get_connection()
+    assert memory.process_index_queue(conn) == {"processed": 1, "indexed": 1, "unchanged": 0, "failed": 0}
+    conn.close()
+    assert _queued(memory) == []
+    assert _ids(memory.search_memory("platypus")) == ["c1"]
+    assert memory.index_status()["watermark"] == job
+
+def test_unchanged_document_is_skipped_by_hash(memory):
+    entity_id = memory.create_entity("Hashed", "concept", "ibis")["entity_id"]
+    memory.wait_indexed()
+    conn = memory.get_connection()
+    memory._enqueue_index(conn.cursor(), "entity", entity_id)
+    conn.commit()
+    
+    result = memory.process_index_queue(conn)
+    assert (result["indexed"], result["unchanged"]) == (0, 1)
+    memory.update_entity(entity_id, "more ibis")
+    result = memory.process_index_queue(conn)
+    assert (result["indexed"], result["unchanged"]) == (1, 0)
+    conn.close()
+    assert _ids(memory.search_memory("ibis")) == [entity_id]
+
+def test_unreadable_file_is_counted_as_failed(memory):
+    memory.store_chat("good", "url", "Good", "User: okapi\n")
+    bad = memory.store_chat("bad", "url", "Bad", "User: okapi\n")
+    with open(bad["file"], "wb") as f:
+        f.write(b"\xff\xfe not utf-8")
+    
+    conn = memory.get_connection()
+    result = memory.process_index_queue(conn)
+    conn.close()
+    assert (result["indexed"], result["failed"]) == (1, 1)
+    assert _queued(memory) == [("chat", "bad", 1)]
+    
+    done = memory.wait_indexed()
+    assert (done["status"], done["failed"]) == ("indexed", 1)
+    assert memory.index_status()["failed"] == 1
+    assert _ids(memory.search_memory("okapi")) == ["good"]
+
+def test_wait_indexed_times_out_while_a_job_is_pending(memory):
+    job = memory.store_chat("c1", "url", "Slow", "User: tapir\n")["index_job"]
+    result = memory.wait_indexed(job, timeout=0)
+    assert (result["status"], result["pending"]) == ("timeout", 1)
+    assert memory.wait_indexed(job, timeout=5)["status"] == "indexed"
+
+def test_wait_indexed_returns_when_the_worker_finishes(memory, worker):
+    job = memory.store_chat("c1", "url", "Background", "User: quoll\n")["index_job"]
+    assert memory._index_worker.is_running()
+    
+    assert memory.wait_indexed(job, timeout=10) == {"status": "indexed", "job_id": job, "failed": 0}
+    assert _ids(memory.search_memory("quoll")) == ["c1"]
@@ -0,0 +1,47 @@
+"""Weekly maintenance: an interrupted run resumes by stage and from its reindex checkpoint."""
+
+import pytest
+
+class Killed(Exception):
+    pass
+
+def _search_rows(memory):
+    conn = memory.get_connection()
+    rows = conn.execute(f"SELECT content_id FROM {memory.SEARCH_TABLE} ORDER BY content_id").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+def test_out_of_time_run_resumes_at_the_same_stage(memory):
+    memory.store_chat("c1", "url", "One", "User: marmot\n")
+    
+    first = memory.weekly_maintenance(max_seconds=0.0)
+    assert (first["status"], first["stage"]) == ("partial", "curate")
+    
+    second = memory.weekly_maintenance()
+    assert (second["status"], second["run_id"], second["resumed"]) == ("complete", first["run_id"], True)
+    assert memory.weekly_maintenance()["run_id"] != first["run_id"]
+
+def test_killed_reindex_resumes_from_its_checkpoint(memory):
+    for i in range(7):
+        memory.store_chat(f"c{i}", "url", f"Chat {i}", "User: marmot\n")
+    memory.wait_indexed()
+    
+    batches = []
+    def killed_after_two_batches(done, total):
+        batches.append(done)
+        if len(batches) == 2:
+            raise Killed()
+    with pytest.raises(Killed):
+        memory.weekly_maintenance(workers=1, batch_size=2, progress=killed_after_two_batches)
+    
+    conn = memory.get_connection()
+    checkpoint, processed = conn.execute("""SELECT checkpoint, items_processed FROM maintenance_log
+                                            WHERE stage = 'reindex'""").fetchone()
+    conn.close()
+    assert '"after": ["chat", "c3"]' in checkpoint and processed == 4
+    
+    resumed = []
+    result = memory.weekly_maintenance(workers=1, batch_size=2, progress=lambda done, total: resumed.append(done))
+    assert (result["status"], result["resumed"], result["processed"]) == ("complete", True, 7)
+    assert resumed == [2, 3]
+    assert _search_rows(memory) == [f"c{i}" for i in range(7)]
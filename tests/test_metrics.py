@@ -0,0 +1,61 @@
+"""Operation metrics: only outermost calls are recorded, and both exports report them."""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from conftest import RESOURCES
+
+SCRIPT = textwrap.dedent('''
+    import json, sys
+    import memory_core, memory_metrics
+    for directory in ("database", "chats", "entities", "short-term"):
+        (memory_core.MEMORY_ROOT / directory).mkdir(parents=True, exist_ok=True)
+    memory_core.init_database()
+    memory_core.store_chat("c1", "url", "Metered", "User: dugong")
+    memory_core.wait_indexed()
+    memory_core.search_many(["dugong", "manatee"])
+    json.dump({"json": memory_metrics.export_json(), "prometheus": memory_metrics.export_prometheus()},
+              sys.stdout)
+''')
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    root = tmp_path_factory.mktemp("metrics")
+    env = dict(os.environ, PERFECT_MEMORY_ROOT=str(root), PERFECT_MEMORY_METRICS="1",
+               PERFECT_MEMORY_INDEX_WORKER="off", PYTHONPATH=str(RESOURCES))
+    proc = subprocess.run([sys.executable, "-c", SCRIPT], check=True, capture_output=True, text=True, env=env)
+    return json.loads(proc.stdout)
+
+def test_nested_calls_are_not_recorded(exported):
+    operations = exported["json"]["operations"]
+    assert sorted(operations) == ["init_database", "search_many", "store_chat", "wait_indexed"]
+    assert all(operations[name]["count"] == 1 for name in operations)
+
+def test_counters_belong_to_the_outermost_call(exported):
+    operations = exported["json"]["operations"]
+    # wait_indexed's read of the chat file happens in process_index_queue, on a worker thread
+    assert operations["wait_indexed"]["bytes_read"] > 0
+    assert operations["store_chat"]["bytes_written"] > 0
+    assert operations["search_many"]["sql_statements"] >= 2
+
+def test_export_json_summarizes_each_operation(exported):
+    summary = exported["json"]["operations"]["store_chat"]
+    assert summary["errors"] == 0
+    assert summary["mean_ms"] == pytest.approx(summary["total_seconds"] * 1000, abs=0.001)
+    assert sum(summary["histogram"].values()) == 1
+    assert summary["p50_ms"] == summary["p95_ms"] == summary["p99_ms"]
+
+def test_export_prometheus_is_cumulative(exported):
+    lines = exported["prometheus"].splitlines()
+    buckets = [line for line in lines
+               if line.startswith('perfect_memory_operation_duration_seconds_bucket{operation="search_many"')]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts) and counts[-1] == 1 and buckets[-1].endswith('le="+Inf"} 1')
+    assert 'perfect_memory_operation_duration_seconds_count{operation="search_many"} 1' in lines
+    assert "# TYPE perfect_memory_rows_read_total counter" in lines
+    assert not any('operation="migrate"' in line for line in lines)
@@ -0,0 +1,77 @@
+"""Schema migrations: old databases upgrade in place, on first use, to what schema.sql describes."""
+
+import re
+import sqlite3
+
+import pytest
+
+from conftest import RESOURCES
+
+@pytest.fixture
+def v1_database(memory, monkeypatch):
+    """Replace the fixture's database with one at schema v1, not yet seen by this process."""
+    memory.DB_PATH.unlink()
+    conn = sqlite3.connect(memory.DB_PATH)
+    memory._migrate_v1_base_tables(conn)
+    conn.execute('PRAGMA user_version = 1')
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(memory, "_schema_checked", False)
+    return memory
+
+def _schema(path):
+    """{table: [columns]} of a database, FTS shadow tables left out."""
+    conn = sqlite3.connect(path)
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    shadow = re.compile(r'_(data|idx|content|docsize|config)$')
+    schema = {table: sorted(row[1] for row in conn.execute(f'PRAGMA table_info({table})'))
+              for table in tables if not shadow.search(table) and table != 'sqlite_sequence'}
+    conn.close()
+    return schema
+
+def test_first_connection_upgrades_an_old_database(v1_database):
+    memory = v1_database
+    result = memory.store_chat("c1", "url", "Upgraded chat", "User: hello zebra\n")
+    assert result["status"] == "stored"
+    memory.wait_indexed()
+    
+    assert [r["content_id"] for r in memory.search_memory("zebra")] == ["c1"]
+    conn = sqlite3.connect(memory.DB_PATH)
+    assert memory.get_schema_version(conn) == memory.SCHEMA_VERSION
+    conn.close()
+
+def test_v1_entities_are_queued_for_sections_and_messages(v1_database):
+    memory = v1_database
+    conn = sqlite3.connect(memory.DB_PATH)
+    entity_file = memory.ENTITIES_DIR / "concept" / "entity_old.md"
+    entity_file.parent.mkdir(parents=True)
+    entity_file.write_text("# Old\n\n## Notes\nquokka facts\n", encoding="utf-8")
+    conn.execute("INSERT INTO entities (entity_id, entity_type, name, summary, file_path) "
+                 "VALUES ('entity_old', 'concept', 'Old', 'also known as Oldie', ?)", (str(entity_file),))
+    conn.commit()
+    conn.close()
+    
+    memory.wait_indexed()
+    assert [s["heading"] for s in memory.get_entity_sections("entity_old")] == ["Old", "Notes"]
+    assert memory.search_memory("quokka")[0]["section"]["heading"] == "Notes"
+    assert [r["content_id"] for r in memory.search_memory("oldie")] == ["entity_old"]
+
+def test_migrate_is_idempotent(memory):
+    conn = sqlite3.connect(memory.DB_PATH)
+    result = memory.migrate(conn)
+    conn.close()
+    assert (result["status"], result["applied"]) == ("current", [])
+
+def test_schema_sql_converges_with_migrations(memory, tmp_path):
+    from_sql = tmp_path / "from_schema_sql.db"
+    conn = sqlite3.connect(from_sql)
+    conn.executescript((RESOURCES / "database" / "schema.sql").read_text(encoding="utf-8"))
+    memory.migrate(conn)
+    conn.close()
+    
+    assert _schema(from_sql) == _schema(memory.DB_PATH)
+
+def test_schema_sql_states_the_current_version():
+    header = (RESOURCES / "database" / "schema.sql").read_text(encoding="utf-8")[:1000]
+    import memory_core
+    assert f"(version {memory_core.SCHEMA_VERSION})" in header
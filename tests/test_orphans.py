@@ -0,0 +1,91 @@
+"""Orphan reconciliation: files without rows and rows without files, removed only when it is safe."""
+
+import json
+import os
+import time
+
+import pytest
+
+def _file_path(memory, entity_id):
+    conn = memory.get_connection()
+    path = conn.execute("SELECT file_path FROM entities WHERE entity_id = ?", (entity_id,)).fetchone()[0]
+    conn.close()
+    return path
+
+def _age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+@pytest.fixture
+def orphans(memory):
+    """One healthy entity, one row whose file is gone and one old file without a row."""
+    kept = memory.create_entity("Kept", "concept", "kept walrus")["entity_id"]
+    lost = memory.create_entity("Lost", "concept", "lost walrus")["entity_id"]
+    memory.wait_indexed()
+    memory.get_entity(lost)  # leaves a memory_index row behind
+    os.remove(_file_path(memory, lost))
+    
+    stray = memory.CHATS_DIR / "stray.md"
+    stray.write_text("# Stray\n", encoding="utf-8")
+    _age(stray, memory.ORPHAN_GRACE_SECONDS + 60)
+    return kept, lost, stray
+
+def _count(conn, sql, content_id):
+    return conn.execute(sql, (content_id,)).fetchone()[0]
+
+def test_report_changes_nothing(memory, orphans):
+    kept, lost, stray = orphans
+    result = memory.reconcile_orphans()
+    
+    assert result["orphan_rows"] == [lost]
+    assert result["orphan_files"] == [str(stray)]
+    assert stray.exists() and memory.get_entity(lost)["entity_id"] == lost
+
+def test_young_files_are_left_alone(memory, orphans):
+    fresh = memory.CHATS_DIR / "fresh.md"
+    fresh.write_text("# Being written\n", encoding="utf-8")
+    result = memory.reconcile_orphans("delete")
+    
+    assert result["recent_files_skipped"] == 1
+    assert fresh.exists() and not orphans[2].exists()
+
+def test_delete_removes_every_trace_of_an_orphan_row(memory, orphans):
+    kept, lost, _ = orphans
+    conn = memory.get_connection()
+    conn.execute("INSERT INTO index_queue (content_type, content_id) VALUES ('entity', ?)", (lost,))
+    conn.commit()
+    assert memory.reconcile_orphans("delete")["status"] == "complete"
+    
+    assert _count(conn, "SELECT COUNT(*) FROM entities WHERE entity_id = ?", lost) == 0
+    assert _count(conn, f"SELECT COUNT(*) FROM {memory.SEARCH_TABLE} WHERE content_id = ?", lost) == 0
+    assert _count(conn, "SELECT COUNT(*) FROM memory_index WHERE content_id = ?", lost) == 0
+    assert _count(conn, "SELECT COUNT(*) FROM index_queue WHERE content_id = ?", lost) == 0
+    conn.close()
+    assert [r["content_id"] for r in memory.search_memory("walrus")] == [kept]
+
+def test_refuses_when_every_row_is_an_orphan(memory, orphans):
+    kept, lost, stray = orphans
+    os.remove(_file_path(memory, kept))
+    
+    for action in ("delete", "quarantine"):
+        result = memory.reconcile_orphans(action)
+        assert result["status"] == "refused" and "storage root" in result["message"]
+    assert stray.exists()
+    assert [memory.get_entity(entity_id).get("entity_id") for entity_id in (kept, lost)] == [kept, lost]
+
+def test_quarantine_keeps_what_it_removes(memory, orphans):
+    _, lost, stray = orphans
+    memory.reconcile_orphans("quarantine")
+    
+    assert not stray.exists()
+    assert any(path.name.startswith("stray") for path in memory.QUARANTINE_DIR.rglob("*"))
+    rows = (memory.QUARANTINE_DIR / "orphan_rows.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(row)["content_id"] for row in rows] == [lost]
+
+def test_passed_connection_leaves_the_commit_to_the_caller(memory, orphans):
+    _, lost, _ = orphans
+    conn = memory.get_connection()
+    memory.reconcile_orphans("delete", conn=conn)
+    conn.rollback()
+    conn.close()
+    assert memory.get_entity(lost)["entity_id"] == lost
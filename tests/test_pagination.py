@@ -0,0 +1,85 @@
+"""Keyset cursors: pages neither repeat nor skip items, even when sort keys tie."""
+
+import pytest
+
+def _page_through(fetch, key, limit):
+    seen = []
+    cursor = None
+    while True:
+        page = fetch(limit=limit, cursor=cursor)
+        if not page:
+            return seen
+        seen += [item[key] for item in page]
+        cursor = page[-1]["cursor"]
+
+def test_list_entities_pages_through_tied_timestamps(memory):
+    ids = [memory.create_entity(f"Entity {i}", "concept", "body")["entity_id"] for i in range(11)]
+    conn = memory.get_connection()
+    conn.execute("UPDATE entities SET updated_at = '2025-01-01 00:00:00'")
+    conn.commit()
+    conn.close()
+    
+    seen = _page_through(memory.list_entities, "entity_id", 3)
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+
+def test_list_chats_respects_since_across_pages(memory):
+    for i in range(6):
+        memory.store_chat(f"chat{i}", "url", f"Chat {i}", "text")
+    conn = memory.get_connection()
+    conn.execute("UPDATE chats SET updated_at = '2024-06-01 00:00:00' WHERE chat_id IN ('chat0', 'chat1')")
+    conn.commit()
+    conn.close()
+    
+    seen = _page_through(lambda **kw: memory.list_chats(since="2025-01-01", **kw), "chat_id", 2)
+    assert sorted(seen) == ["chat2", "chat3", "chat4", "chat5"]
+
+def test_search_cursor_pages_through_equal_relevance(memory):
+    ids = [memory.create_entity(f"Twin {i}", "concept", "identical aardvark text")["entity_id"] for i in range(9)]
+    memory.wait_indexed()
+    
+    seen = _page_through(lambda **kw: memory.search_memory("aardvark", boosts={"recency": 0}, **kw),
+                         "content_id", 4)
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+
+def test_search_cursor_keeps_order_when_results_are_added(memory):
+    for i in range(6):
+        memory.create_entity(f"Heron {i}", "concept", "heron " * (i + 1))
+    memory.wait_indexed()
+    first = memory.search_memory("heron", limit=3)
+    
+    memory.create_entity("Heron late", "concept", "heron heron heron heron heron heron heron")
+    memory.wait_indexed()
+    rest = memory.search_memory("heron", limit=10, cursor=first[-1]["cursor"])
+    
+    relevances = [r["relevance"] for r in first + rest]
+    assert relevances == sorted(relevances)
+    assert not {r["content_id"] for r in first} & {r["content_id"] for r in rest}
+
+def test_invalid_cursor_is_rejected(memory):
+    with pytest.raises(ValueError):
+        memory.list_entities(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        memory.search_memory("anything", cursor="bm90IGpzb24=")
+
+def test_search_time_filter_follows_the_column_names(memory):
+    for chat_id in ("old", "new"):
+        memory.store_chat(chat_id, "url", f"Chat {chat_id}", "User: lemur\n")
+    memory.wait_indexed()
+    conn = memory.get_connection()
+    conn.execute("UPDATE chats SET updated_at = '2024-03-01 00:00:00' WHERE chat_id = 'old'")
+    conn.execute("UPDATE chats SET updated_at = '2025-03-01 00:00:00' WHERE chat_id = 'new'")
+    # Same columns in another order, so the FTS5 storage layout differs
+    conn.execute("ALTER TABLE memory_search RENAME TO memory_search_before")
+    conn.execute("""CREATE VIRTUAL TABLE memory_search USING fts5(
+                        content, summary, title, content_type UNINDEXED, content_id UNINDEXED)""")
+    conn.execute("""INSERT INTO memory_search (content_id, content_type, title, summary, content)
+                    SELECT content_id, content_type, title, summary, content FROM memory_search_before""")
+    conn.commit()
+    conn.close()
+    
+    assert [r["content_id"] for r in memory.search_memory("lemur", since="2025-01-01")] == ["new"]
+    assert [r["content_id"] for r in memory.search_memory("lemur", until="2025-01-01")] == ["old"]
+    faceted = memory.search_memory("lemur", facets=["content_type", "month"])
+    assert faceted["facets"] == {"content_type": {"chat": 2}, "month": {"2024-03": 1, "2025-03": 1}}
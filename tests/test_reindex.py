@@ -0,0 +1,31 @@
+"""reindex_memory_search: a parallel, batched pass that skips files it cannot read."""
+
+def _corpus(memory, n=7):
+    ids = [memory.create_entity(f"Entity {i}", "concept", f"capybara number {i}")["entity_id"] for i in range(n)]
+    memory.wait_indexed()
+    return ids
+
+def test_unreadable_file_is_skipped_and_the_rest_indexed(memory):
+    ids = _corpus(memory)
+    (memory.ENTITIES_DIR / "concept" / f"{ids[3]}.md").write_bytes(b"# Broken\n\n\xff\xfe not utf-8\n")
+    conn = memory.get_connection()
+    conn.execute("DELETE FROM memory_search")
+    
+    progress = []
+    result = memory.reindex_memory_search(conn, workers=3, batch_size=2,
+                                          progress=lambda done, total: progress.append((done, total)))
+    conn.commit()
+    conn.close()
+    
+    assert (result["indexed"], result["skipped"], result["complete"]) == (6, 1, True)
+    assert progress == [(2, 7), (4, 7), (6, 7), (7, 7)]
+    found = {r["content_id"] for r in memory.search_memory("capybara", limit=20)}
+    assert found == set(ids) - {ids[3]}
+
+def test_rebuild_reports_skipped_files(memory):
+    ids = _corpus(memory, 3)
+    (memory.ENTITIES_DIR / "concept" / f"{ids[0]}.md").write_bytes(b"\xff")
+    
+    result = memory.rebuild_memory_search(workers=2, batch_size=2)
+    assert (result["indexed"], result["skipped"]) == (2, 1)
+    assert {r["content_id"] for r in memory.search_memory("capybara")} == set(ids[1:])
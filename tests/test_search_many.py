@@ -0,0 +1,30 @@
+"""search_many(merge=True): reciprocal rank fusion of several queries' results."""
+
+import pytest
+
+def _hits(*ids):
+    return [{"content_type": "entity", "content_id": content_id} for content_id in ids]
+
+def test_fusion_ranks_agreement_over_a_single_top_hit(memory):
+    merged = memory.fuse_results({"q1": _hits("a", "b", "c"), "q2": _hits("b", "d")})
+    
+    k = memory.SEARCH_FUSION_K
+    assert [item["content_id"] for item in merged] == ["b", "a", "d", "c"]
+    assert merged[0]["queries"] == ["q1", "q2"]
+    assert merged[0]["fusion_score"] == pytest.approx(1 / (k + 2) + 1 / (k + 1))
+    assert merged[1]["fusion_score"] == pytest.approx(1 / (k + 1))
+    assert [item["content_id"] for item in memory.fuse_results({"q1": _hits("a", "b")}, limit=1)] == ["a"]
+
+def test_ties_go_to_the_better_best_rank(memory):
+    merged = memory.fuse_results({"q1": _hits("a", "b"), "q2": _hits("b", "a")})
+    assert [item["content_id"] for item in merged] == ["a", "b"]
+
+def test_merged_search_keeps_each_hit_once(memory):
+    both = memory.create_entity("Dugong", "animal", "a manatee relative")["entity_id"]
+    dugong_only = memory.create_entity("Sea cow notes", "animal", "dugong grazing")["entity_id"]
+    memory.wait_indexed()
+    
+    result = memory.search_many(["dugong", "manatee", "dugong"], merge=True)
+    assert list(result["by_query"]) == ["dugong", "manatee"]
+    assert [item["content_id"] for item in result["merged"]] == [both, dugong_only]
+    assert result["merged"][0]["queries"] == ["dugong", "manatee"]
@@ -0,0 +1,79 @@
+"""Online FTS rebuild: the shadow table is checked before the swap and caught up without reading under the lock."""
+
+import sqlite3
+
+import pytest
+
+def _ids(results):
+    return sorted(r["content_id"] for r in results)
+
+def _live_rows(memory):
+    conn = memory.get_connection()
+    rows = conn.execute(f"SELECT content_id, content FROM {memory.SEARCH_TABLE} ORDER BY content_id").fetchall()
+    conn.close()
+    return rows
+
+@pytest.fixture
+def shadow(memory):
+    """Two chats indexed live, then a shadow table filled from them and left unswapped."""
+    memory.store_chat("c1", "url", "One", "User: gecko\n")
+    memory.store_chat("c2", "url", "Two", "User: gecko\n")
+    memory.wait_indexed()
+    conn = memory.get_connection()
+    conn.execute("UPDATE chats SET updated_at = '1999-01-01 00:00:00'")
+    conn.commit()
+    memory.start_shadow_search_table(conn)
+    result = memory.reindex_memory_search(conn, workers=1, table=memory.SHADOW_SEARCH_TABLE)
+    conn.commit()
+    yield conn, result["indexed"]
+    conn.close()
+
+def test_swap_catches_up_writes_made_during_the_rebuild(memory, shadow, monkeypatch):
+    conn, indexed = shadow
+    memory.store_chat("c3", "url", "Three", "User: gecko\n")
+    memory.wait_indexed()
+    conn.execute("UPDATE chats SET updated_at = '2000-01-01 00:00:01' WHERE chat_id = 'c3'")
+    conn.commit()
+    
+    writable = []
+    load = memory._load_queued_row
+    def load_and_probe(source):
+        other = sqlite3.connect(memory.DB_PATH, timeout=0)
+        try:
+            other.execute("BEGIN IMMEDIATE")
+            other.rollback()
+            writable.append(True)
+        except sqlite3.OperationalError:
+            writable.append(False)
+        other.close()
+        return load(source)
+    monkeypatch.setattr(memory, "_load_queued_row", load_and_probe)
+    result = memory.swap_search_table(conn, "2000-01-01 00:00:00", expected_rows=indexed)
+    
+    assert result == {"status": "swapped", "caught_up": 1}
+    assert writable == [True]
+    assert _ids(memory.search_memory("gecko")) == ["c1", "c2", "c3"]
+    stored_hash = conn.execute("SELECT content_hash FROM chats WHERE chat_id = 'c3'").fetchone()[0]
+    assert stored_hash is not None
+
+def test_failed_integrity_check_leaves_the_live_table(memory, shadow):
+    conn, indexed = shadow
+    before = _live_rows(memory)
+    conn.execute(f"DELETE FROM {memory.SHADOW_SEARCH_TABLE}_content WHERE id = (SELECT MIN(id) FROM "
+                 f"{memory.SHADOW_SEARCH_TABLE}_content)")
+    conn.commit()
+    
+    result = memory.swap_search_table(conn, "2000-01-01 00:00:00", expected_rows=indexed)
+    assert result["status"] == "error" and "integrity" in result["message"]
+    assert _live_rows(memory) == before
+    assert memory._table_exists(conn, memory.SHADOW_SEARCH_TABLE)
+    assert _ids(memory.search_memory("gecko")) == ["c1", "c2"]
+
+def test_row_count_mismatch_leaves_the_live_table(memory, shadow):
+    conn, indexed = shadow
+    before = _live_rows(memory)
+    
+    result = memory.swap_search_table(conn, "2000-01-01 00:00:00", expected_rows=indexed + 1)
+    assert result == {"status": "error", "message": f"Shadow index has {indexed} rows, expected {indexed + 1}"}
+    assert _live_rows(memory) == before
+    assert _ids(memory.search_memory("gecko")) == ["c1", "c2"]
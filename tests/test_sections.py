@@ -0,0 +1,66 @@
+"""Entity sections: byte ranges are exact on non-ASCII text and the CLI writes the same file as the API."""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import RESOURCES
+
+def _file_bytes(memory, entity_id):
+    conn = memory.get_connection()
+    path = conn.execute("SELECT file_path FROM entities WHERE entity_id = ?", (entity_id,)).fetchone()[0]
+    conn.close()
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_byte_ranges_cover_non_ascii_sections(memory):
+    content = "## Café ☕\nnaïve résumé\n\n```\n# not a heading\n```\n\n## 日本語\n東京の記録\n"
+    entity_id = memory.create_entity("Ünïcode", "concept", content)["entity_id"]
+    memory.wait_indexed()
+    data = _file_bytes(memory, entity_id)
+    
+    sections = memory.get_entity_sections(entity_id)
+    assert [s["heading"] for s in sections] == ["Ünïcode", "Café ☕", "日本語"]
+    for section in sections:
+        start, end = section["byte_range"]
+        fetched = memory.get_entity_section(entity_id, section["section_idx"])
+        assert fetched["byte_range"] == [start, end]
+        assert fetched["content"] == data[start:end].decode("utf-8")
+    assert memory.get_entity_section(entity_id, 1)["content"].endswith("# not a heading\n```")
+    assert memory.get_entity_section(entity_id, 2)["content"] == "## 日本語\n東京の記録"
+    assert memory.get_entity_section(entity_id, 3) == {"status": "error", "message": "Section not found"}
+
+def test_heading_less_file_is_one_section(memory):
+    entity_id = memory.create_entity("Plain", "concept", "x")["entity_id"]
+    memory.update_entity(entity_id, "\n\njust text, no headings\nsecond line\n\n", append=False)
+    memory.wait_indexed()
+    
+    assert memory.get_entity_sections(entity_id) == [
+        {"section_idx": 0, "heading": "", "byte_range": [2, 2 + len("just text, no headings\nsecond line")]}]
+    assert memory.get_entity_section(entity_id, 0)["content"] == "just text, no headings\nsecond line"
+
+def test_appended_updates_are_their_own_sections(memory):
+    entity_id = memory.create_entity("Grows", "concept", "first")["entity_id"]
+    memory.update_entity(entity_id, "second")
+    memory.wait_indexed()
+    
+    headings = [s["heading"] for s in memory.get_entity_sections(entity_id)]
+    assert headings[0] == "Grows" and headings[-1].startswith("Updated ")
+    assert memory.get_entity_section(entity_id, len(headings) - 1)["content"].endswith("second")
+
+def test_cli_writes_the_same_file_as_the_api(memory):
+    env = dict(os.environ, PERFECT_MEMORY_ROOT=str(memory.MEMORY_ROOT))
+    proc = subprocess.run([sys.executable, str(RESOURCES / "create_entity.py"), "Robin", "person", "The keeper"],
+                          input="## Notes\nlighthouse\n", check=True, capture_output=True, text=True, env=env)
+    from_cli = json.loads(proc.stdout)["entity_id"]
+    from_api = memory.create_entity("Robin", "person", "## Notes\nlighthouse\n", summary="The keeper")["entity_id"]
+    memory.wait_indexed()
+    
+    def without_created(entity_id):
+        return [line for line in _file_bytes(memory, entity_id).splitlines() if not line.startswith(b"**Created:**")]
+    assert without_created(from_cli) == without_created(from_api)
+    header = _file_bytes(memory, from_cli).split(b"\n---\n")[0]
+    assert b"**Summary:** The keeper" in header
+    assert [s["heading"] for s in memory.get_entity_sections(from_cli)] == ["Robin", "Notes"]
+    assert memory.get_entity(from_cli)["summary"] == "The keeper"
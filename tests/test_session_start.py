@@ -0,0 +1,38 @@
+"""The session-start harness: load_context.py timed phase by phase, against a budget."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RESOURCES
+from benchmarks import session_start
+
+def test_phases_add_up_to_the_whole_run(memory):
+    memory.store_ability("Deploy", "ships the app")
+    
+    phases = session_start.run_once(memory.MEMORY_ROOT)
+    
+    assert set(phases) == set(session_start.PHASES) | {"total"}
+    assert all(phases[name] >= 0 for name in session_start.PHASES)
+    assert sum(phases[name] for name in session_start.PHASES) == pytest.approx(phases["total"])
+
+def test_summary_reports_percentiles_per_phase():
+    runs = [dict.fromkeys(session_start.PHASES + ["total"], float(ms)) for ms in range(1, 21)]
+    
+    summary = session_start.summarize_runs(runs)
+    assert summary["total"]["max_ms"] == 20.0
+    assert summary["queries"]["p50_ms"] <= summary["queries"]["p95_ms"] <= 20.0
+
+@pytest.mark.parametrize("budget_ms, returncode, status", [(10000, 0, "pass"), (0, 1, "fail")])
+def test_exits_non_zero_over_budget(memory, budget_ms, returncode, status):
+    proc = subprocess.run([sys.executable, str(RESOURCES / "benchmarks" / "session_start.py"),
+                           "--root", str(memory.MEMORY_ROOT), "--runs", "2", "--cold-runs", "0",
+                           "--budget-ms", str(budget_ms)],
+                          capture_output=True, text=True)
+    
+    assert proc.returncode == returncode, proc.stderr
+    report = json.loads(proc.stdout)
+    assert report["status"] == status
+    assert report["cold"] is None and report["warm"]["total"]["max_ms"] > 0
@@ -0,0 +1,39 @@
+"""Slow-query log: statements over SLOW_QUERY_MS are kept with their plan, never their values."""
+
+def _log_statements(memory, monkeypatch, *statements):
+    monkeypatch.setattr(memory, "SLOW_QUERY_MS", 0)
+    conn = memory.get_connection()
+    for statement, params in statements:
+        conn.execute(statement, params).fetchall()
+    conn.close()
+    monkeypatch.setattr(memory, "SLOW_QUERY_MS", None)
+
+def test_query_is_logged_with_its_plan(memory, monkeypatch):
+    _log_statements(memory, monkeypatch,
+                    ("SELECT chat_id FROM chats WHERE title = ?", ("secret title",)),
+                    ("SELECT chat_id FROM chats WHERE chat_id = ?", ("c1",)))
+    
+    lookup, scan = memory.get_slow_queries()  # newest first
+    assert scan["statement"] == "SELECT chat_id FROM chats WHERE title = ?"
+    assert scan["params"] == ["<str:12>"]
+    assert scan["query_plan"].startswith("SCAN chats")
+    assert scan["full_scan"] is True and scan["temp_btree"] is False
+    assert scan["duration_ms"] >= 0
+    assert lookup["query_plan"].startswith("SEARCH chats USING") and lookup["full_scan"] is False
+    assert [q["statement"] for q in memory.get_slow_queries(full_scans_only=True)] == [scan["statement"]]
+
+def test_sort_without_an_index_is_flagged(memory, monkeypatch):
+    _log_statements(memory, monkeypatch, ("SELECT name FROM entities ORDER BY summary", ()))
+    assert memory.get_slow_queries(limit=1)[0]["temp_btree"] is True
+
+def test_clear_empties_the_log(memory, monkeypatch):
+    _log_statements(memory, monkeypatch, ("SELECT COUNT(*) FROM chats", ()))
+    
+    assert memory.clear_slow_queries() == {"status": "cleared", "entries": 1}
+    assert memory.get_slow_queries() == []
+
+def test_nothing_is_logged_under_the_threshold(memory):
+    conn = memory.get_connection()
+    conn.execute("SELECT chat_id FROM chats").fetchall()
+    conn.close()
+    assert memory.get_slow_queries() == []
@@ -0,0 +1,25 @@
+"""Snippets and highlights: cut and marked by FTS5 from the indexed text, no file read."""
+
+def test_snippet_wraps_the_matched_term(memory):
+    body = " ".join(f"word{i}" for i in range(200)) + " pangolin " + " ".join(f"tail{i}" for i in range(200))
+    memory.create_entity("Notes", "concept", body)
+    memory.wait_indexed()
+    
+    snippet = memory.search_memory("pangolin", snippet_tokens=6)[0]["snippet"]
+    assert "[pangolin]" in snippet
+    assert snippet.startswith(memory.SNIPPET_ELLIPSIS) and snippet.endswith(memory.SNIPPET_ELLIPSIS)
+    assert len(snippet.replace(memory.SNIPPET_ELLIPSIS, " ").split()) == 6
+    
+    custom = memory.search_memory("pangolin", snippet_tokens=6, markers=("<b>", "</b>"))[0]["snippet"]
+    assert "<b>pangolin</b>" in custom
+
+def test_highlight_marks_title_and_summary(memory):
+    memory.create_entity("Pangolin facts", "animal", "scales", summary="The pangolin eats ants")
+    memory.wait_indexed()
+    
+    plain = memory.search_memory("pangolin")[0]
+    assert (plain["title"], plain["summary"]) == ("Pangolin facts", "The pangolin eats ants")
+    assert "snippet" not in plain
+    
+    marked = memory.search_memory("pangolin", highlight=True)[0]
+    assert (marked["title"], marked["summary"]) == ("[Pangolin] facts", "The [pangolin] eats ants")
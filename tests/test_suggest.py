@@ -0,0 +1,20 @@
+"""suggest(): name typeahead ranked by importance, then name, and cut at k."""
+
+def test_suggestions_are_ranked_and_limited_by_k(memory):
+    for name, importance in [("Robin Hood", 0.2), ("Robinson Crusoe", 0.9), ("Robert Frost", 0.9),
+                             ("Robyn Fenty", 0.5), ("Rosalind Franklin", 1.0)]:
+        memory.create_entity(name, "person", "biography", importance=importance)
+    memory.store_chat("c1", "url", "Robots at work", "User: hi\n")
+    memory.wait_indexed()
+    
+    names = [s["name"] for s in memory.suggest("rob", k=10)]
+    assert names == ["Robert Frost", "Robinson Crusoe", "Robots at work", "Robyn Fenty", "Robin Hood"]
+    assert [s["name"] for s in memory.suggest("rob", k=3)] == names[:3]
+    assert [s["name"] for s in memory.suggest("rob cru")] == ["Robinson Crusoe"]
+
+def test_suggest_matches_names_not_content(memory):
+    memory.create_entity("Lighthouse", "place", "robin nests on the gallery")
+    memory.wait_indexed()
+    
+    assert memory.suggest("robin") == []
+    assert memory.suggest("   ") == []
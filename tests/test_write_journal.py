@@ -0,0 +1,141 @@
+"""Write journal: exactly-once replay, torn and corrupt segments, recovery of other processes' segments."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RESOURCES
+
+def _ability(name, description="d"):
+    return (f"ability_{name}", json.dumps({"ability": name, "description": description}), "ability")
+
+def _short_term(memory, key):
+    conn = memory.get_connection()
+    row = conn.execute("SELECT value FROM short_term_memory WHERE key = ?", (key,)).fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+@pytest.fixture
+def journal(memory, monkeypatch):
+    """This process's journal, compacting only when asked."""
+    journal = memory.WriteJournal(directory=memory.JOURNAL_DIR, compact_interval=3600)
+    monkeypatch.setattr(memory, "_write_journal", journal)
+    monkeypatch.setattr(memory, "WRITE_JOURNAL_ENABLED", True)
+    yield journal
+    journal.close()
+
+def _dead_segment(memory, name="1-999999-dead.log"):
+    """A segment named for a pid that is not running."""
+    memory.JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+    return memory.JOURNAL_DIR / name
+
+def test_replay_applies_each_record_once(memory):
+    path = _dead_segment(memory)
+    path.write_bytes(memory._encode_journal_record(_ability("once")))
+    conn = memory.get_connection()
+    
+    assert memory.replay_journal_segment(conn, path)["replayed"] == 1
+    assert memory.replay_journal_segment(conn, path)["replayed"] == 0
+    with open(path, 'ab') as f:
+        f.write(memory._encode_journal_record(_ability("twice")))
+    assert memory.replay_journal_segment(conn, path)["replayed"] == 1
+    conn.close()
+    assert _short_term(memory, "ability_twice")["ability"] == "twice"
+
+def test_torn_tail_replays_the_complete_records(memory):
+    path = _dead_segment(memory)
+    record = memory._encode_journal_record(_ability("whole"))
+    path.write_bytes(record + record[:10])
+    conn = memory.get_connection()
+    
+    result = memory.replay_journal_segment(conn, path)
+    conn.close()
+    assert (result["replayed"], result["state"], result["applied_bytes"]) == (1, "torn", len(record))
+
+def test_corrupt_segment_is_quarantined_after_recovery(memory):
+    path = _dead_segment(memory)
+    good = memory._encode_journal_record(_ability("good"))
+    bad = memory._encode_journal_record(_ability("bad")).replace(b'ability_bad', b'ability_bax', 1)
+    path.write_bytes(good + bad)
+    
+    totals = memory.recover_write_journal(stale_seconds=0)
+    assert (totals["replayed"], totals["quarantined"]) == (1, 1)
+    assert not path.exists()
+    assert _short_term(memory, "ability_good") and not _short_term(memory, "ability_bad")
+
+def test_replay_never_moves_a_key_back_in_time(memory):
+    path = _dead_segment(memory)
+    path.write_bytes(memory._encode_journal_record(_ability("clock", "journaled")))
+    conn = memory.get_connection()
+    conn.execute("""INSERT INTO short_term_memory (key, value, category, updated_at)
+                    VALUES ('ability_clock', '{"ability": "clock", "description": "newer"}', 'ability',
+                            '2999-01-01 00:00:00')""")
+    conn.commit()
+    memory.replay_journal_segment(conn, path)
+    conn.close()
+    assert _short_term(memory, "ability_clock")["description"] == "newer"
+
+def test_recovery_leaves_live_segments_alone(memory, journal):
+    memory.store_ability("A1", "one")
+    segments = list(memory.JOURNAL_DIR.glob("*.log"))
+    
+    # Another process (this CLI) owns none of them, even with stale_seconds=0
+    subprocess.run([sys.executable, str(RESOURCES / "write_journal.py"), "recover", "0"], check=True,
+                   env=dict(os.environ, PERFECT_MEMORY_ROOT=str(memory.MEMORY_ROOT)), capture_output=True)
+    assert all(path.exists() for path in segments)
+    
+    memory.store_ability("A2", "two")
+    assert journal.compact()["replayed"] == 2
+    assert _short_term(memory, "ability_a1") and _short_term(memory, "ability_a2")
+
+def test_compact_drops_segments_that_vanished(memory, journal):
+    memory.store_ability("gone", "x")
+    journal._seal()
+    for path in memory.JOURNAL_DIR.glob("*.log"):
+        path.unlink()
+    
+    assert journal.compact()["missing"] == 1
+    assert journal.compact()["missing"] == 0
+    memory.store_ability("after", "y")
+    assert journal.compact()["replayed"] == 1
+
+def test_unreplayed_tail_is_visible_to_readers(memory, journal):
+    memory.store_ability("Pending", "not compacted yet")
+    assert _short_term(memory, "ability_pending") is None
+    assert "Pending" in [a["ability"] for a in memory.get_all_abilities()]
+    
+    proc = subprocess.run([sys.executable, str(RESOURCES / "load_context.py")], check=True, capture_output=True,
+                          text=True, env=dict(os.environ, PERFECT_MEMORY_ROOT=str(memory.MEMORY_ROOT)))
+    assert "Pending" in [a["ability"] for a in json.loads(proc.stdout)["abilities"]]
+
+@pytest.mark.parametrize("journal_setting", ["on", "off"])
+def test_cli_writes_go_through_memory_core(memory, journal_setting):
+    env = dict(os.environ, PERFECT_MEMORY_ROOT=str(memory.MEMORY_ROOT), PERFECT_MEMORY_WRITE_JOURNAL=journal_setting)
+    for script, name in (("store_ability.py", "Web-Search"), ("store_permission.py", "Shell Access")):
+        proc = subprocess.run([sys.executable, str(RESOURCES / script), name, "details"], check=True,
+                              env=env, capture_output=True, text=True)
+        assert json.loads(proc.stdout)["status"] == "stored"
+    
+    # The journal is compacted when the CLI exits
+    assert _short_term(memory, "ability_web_search")["ability"] == "Web-Search"
+    assert _short_term(memory, "permission_shell_access")["details"] == "details"
+    assert list(memory.JOURNAL_DIR.glob("*.log")) == []
+
+def test_journal_tail_reads_what_replay_would_apply(memory):
+    path = _dead_segment(memory)
+    first = memory._encode_journal_record(_ability("applied"))
+    path.write_bytes(first + memory._encode_journal_record(_ability("pending")))
+    conn = memory.get_connection()
+    conn.execute("INSERT INTO journal_segments (segment, applied_bytes, records) VALUES (?, ?, 1)",
+                 (path.name, len(first)))
+    conn.commit()
+    conn.close()
+    with open(path, 'ab') as f:
+        f.write(b"00000000 {}\n" + memory._encode_journal_record(_ability("after_corruption")))
+    
+    assert [record[0] for record in memory.iter_journal_tail()] == ["ability_pending"]
+    assert _short_term(memory, "ability_pending") is None
+    assert path.stat().st_size > 0